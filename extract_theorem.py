@@ -1,18 +1,19 @@
-import re
+import os
+import sys
+
+# Share the streaming .tex scanner with the extension's pipeline
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "manim-gen", "manim-scripts"))
+from tex_scan import scan_tex
 
 def extract_theorem(tex_file):
-    with open(tex_file, 'r') as f:
-        content = f.read()
-    theorem_pattern = re.compile(r'\\begin{theorem}(.*?)\\end{theorem}', re.DOTALL)
-    match = theorem_pattern.search(content)
-    if match:
-        theorem = match.group(1).strip()
+    # Follows \input/\include; the first theorem wins, as before
+    for item in scan_tex(tex_file, environments=("theorem",)):
+        theorem = item["body"]
         with open('inputs/theorem.txt', 'w') as f:
             f.write(theorem)
         return theorem
-    else:
-        raise ValueError("No theorem found in the .tex file.")
+    raise ValueError("No theorem found in the .tex file.")
 
 if __name__ == "__main__":
     theorem = extract_theorem("inputs/theorem.tex")
-    print("Extracted Theorem:\n", theorem)
\ No newline at end of file
+    print("Extracted Theorem:\n", theorem)
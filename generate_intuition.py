@@ -1,5 +1,11 @@
 import google.generativeai as genai
 import os
+import sys
+
+# Share the LLM round logging and offline stand-ins with the extension's pipeline
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "manim-gen", "manim-scripts"))
+from repair import timed
+from replay import new_model
 
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))  # Set your API key
 
@@ -7,7 +13,7 @@ def generate_intuition():
     with open('inputs/theorem.txt', 'r') as f:
         theorem = f.read()
     
-    model = genai.GenerativeModel('gemini-2.5-flash-preview-04-17')
+    model = new_model('gemini-2.5-flash-preview-04-17', genai.GenerativeModel)
     prompt = f"""
     Explain the intuition behind this theorem in a way specifically optimized for creating a visual animation.
 
@@ -22,7 +28,7 @@ def generate_intuition():
 
     Theorem: {theorem}
     """
-    response = model.generate_content(prompt)
+    response = timed(model.generate_content, prompt, "intuition", "full")
     intuition = response.text
     
     with open('inputs/intuition.txt', 'w') as f:
@@ -1,6 +1,13 @@
 import google.generativeai as genai
 import os
 import re
+import sys
+
+# Share the static API checker and diff repair helpers with the extension's pipeline
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "manim-gen", "manim-scripts"))
+from api_check import check_script, format_findings, load_index
+from repair import PatchError, apply_unified_diff, diff_prompt, extract_diff, timed
+from replay import new_model
 
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
@@ -9,11 +16,11 @@ def extract_code_block(text):
     match = re.search(r'```python\s*(.*?)\s*```', text, re.DOTALL)
     return match.group(1).strip() if match else text.strip()
 
-def generate_with_retry(model, prompt, max_retries=3):
-    """Generates content with error checking and retries."""
+def generate_with_retry(model, prompt, max_retries=3, label="generate", mode="full"):
+    """Generates content with error checking and retries, logging tokens and time per round."""
     for _ in range(max_retries):
         print("Trying")
-        response = model.generate_content(prompt)
+        response = timed(model.generate_content, prompt, label, mode)
         if response.parts:
             return response
     raise RuntimeError("Failed to generate valid response after multiple attempts")
@@ -44,29 +51,25 @@ def generate_manim_script():
     with open('inputs/intuition.txt', 'r') as f:
         intuition = f.read()
     
-    model = genai.GenerativeModel('gemini-2.0-flash-exp')
+    model = new_model('gemini-2.0-flash-exp', genai.GenerativeModel)
+    # The prompts name the manim the static checker indexed, i.e. the installed one
+    version = load_index()["version"]
 
     # 1) Generation prompt
     gen_prompt = f"""
-    You’re writing a Manim Community Edition (v0.18.0) script to animate this theorem’s intuition. 
+    You’re writing a Manim Community Edition (v{version}) script to animate this theorem’s intuition. 
     Follow these strict guidelines:
 
-    1. **Introspection**  
-       Before emitting any animation code, import EVERY Manim class you intend to use (Scene, Circle, Polygon, etc.)  
-       and then print out `dir(…)` for each to LIST their available methods and attributes.  
-       Only after confirming those names exist, proceed to write your final script.
-
-    2. **Manim code style**  
-       • Use proper Manim syntax (CE v0.18.0)  
+    1. **Manim code style**  
+       • Use proper Manim syntax (CE v{version})  
        • Include all necessary imports  
        • Inherit from `Scene` and name your class `TheoremScene`  
        • Sequence animations with `self.play()`  
        • Add objects to the scene with `self.add()` or via animations  
        • Use RGB hex colors and are strings types 
 
-    3. **Output format**  
-       First, show the introspection blocks (the `dir()` outputs) as comments.  
-       Then return **only** the final, cleaned Python code within ```python fences``` using this template:
+    2. **Output format**  
+       Return **only** the final, cleaned Python code within ```python fences``` using this template:
 
        ```python
        from manim import *
@@ -74,7 +77,7 @@ def generate_manim_script():
 
        class TheoremScene(Scene):
            def construct(self):
-               # … your verified code …
+               # … your code …
        ```
 
     Theorem: {theorem}
@@ -83,11 +86,14 @@ def generate_manim_script():
     response = generate_with_retry(model, gen_prompt)
     initial_code = extract_code_block(response.text)
 
-    # 2) Review prompt
+    # 2) Review prompt, seeded with the static API check of the draft
+    findings = format_findings(check_script(fix_manim_imports(initial_code)))
     review_prompt = f"""
-    Review and fix this Manim code. **But before** changing anything, re-import each class you’re using  
-    and once again list their available methods/attributes to CONFIRM that every call in the code is valid.  
-    If a method isn’t present, replace it with the correct one from the Manim v0.18.0 API.  
+    Review and fix this Manim code. A static check against the installed manim API reported:
+
+    {findings or "no problems"}
+
+    If a method isn’t present, replace it with the correct one from the Manim v{version} API.  
 
     Check for:  
     - Syntax errors  
@@ -102,13 +108,12 @@ def generate_manim_script():
     - Constants like UP, DOWN, LEFT, RIGHT, IN, OUT, and DEGREES are imported
     - Correct method calls on numpy ndarrays
 
-    **Output**: only the corrected Python code within ```python``` markers,  
-    preceded (as comments) by your new introspection snippets.
+    **Output**: only the corrected Python code within ```python``` markers.
     
     Code to fix:
     {initial_code}
     """
-    reviewed_response = generate_with_retry(model, review_prompt)
+    reviewed_response = generate_with_retry(model, review_prompt, label="review")
     final_code = extract_code_block(reviewed_response.text)
 
     # Validate basic structure
@@ -129,19 +134,31 @@ def generate_manim_script():
         print(f"Syntax error detected: {syntax_error}")
         print(f"Retrying generation... (Attempt {retry_count + 1})")
 
-        error_fix_prompt = f"""
-        The previously generated Manim code had the following syntax errors:
-
-        {syntax_error}
-
-        Please regenerate the corrected code according to all the previous instructions.
+        # Ask for a patch against the current code; rewrite in full only if it doesn't apply
+        problem = f"The previously generated Manim code had the following syntax errors:\n\n{syntax_error}"
+        patch_response = generate_with_retry(model, diff_prompt(problem, final_code),
+                                             label="syntax_fix", mode="diff")
+        diff = extract_diff(patch_response.text)
+        try:
+            if diff is None:
+                raise PatchError("no diff in response")
+            final_code = fix_manim_imports(apply_unified_diff(final_code, diff))
+        except PatchError as e:
+            print(f"Patch did not apply ({e}), regenerating the full script")
+            error_fix_prompt = f"""
+        {problem}
+
+        Please fix the code below according to all the previous instructions.
         Make sure to fix all syntax issues.
         Output only the corrected code, inside ```python fences.
-        """
 
-        reviewed_response = generate_with_retry(model, error_fix_prompt)
-        final_code = extract_code_block(reviewed_response.text)
-        final_code = fix_manim_imports(final_code)
+        ```python
+        {final_code}
+        ```
+        """
+            reviewed_response = generate_with_retry(model, error_fix_prompt, label="syntax_fix")
+            final_code = extract_code_block(reviewed_response.text)
+            final_code = fix_manim_imports(final_code)
 
         syntax_error = check_syntax_errors(final_code)
         retry_count += 1
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""Time a render-fix retry with and without animation checkpoints.
+
+Usage:
+    python bench_checkpoint.py [--quality low_quality] [--plays 12]
+
+Renders a scene of about ``2 * --plays`` animations whose last one fails, as generated
+scripts often do, then "repairs" that line and renders again: once from
+scratch and once resuming from the checkpoints the failed render left behind
+(see ``checkpoint``). Reports the retry times and how many animations each
+retry rendered.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "manim-scripts"))
+
+from render import RenderError, render_scene  # noqa: E402
+
+SCENE = '''
+from manim import *
+
+
+class TheoremScene(Scene):
+    def construct(self):
+        ax = Axes(x_range=[0, 10, 1], y_range=[0, 5, 1])
+        graph = ax.plot(lambda x: 0.05 * x ** 2, x_range=[0, 9])
+        self.play(Create(ax), Create(graph))
+        label = MathTex(r"\\int_0^{{9}} f(x)\\,dx")
+        for i in range({plays}):
+            self.play(Transform(label, MathTex(f"S_{{{{{{i}}}}}} = {{i * i}}").to_corner(UR)), run_time=0.5)
+            self.play(ax.animate.shift(0.1 * (UP if i % 2 else DOWN)), run_time=0.5)
+        self.play({last})
+'''
+
+BROKEN = 'Write(lable)'  # NameError once the scene reaches it
+FIXED = 'Write(label)'
+
+
+def write(path: str, last: str, plays: int) -> None:
+    with open(path, "w") as f:
+        f.write(SCENE.format(plays=plays, last=last))
+
+
+def retry(name: str, plays: int, quality: str, checkpoints: bool) -> tuple[float, int]:
+    """Fail once, repair the failing line and time the second render."""
+    work_dir = tempfile.mkdtemp(prefix=f"bench-{name}-")
+    script = os.path.join(work_dir, "scene.py")
+    checkpoint_dir = os.path.join(work_dir, "checkpoints") if checkpoints else None
+    write(script, BROKEN, plays)
+    try:
+        render_scene(script, work_dir, quality, checkpoint_dir=checkpoint_dir)
+    except RenderError:
+        pass
+    write(script, FIXED, plays)
+    if not checkpoints:
+        # Without checkpoints nothing of the failed render is reused, manim's own cache included
+        shutil.rmtree(os.path.join(work_dir, "media"), ignore_errors=True)
+    started = time.perf_counter()
+    result = render_scene(script, work_dir, quality, checkpoint_dir=checkpoint_dir)
+    seconds = time.perf_counter() - started
+    rendered = result["plays"] - result["resumed_plays"]
+    print(f"{name + ':':12} {seconds:8.2f}s  {rendered} of {result['plays']} animations rendered")
+    return seconds, rendered
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quality", default="low_quality")
+    parser.add_argument("--plays", type=int, default=12)
+    args = parser.parse_args()
+
+    scratch, _ = retry("scratch", args.plays, args.quality, checkpoints=False)
+    resumed, _ = retry("checkpoint", args.plays, args.quality, checkpoints=True)
+    print(f"speedup:     {scratch / resumed:8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
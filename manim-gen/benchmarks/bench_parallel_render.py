@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""Compare sequential and parallel segment rendering of one scene.
+
+Usage:
+    python bench_parallel_render.py <script.py> [--quality high_quality] [--workers 16]
+
+Both renders start from empty output directories. The script reports wall time
+and speedup, then decodes both videos with ffmpeg's framemd5 muxer to check
+that they contain identical frames.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "manim-scripts"))
+
+from parallel_render import render_parallel  # noqa: E402
+from render import render_scene  # noqa: E402
+
+
+def frame_hashes(video_path: str) -> list[str]:
+    """Per-frame MD5s of the decoded video, ignoring container metadata."""
+    output = subprocess.run(
+        ["ffmpeg", "-loglevel", "error", "-nostdin", "-i", video_path, "-map", "0:v", "-f", "framemd5", "-"],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return [line.rsplit(",", 1)[-1].strip() for line in output.splitlines() if not line.startswith("#")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("script")
+    parser.add_argument("--quality", default="high_quality")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    script = os.path.abspath(args.script)
+
+    started = time.perf_counter()
+    sequential = render_scene(script, tempfile.mkdtemp(prefix="bench-seq-"), args.quality)
+    sequential_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    parallel = render_parallel(
+        script, tempfile.mkdtemp(prefix="bench-par-"), args.quality, workers=args.workers
+    )
+    parallel_seconds = time.perf_counter() - started
+
+    frames = sequential["frames"]
+    print(f"scene: {sequential['plays']} animations, {sequential['duration']:.1f}s, "
+          f"{frames} frames at {sequential['resolution'][0]}x{sequential['resolution'][1]}")
+    print(f"sequential: {sequential_seconds:8.2f}s  ({frames / sequential_seconds:6.1f} fps)")
+    print(f"parallel:   {parallel_seconds:8.2f}s  ({frames / parallel_seconds:6.1f} fps, "
+          f"{len(parallel.get('segments', [None]))} segments on {args.workers} workers)")
+    print(f"speedup:    {sequential_seconds / parallel_seconds:8.2f}x")
+
+    identical = frame_hashes(sequential["video"]) == frame_hashes(parallel["video"])
+    print(f"frames identical: {identical}")
+    sys.exit(0 if identical else 1)
+
+
+if __name__ == '__main__':
+    main()
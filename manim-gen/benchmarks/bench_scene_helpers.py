@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""Compare render speed of naive updaters against the scene_helpers versions.
+
+Usage:
+    python bench_scene_helpers.py [--quality low_quality] [--dry-run] [--runs 1]
+
+Renders two versions of the same scene: a tangent ruler and a dot sliding
+along a graph, a refining Riemann sum and an animated vector field, written
+first the way generated scripts usually do it (``always_redraw`` and
+per-frame ``coords_to_point`` calls), then with ``scene_helpers``. Reports
+frames per second for each; ``--dry-run`` skips encoding and writing the
+video, leaving mostly the scene's own per-frame work and rasterization.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "manim-scripts"))
+
+from render import render_scene  # noqa: E402
+
+SETUP = '''
+from manim import *
+import numpy as np
+
+
+def func(x):
+    return 0.1 * (x - 2) ** 3 + 2
+
+
+def field(x, y, t):
+    return -y + np.cos(t) + 0 * x, x - np.sin(t) + 0 * y
+'''
+
+NAIVE = SETUP + '''
+
+class TheoremScene(Scene):
+    def construct(self):
+        ax = Axes(x_range=[0, 10, 1], y_range=[0, 5, 1])
+        self.add(ax, ax.plot(func, x_range=[1, 8]))
+        tracker = ValueTracker(1.1)
+
+        def ruler():
+            x = tracker.get_value()
+            p1, p2 = ax.coords_to_point(x - 0.01, func(x - 0.01)), ax.coords_to_point(x + 0.01, func(x + 0.01))
+            direction = (p2 - p1) / np.linalg.norm(p2 - p1)
+            center = ax.coords_to_point(x, func(x))
+            return Line(center - direction, center + direction, color="#00FFFF")
+
+        self.add(always_redraw(ruler),
+                 always_redraw(lambda: Dot(ax.coords_to_point(tracker.get_value(), func(tracker.get_value())))))
+        self.play(tracker.animate.set_value(7.9), run_time=4)
+
+        rects = ax.get_riemann_rectangles(ax.plot(func, x_range=[1, 8]), x_range=[1, 8], dx=7 / 4)
+        self.play(Create(rects))
+        for n in (8, 16, 32, 64):
+            finer = ax.get_riemann_rectangles(ax.plot(func, x_range=[1, 8]), x_range=[1, 8], dx=7 / n)
+            self.play(Transform(rects, finer), run_time=0.5)
+        self.remove(rects)
+
+        plane = Axes(x_range=[-4, 4, 1], y_range=[-3, 3, 1])
+        t = ValueTracker(0)
+
+        def arrows():
+            group = VGroup()
+            for x in np.arange(-4, 4.01, 0.5):
+                for y in np.arange(-3, 3.01, 0.5):
+                    vx, vy = field(x, y, t.get_value())
+                    start = plane.coords_to_point(x, y)
+                    end = plane.coords_to_point(x + 0.1 * vx, y + 0.1 * vy)
+                    if np.linalg.norm(end - start) > 1e-6:
+                        group.add(Arrow(start, end, buff=0, stroke_width=2))
+            return group
+
+        self.add(always_redraw(arrows))
+        self.play(t.animate.set_value(2 * PI), run_time=3)
+'''
+
+HELPERS = SETUP + '''
+from scene_helpers import moving_dot, riemann_rectangles, sample_graph, tangent_line, vector_field
+
+
+class TheoremScene(Scene):
+    def construct(self):
+        ax = Axes(x_range=[0, 10, 1], y_range=[0, 5, 1])
+        self.add(ax, ax.plot(func, x_range=[1, 8]))
+        tracker = ValueTracker(1.1)
+        graph = sample_graph(ax, func, [1, 8])
+        self.add(tangent_line(graph, tracker, length=2, color="#00FFFF"), moving_dot(graph, tracker))
+        self.play(tracker.animate.set_value(7.9), run_time=4)
+
+        rects = riemann_rectangles(ax, func, [1, 8], 4)
+        self.play(Create(rects))
+        for n in (8, 16, 32, 64):
+            self.play(Transform(rects, riemann_rectangles(ax, func, [1, 8], n)), run_time=0.5)
+        self.remove(rects)
+
+        plane = Axes(x_range=[-4, 4, 1], y_range=[-3, 3, 1])
+        t = ValueTracker(0)
+        arrows = vector_field(plane, field, step=0.5, scale=0.1, tracker=t)
+        arrows.set_stroke(width=2)
+        self.add(arrows)
+        self.play(t.animate.set_value(2 * PI), run_time=3)
+'''
+
+
+def bench(name: str, source: str, quality: str, overrides: dict, runs: int) -> float:
+    """Best-of-``runs`` frames per second for rendering ``source``."""
+    work_dir = tempfile.mkdtemp(prefix=f"bench-{name}-")
+    script = os.path.join(work_dir, f"{name}.py")
+    with open(script, "w") as f:
+        f.write(source)
+    best = None
+    for run in range(runs):
+        started = time.perf_counter()
+        result = render_scene(script, os.path.join(work_dir, str(run)), quality, config_overrides=overrides)
+        seconds = time.perf_counter() - started
+        best = seconds if best is None else min(best, seconds)
+    frames = result["frames"]
+    print(f"{name + ':':9} {best:8.2f}s  {frames} frames  ({frames / best:6.1f} fps)")
+    return frames / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quality", default="low_quality")
+    parser.add_argument("--dry-run", action="store_true", help="Skip encoding the video")
+    parser.add_argument("--runs", type=int, default=1)
+    args = parser.parse_args()
+    overrides = {"dry_run": True} if args.dry_run else None
+
+    naive = bench("naive", NAIVE, args.quality, overrides, args.runs)
+    helpers = bench("helpers", HELPERS, args.quality, overrides, args.runs)
+    print(f"speedup:  {helpers / naive:8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""Compare cold (process per job) and warm (persistent worker) per-job latency.
+
+Usage:
+    python bench_worker.py [--jobs N] [--latex "<latex>" --out-dir DIR]
+
+Without ``--latex`` every job is a ``ping``, which isolates the fixed cost of
+starting Python and importing manim/numpy/google.generativeai. With ``--latex``
+each job runs the full pipeline (GEMINI_API_KEY must be set) against an
+empty cache so both modes do the same work.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPT = os.path.join(os.path.dirname(__file__), "..", "manim-scripts", "make_animation.py")
+
+
+def _spawn_worker(env):
+    proc = subprocess.Popen(
+        [sys.executable, SCRIPT, "--worker"],
+        cwd=os.path.dirname(SCRIPT),
+        env=env,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        bufsize=1,
+    )
+    ready = json.loads(proc.stdout.readline())
+    assert ready.get("event") == "ready", ready
+    return proc
+
+
+def _request(proc, job):
+    proc.stdin.write(json.dumps(job) + "\n")
+    reply = json.loads(proc.stdout.readline())
+    while "event" in reply:  # Progress events come inline when there is no events pipe
+        reply = json.loads(proc.stdout.readline())
+    if not reply["ok"]:
+        raise RuntimeError(reply["error"])
+    return reply
+
+
+def _job(args, i):
+    if args.latex is None:
+        return {"id": i, "op": "ping"}
+    # A throwaway cache dir per job keeps cache hits from skewing the numbers
+    return {
+        "id": i,
+        "op": "render",
+        "latex": args.latex,
+        "out_dir": args.out_dir,
+        "cache_dir": tempfile.mkdtemp(prefix="manim-gen-bench-"),
+    }
+
+
+def bench_cold(args):
+    timings = []
+    for i in range(args.jobs):
+        started = time.perf_counter()
+        proc = _spawn_worker(os.environ.copy())
+        _request(proc, _job(args, i))
+        timings.append(time.perf_counter() - started)
+        proc.stdin.close()
+        proc.wait()
+    return timings
+
+
+def bench_warm(args):
+    timings = []
+    proc = _spawn_worker(os.environ.copy())
+    try:
+        for i in range(args.jobs):
+            started = time.perf_counter()
+            _request(proc, _job(args, i))
+            timings.append(time.perf_counter() - started)
+    finally:
+        proc.stdin.close()
+        proc.wait()
+    return timings
+
+
+def _summary(timings):
+    return {
+        "mean_ms": statistics.mean(timings) * 1000,
+        "median_ms": statistics.median(timings) * 1000,
+        "max_ms": max(timings) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=5)
+    parser.add_argument("--latex", default=None)
+    parser.add_argument("--out-dir", default=tempfile.mkdtemp(prefix="manim-gen-out-"))
+    args = parser.parse_args()
+
+    cold = _summary(bench_cold(args))
+    warm = _summary(bench_warm(args))
+    print(f"{'':<6}{'mean ms':>12}{'median ms':>12}{'max ms':>12}")
+    for name, stats in (("cold", cold), ("warm", warm)):
+        print(f"{name:<6}{stats['mean_ms']:>12.1f}{stats['median_ms']:>12.1f}{stats['max_ms']:>12.1f}")
+    print(f"saving per job: {cold['mean_ms'] - warm['mean_ms']:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python
+"""Run the generate+render pipeline over the theorem corpus and report timings as JSON.
+
+Usage:
+    python run_benchmark.py [--mode fake|replay|record] [--pipeline extension|legacy]
+                            [--only ID ...] [--limit N] [--out report.json]
+                            [--compare base.json] [--latency]
+                            [--fewshot-dir DIR] [--no-fewshot] [--no-stream]
+
+The corpus is ``inputs/theorem.tex`` plus every theorem, lemma, proposition
+and definition in ``corpus.tex``. Model calls are served offline:
+
+* ``fake`` (default) answers every prompt with a canned valid scene, which
+  measures the pipeline's own overhead and the render path;
+* ``replay`` answers from ``recordings/<id>.jsonl`` (``--latency`` also
+  sleeps for each call's recorded duration);
+* ``record`` calls Gemini (GEMINI_API_KEY must be set) and writes those
+  recordings.
+
+``--pipeline extension`` runs ``make_animation.run_job``; ``legacy`` runs the
+top-level ``generate_intuition.py``/``generate_manim_script.py`` scripts and
+renders their output. Each item gets empty output and cache directories. The
+report has per-stage timings, LLM calls and token counts, repair rounds, and
+render wall time and frames per second for every item, plus medians and
+means across items; ``--compare`` prints the median deltas against an earlier
+report.
+
+Items share one few-shot library (``--fewshot-dir``, a fresh directory by
+default), so later items can retrieve scripts that earlier ones rendered;
+each item reports how many examples it got and how long the lookup took.
+``--no-fewshot`` turns retrieval off for an A/B comparison of repair rounds
+and end-to-end time.
+
+The preview is streamed as fragmented MP4 segments (see
+``manim-scripts/stream.py``) unless ``--no-stream`` is given. Each item reports
+first-frame latency both ways: seconds from the start of the job until the
+first segment was published and until the finished preview was.
+"""
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BENCH_DIR, "..", "manim-scripts")
+REPO_ROOT = os.path.abspath(os.path.join(BENCH_DIR, "..", ".."))
+CORPUS = [os.path.join(REPO_ROOT, "inputs", "theorem.tex"), os.path.join(BENCH_DIR, "corpus.tex")]
+RECORDINGS_DIR = os.path.join(BENCH_DIR, "recordings")
+
+sys.path.insert(0, SCRIPTS_DIR)
+
+import llm  # noqa: E402
+import progress  # noqa: E402
+import replay  # noqa: E402
+from tex_scan import scan_tex  # noqa: E402
+
+# Repair rounds are the calls that fix an already drafted script
+_REPAIR_LABELS = ("syntax_fix", "render_fix")
+
+
+def load_corpus(paths: list[str]) -> list[dict]:
+    """Every theorem-like environment in ``paths`` with a stable id and its source line."""
+    items, seen = [], set()
+    for path in paths:
+        for found in scan_tex(path):
+            item_id = re.sub(r'[^a-z0-9]+', '-', (found["name"] or found["kind"]).lower()).strip('-')
+            while item_id in seen:
+                item_id += "-2"
+            seen.add(item_id)
+            items.append({
+                "id": item_id,
+                "kind": found["kind"],
+                "source": f"{os.path.relpath(found['file'], REPO_ROOT)}:{found['line']}",
+                "latex": found["latex"],
+            })
+    return items
+
+
+@contextlib.contextmanager
+def _model_env(mode: str, item_id: str, latency: bool):
+    """Point the offline stand-ins at this item's recording for the duration of the run."""
+    recording = os.path.join(RECORDINGS_DIR, f"{item_id}.jsonl")
+    env = {}
+    if mode == "fake":
+        env["MANIM_GEN_FAKE_MODEL"] = "1"
+    elif mode == "replay":
+        env["MANIM_GEN_REPLAY"] = recording
+        env["MANIM_GEN_REPLAY_LATENCY"] = "1" if latency else ""
+        replay.load_recording(recording, fresh=True)
+    elif mode == "record":
+        os.makedirs(RECORDINGS_DIR, exist_ok=True)
+        if os.path.exists(recording):
+            os.remove(recording)
+        env["MANIM_GEN_RECORD"] = recording
+
+    saved = {name: os.environ.get(name) for name in
+             ("MANIM_GEN_FAKE_MODEL", "MANIM_GEN_REPLAY", "MANIM_GEN_REPLAY_LATENCY", "MANIM_GEN_RECORD")}
+    for name in saved:
+        os.environ.pop(name, None)
+    os.environ.update(env)
+    try:
+        yield recording
+    finally:
+        for name, value in saved.items():
+            os.environ.pop(name, None)
+            if value is not None:
+                os.environ[name] = value
+
+
+def _load_top_level(name: str):
+    spec = importlib.util.spec_from_file_location(f"_legacy_{name}", os.path.join(REPO_ROOT, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_extension(latex: str, work_dir: str) -> None:
+    import make_animation
+    make_animation.run_job(latex, os.path.join(work_dir, "out"), os.path.join(work_dir, "cache"))
+
+
+def run_legacy(latex: str, work_dir: str) -> None:
+    """The top-level scripts use fixed relative paths, so they run inside ``work_dir``."""
+    from dryrun import dry_run
+    from render import render_scene
+
+    os.makedirs(os.path.join(work_dir, "inputs"))
+    with open(os.path.join(work_dir, "inputs", "theorem.txt"), "w", encoding="utf-8") as f:
+        f.write(latex)
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        with progress.stage("intuition"):
+            _load_top_level("generate_intuition").generate_intuition()
+        with progress.stage("script"):
+            _load_top_level("generate_manim_script").generate_manim_script()
+        script = os.path.join(work_dir, "theorem_animation.py")
+        with progress.stage("dry_run"):
+            check = dry_run(script, work_dir)
+        if check["error"]:
+            raise RuntimeError(f"Dry run failed: {check['error']}")
+        with progress.stage("render"):
+            render_scene(script, work_dir, expected_duration=check["duration"])
+    finally:
+        os.chdir(cwd)
+
+
+def run_item(item: dict, args) -> dict:
+    """Run one corpus item and condense its progress events into metrics."""
+    events = []
+    work_dir = tempfile.mkdtemp(prefix=f"manim-gen-bench-{item['id']}-")
+    result = {"id": item["id"], "kind": item["kind"], "source": item["source"], "ok": False, "error": None}
+
+    with _model_env(args.mode, item["id"], args.latency) as recording:
+        if args.mode == "replay" and not os.path.exists(recording):
+            result["error"] = "no recording"
+            return result
+        progress.add_listener(events.append)
+        started = time.perf_counter()
+        started_at = time.time()
+        try:
+            (run_legacy if args.pipeline == "legacy" else run_extension)(item["latex"], work_dir)
+            result["ok"] = True
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            progress.remove_listener(events.append)
+        result["seconds"] = time.perf_counter() - started
+        if args.mode == "replay":
+            result["replay"] = replay.load_recording(recording).stats()
+
+    stages = {}
+    for event in events:
+        if event["event"] == "stage_end":
+            stages[event["stage"]] = stages.get(event["stage"], 0.0) + event["seconds"]
+    calls = [event for event in events if event["event"] == "llm_call"]
+    by_label = {}
+    for call in calls:
+        label = call["label"].split(" ")[0]  # "candidate 2" -> "candidate"
+        by_label[label] = by_label.get(label, 0) + 1
+    frames = [event["frames_total"] for event in events if event["event"] == "render_progress"]
+    retrieval = next((event for event in events if event["event"] == "retrieval"), None)
+    artifacts = {}
+    for event in events:
+        if event["event"] == "artifact":
+            artifacts.setdefault(event["kind"], event["t"] - started_at)
+    render_seconds = stages.get("render")
+
+    result.update(
+        stages=stages,
+        llm={
+            "calls": len(calls),
+            "by_label": by_label,
+            "seconds": sum(call["seconds"] for call in calls),
+            "prompt_tokens": sum(call["prompt_tokens"] or 0 for call in calls),
+            "output_tokens": sum(call["output_tokens"] or 0 for call in calls),
+        },
+        repair_rounds=sum(by_label.get(label, 0) for label in _REPAIR_LABELS),
+        render_attempts=sum(1 for event in events
+                            if event["event"] == "stage_start" and event["stage"] == "dry_run"),
+        # Until something can be played: the first streamed segment vs the finished preview
+        first_frame={
+            "segment": artifacts.get("segment"),
+            "preview": artifacts.get("preview"),
+        },
+        fewshot={
+            "examples": retrieval["examples"] if retrieval else 0,
+            "similarity": retrieval["similarity"] if retrieval else [],
+            "seconds": stages.get("examples"),
+        },
+        render={
+            "seconds": render_seconds,
+            "frames": frames[-1] if frames else None,
+            "fps": frames[-1] / render_seconds if frames and render_seconds else None,
+        },
+    )
+    return result
+
+
+def _metrics(item: dict) -> dict:
+    """Flatten the numbers worth comparing across runs."""
+    metrics = {"seconds": item["seconds"]}
+    metrics.update({f"stage.{stage}": seconds for stage, seconds in item["stages"].items()})
+    for key in ("calls", "seconds", "prompt_tokens", "output_tokens"):
+        metrics[f"llm.{key}"] = item["llm"][key]
+    metrics["repair_rounds"] = item["repair_rounds"]
+    metrics["render_attempts"] = item["render_attempts"]
+    metrics["fewshot.examples"] = item["fewshot"]["examples"]
+    for key, seconds in item["first_frame"].items():
+        if seconds is not None:
+            metrics[f"first_frame.{key}"] = seconds
+    for key in ("seconds", "fps"):
+        if item["render"][key] is not None:
+            metrics[f"render.{key}"] = item["render"][key]
+    return metrics
+
+
+def summarize(items: list[dict]) -> dict:
+    """Median and mean of every metric across the items that completed."""
+    values = {}
+    for item in items:
+        if item["ok"]:
+            for name, value in _metrics(item).items():
+                values.setdefault(name, []).append(value)
+    return {
+        "items": len(items),
+        "ok": sum(1 for item in items if item["ok"]),
+        "median": {name: statistics.median(vals) for name, vals in sorted(values.items())},
+        "mean": {name: statistics.fmean(vals) for name, vals in sorted(values.items())},
+    }
+
+
+def compare(base: dict, report: dict) -> None:
+    print(f"{'metric':<28}{'base':>12}{'now':>12}{'change':>10}")
+    base_median, median = base["summary"]["median"], report["summary"]["median"]
+    for name in sorted(set(base_median) | set(median)):
+        old, new = base_median.get(name), median.get(name)
+        change = f"{(new - old) / old * 100:+.1f}%" if old and new is not None else ""
+        fmt = lambda v: "-" if v is None else f"{v:.3f}"  # noqa: E731
+        print(f"{name:<28}{fmt(old):>12}{fmt(new):>12}{change:>10}")
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=("fake", "replay", "record"), default="fake")
+    parser.add_argument("--pipeline", choices=("extension", "legacy"), default="extension")
+    parser.add_argument("--only", nargs="*", default=None, help="corpus ids to run")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--latency", action="store_true", help="replay recorded call durations")
+    parser.add_argument("--out", default=None, help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", default=None, help="earlier report to diff medians against")
+    parser.add_argument("--fewshot-dir", default=None, help="few-shot library shared by the items")
+    parser.add_argument("--no-fewshot", action="store_true", help="generate without retrieved examples")
+    parser.add_argument("--no-stream", action="store_true", help="don't stream the preview as segments")
+    args = parser.parse_args()
+    os.environ["MANIM_GEN_FEWSHOT_DIR"] = args.fewshot_dir or tempfile.mkdtemp(prefix="manim-gen-fewshot-")
+    if args.no_fewshot:
+        os.environ["MANIM_GEN_FEWSHOT_EXAMPLES"] = "0"
+    os.environ["MANIM_GEN_STREAM"] = "0" if args.no_stream else "1"
+
+    items = load_corpus(CORPUS)
+    if args.only:
+        items = [item for item in items if item["id"] in args.only]
+    items = items[:args.limit]
+
+    results = []
+    for item in items:
+        result = run_item(item, args)
+        status = "ok" if result["ok"] else f"FAILED ({result['error']})"
+        print(f"{item['id']:<40} {result.get('seconds', 0):8.2f}s  {status}", file=sys.stderr)
+        results.append(result)
+
+    report = {
+        "commit": _commit(),
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "mode": args.mode,
+        "pipeline": args.pipeline,
+        "python": platform.python_version(),
+        "settings": {name: os.getenv(name) for name in
+                     ("MANIM_GEN_CANDIDATES", "MANIM_GEN_TOKEN_BUDGET", "MANIM_GEN_RENDER_WORKERS",
+                      "MANIM_GEN_FEWSHOT_DIR", "MANIM_GEN_FEWSHOT_EXAMPLES", "MANIM_GEN_STREAM")},
+        "items": results,
+        "summary": summarize(results),
+        "llm": llm.stats(),
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
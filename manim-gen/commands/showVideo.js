@@ -1,10 +1,116 @@
-
 const vscode = require('vscode');
+const crypto = require('crypto');
 const fs = require('fs');
 const path = require('path');
 const { convertDollarToMathJax } = require('../utils/latex');
 const { getWebviewVideoContent } = require('../utils/webview');
-const { runPythonScript } = require('../utils/pythonRunner');
+const { runWorkerJob } = require('../utils/pythonRunner');
+const { ProgressTracker } = require('../utils/progress');
+const { environmentFor } = require('../utils/prefetch');
+const { JobQueue, PRIORITY } = require('../utils/jobQueue');
+const { ArtifactStore, DAY_MS } = require('../utils/artifactStore');
+const { normalizeLatex } = require('../utils/texIndex');
+
+// Outputs of the single shared directory layout used before per-job directories
+const LEGACY_OUTPUTS = ['media', 'intuition.txt', 'theorem_animation.py'];
+
+// Handles of the most recent request and its background pass; a new request supersedes both
+let currentRequest = null;
+let backgroundRender = null;
+
+/**
+ * Queue shared by every request: identical in-flight requests share one job
+ * and at most `manim-gen.maxConcurrentJobs` run at once. A cancelled render's
+ * directory is removed once its worker has been killed.
+ * @param {vscode.ExtensionContext} context
+ * @param {ArtifactStore} store
+ * @returns {JobQueue}
+ */
+function createRenderQueue(context, store) {
+  return new JobQueue({
+    name: 'queue',
+    concurrency: () => vscode.workspace.getConfiguration('manim-gen').get('maxConcurrentJobs', 1),
+    run: async (job, { onEvent, signal }) => {
+      try {
+        return await runWorkerJob(context, job, onEvent, { signal });
+      } catch (err) {
+        if (signal.aborted && job.op === 'render') {
+          await store.remove(path.basename(job.out_dir));
+        }
+        throw err;
+      }
+    }
+  });
+}
+
+/**
+ * Per-job output directories under manim-output/jobs, bounded by
+ * `manim-gen.storage.maxSizeMB` and `manim-gen.storage.maxAgeDays`.
+ * @param {string} storageDir
+ * @returns {ArtifactStore}
+ */
+function createArtifactStore(storageDir) {
+  const settings = () => vscode.workspace.getConfiguration('manim-gen.storage');
+  const store = new ArtifactStore(path.join(storageDir, 'jobs'), {
+    maxBytes: () => settings().get('maxSizeMB', 2048) * 1024 * 1024,
+    maxAgeMs: () => settings().get('maxAgeDays', 30) * DAY_MS
+  });
+  store.open()
+    .then(() => Promise.all(LEGACY_OUTPUTS.map(
+      name => fs.promises.rm(path.join(storageDir, name), { recursive: true, force: true })
+    )))
+    .then(() => console.log(`[manim store] ${JSON.stringify(store.stats())}`))
+    .catch(err => console.log(`[manim store] failed to open: ${err.message}`));
+  return store;
+}
+
+/**
+ * Queues the optional high-quality pass for an already validated script and
+ * swaps it into the panel when done. Cancelled when a new request comes in.
+ * @param {JobQueue} queue
+ * @param {ArtifactStore} store
+ * @param {vscode.WebviewPanel} panel
+ * @param {string} scriptPath
+ * @param {string} jobKey - The request's directory in `store`
+ */
+async function startHighQualityRender(queue, store, panel, scriptPath, jobKey) {
+  const handle = queue.submit(`hq:${scriptPath}`, {
+    op: 'rerender',
+    script: scriptPath,
+    out_dir: store.dir(jobKey),
+    quality: 'high_quality'
+  }, {
+    priority: PRIORITY.background,
+    onEvent: event => {
+      if (event.event === 'render_progress') {
+        const percent = Math.floor((100 * event.frames_done) / event.frames_total);
+        panel.webview.postMessage({ type: 'status', text: `Preview quality; high quality render ${percent}%…` });
+      }
+    }
+  });
+  backgroundRender = handle;
+  panel.webview.postMessage({ type: 'status', text: 'Preview quality; rendering high quality in the background…' });
+  panel.onDidDispose(() => handle.cancel());
+
+  try {
+    const result = await handle.result;
+    await store.update(jobKey);
+    panel.webview.postMessage({
+      type: 'video',
+      uri: panel.webview.asWebviewUri(vscode.Uri.file(result.video)).toString(),
+      label: ''
+    });
+  } catch (err) {
+    if (err.message !== 'Cancelled') {
+      console.log(`High-quality render failed: ${err.message}`);
+      panel.webview.postMessage({ type: 'status', text: 'High-quality render failed; showing preview.' });
+    }
+  } finally {
+    if (backgroundRender === handle) {
+      backgroundRender = null;
+    }
+  }
+}
 
 /**
  * Registers the "Show Video" command and returns its Disposable.
@@ -12,75 +118,154 @@ const { runPythonScript } = require('../utils/pythonRunner');
  * @returns {vscode.Disposable}
  */
 function registerShowVideoCommand(context) {
+  const storageDir = path.join(context.globalStorageUri.fsPath, 'manim-output');
+  const store = createArtifactStore(storageDir);
+  const queue = createRenderQueue(context, store);
+
   return vscode.commands.registerCommand(
     'manim-gen.showVideo',
     async () => {
-      // 1) Retrieve selected LaTeX or fallback
+      // 1) Retrieve selected LaTeX or fallback; an indexed environment's canonical
+      //    text shares its cache entry with speculative pre-generation
       const editor = vscode.window.activeTextEditor;
-      const rawLatex = editor
-        ? editor.document.getText(editor.selection) || 'E = mc^2'
-        : 'E = mc^2';
+      const environment = environmentFor(editor);
+      const rawLatex = environment
+        ? environment.latex
+        : (editor && editor.document.getText(editor.selection)) || 'E = mc^2';
 
       // 2) Sanitize delimiters for MathJax
       const safeLatex = convertDollarToMathJax(rawLatex);
 
-      // 3) Ensure output directory under global storage
-      const outDirUri = vscode.Uri.joinPath(context.globalStorageUri, 'manim-output');
-      const outDir = outDirUri.fsPath;
+      // 3) Each distinct request gets its own directory, kept while its panel is open;
+      //    the artifact cache is shared
+      const key = crypto.createHash('sha256').update(normalizeLatex(safeLatex)).digest('hex');
+      const jobKey = key.slice(0, 16);
+      const outDir = store.dir(jobKey);
+      let release;
       try {
-        await fs.promises.mkdir(outDir, { recursive: true });
+        release = await store.acquire(jobKey);
       } catch (err) {
         vscode.window.showErrorMessage(`Failed to create output directory: ${err.message}`);
         return;
       }
 
-      vscode.window.showInformationMessage("Generating Latex Video and Tab")
+      // 4) Open the panel right away; stages are swapped in as they arrive
+      const panel = vscode.window.createWebviewPanel(
+        'videoLatex',
+        'Visualization with Manim',
+        vscode.ViewColumn.One,
+        {
+          enableScripts: true,                       // for MathJax and stage updates
+          localResourceRoots: [
+            context.globalStorageUri,                // allow loading from /…/globalStorage/ext-id/
+          ]
+        }
+      );
+      panel.webview.html = getWebviewVideoContent(panel, null, safeLatex);
+      let disposed = false;
+      const post = message => {
+        if (!disposed) {
+          panel.webview.postMessage(message);
+        }
+      };
+      const toWebviewUri = filePath => panel.webview.asWebviewUri(vscode.Uri.file(filePath)).toString();
+      let shownVideo = null;
 
-      // 4) Run the Python script, which should print the path to the generated video
-      const videoFilePath = vscode.Uri.joinPath(
-        context.globalStorageUri, "manim-output.mp4"
-      )
-      
-      try {
-        const result = await runPythonScript(
-          context,
-          'manim-scripts/make_animation.py',
-          [safeLatex, outDir]
-        );
+      // First-frame latency, from the request to the first frame actually playing
+      const requestedAt = Date.now();
+      panel.webview.onDidReceiveMessage(message => {
+        if (message.type === 'firstFrame') {
+          console.log(`[manim] first frame after ${((Date.now() - requestedAt) / 1000).toFixed(2)}s (${message.source})`);
+        }
+      });
 
-        console.log(result)
+      // 5) Queue the pipeline, joining an identical request that is already in flight
+      const tracker = new ProgressTracker(null, text => post({ type: 'status', text }));
+      const handle = queue.submit(key, {
+        op: 'render',
+        latex: safeLatex,
+        out_dir: outDir,
+        cache_dir: path.join(storageDir, '.cache')
+      }, {
+        priority: PRIORITY.interactive,
+        onEvent: event => {
+          tracker.handle(event);
+          if (event.event !== 'artifact') {
+            return;
+          }
+          if (event.kind === 'still') {
+            post({ type: 'image', uri: toWebviewUri(event.path) });
+          } else if (event.kind === 'segment') {
+            post({ type: 'segment', uri: toWebviewUri(event.path), index: event.index, mime: event.mime });
+          } else if (event.kind === 'preview') {
+            shownVideo = event.path;
+            // With the segment count the webview can finish the stream instead of reloading
+            post({ type: 'video', uri: toWebviewUri(event.path), label: '', segments: event.segments });
+          }
+        }
+      });
+      panel.onDidDispose(() => {
+        disposed = true;
+        handle.cancel();
+        release();
+      });
+
+      // Cancel the superseded request only now, so that re-requesting the
+      // same LaTeX keeps the shared job alive instead of restarting it
+      if (currentRequest) {
+        currentRequest.cancel();
+      }
+      if (backgroundRender) {
+        backgroundRender.cancel();
+        backgroundRender = null;
+      }
+      currentRequest = handle;
+      if (handle.deduplicated) {
+        post({ type: 'status', text: 'Joined an identical request already in progress…' });
+      }
+
+      // 6) Wait for the job, showing progress and each stage as it lands
+      let result;
+      try {
+        result = await vscode.window.withProgress({
+          location: vscode.ProgressLocation.Notification,
+          title: 'Manim'
+        }, async progress => {
+          tracker.progress = progress;
+          const startedAt = Date.now();
+          const jobResult = await handle.result;
+          await store.update(jobKey);
+          console.log(`[manim] finished in ${((Date.now() - startedAt) / 1000).toFixed(1)}s: ${tracker.summary()}`);
+          return jobResult;
+        });
       } catch (err) {
+        if (err.message === 'Cancelled') {
+          post({ type: 'status', text: 'Cancelled.' });
+          return;
+        }
         console.log(err.message)
+        post({ type: 'status', text: 'Generation failed.' });
         vscode.window.showErrorMessage(`Error running Python: ${err.message}`);
         return;
+      } finally {
+        if (currentRequest === handle) {
+          currentRequest = null;
+        }
+        console.log(`[manim queue] ${JSON.stringify(queue.metrics())}`);
+        console.log(`[manim store] ${JSON.stringify(store.stats())}`);
       }
 
-        // 5) Create and show a Webview panel with the video and LaTeX
-        const panel = vscode.window.createWebviewPanel(
-            'videoLatex',
-            'Visualization with Manim',
-            vscode.ViewColumn.One,
-            {
-                enableScripts: true,                       // for MathJax
-                localResourceRoots: [
-                    context.globalStorageUri,                // allow loading from /…/globalStorage/ext-id/
-                ]
-            }
-        );
-
-      // Convert local video file path into a Webview URI
-      let videoUri;
-      try {
-        videoUri = panel.webview.asWebviewUri(videoFilePath);
-      } catch {
-        vscode.window.showErrorMessage(`Invalid video path returned: ${videoFilePath}`);
-        return;
+      // 7) Cache hits emit no stages, so make sure the final video is shown
+      if (result.video !== shownVideo) {
+        post({ type: 'video', uri: toWebviewUri(result.video), label: '' });
       }
 
-      // 6) Set HTML content
-      panel.webview.html = panel.webview.html = getWebviewVideoContent(panel, videoUri, safeLatex);
+      // 8) Optionally replace the preview with a high-quality render in the background
+      if (!disposed && vscode.workspace.getConfiguration('manim-gen').get('highQualityRender', false)) {
+        startHighQualityRender(queue, store, panel, result.script, jobKey);
+      }
     }
   );
 }
 
-module.exports = { registerShowVideoCommand };
\ No newline at end of file
+module.exports = { registerShowVideoCommand };
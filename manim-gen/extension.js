@@ -1,6 +1,7 @@
 const vscode = require('vscode');
 const path = require('path');
 const { registerShowVideoCommand } = require('./commands/showVideo');
+const { registerPrefetch } = require('./utils/prefetch');
 
 /**
  * Called when your extension is activated.
@@ -13,6 +14,9 @@ function activate(context) {
   const disposable = registerShowVideoCommand(context);
   context.subscriptions.push(disposable);
 
+  // 2. Index .tex environments and pre-generate the ones near the cursor
+  context.subscriptions.push(registerPrefetch(context));
+
 }
 
 function deactivate() {}
@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+"""Static checker for generated scripts against the installed manim API.
+
+The first call builds a compact JSON index of what ``from manim import *``
+provides: classes with their constructor signatures and attribute names,
+functions with their signatures, and constants. The index is cached per manim
+version, so later checks never import manim. ``check_script`` then walks the
+script's AST and flags unknown names, unknown keyword arguments, wrong arity
+and calls to methods a class does not have.
+"""
+import ast
+import builtins
+import importlib.metadata
+import inspect
+import json
+import os
+import sys
+
+INDEX_DIR = os.path.join(os.path.expanduser("~"), ".cache", "manim-gen")
+
+_index = None
+
+
+# Index construction
+
+def _signature(func) -> dict | None:
+    """Compact description of ``func``'s parameters, or None if it can't be inspected."""
+    try:
+        sig = inspect.signature(func)
+    except (TypeError, ValueError):
+        return None
+    positional, kwonly, required = [], [], 0
+    varargs = varkw = False
+    for i, param in enumerate(sig.parameters.values()):
+        if i == 0 and param.name in ("self", "cls"):
+            continue
+        if param.kind == param.VAR_POSITIONAL:
+            varargs = True
+        elif param.kind == param.VAR_KEYWORD:
+            varkw = True
+        elif param.kind == param.KEYWORD_ONLY:
+            kwonly.append(param.name)
+        else:
+            positional.append(param.name)
+            if param.default is param.empty:
+                required += 1
+    return {
+        "params": positional,
+        "kwonly": kwonly,
+        "required": required,
+        "varargs": varargs,
+        "varkw": varkw,
+    }
+
+
+def _class_signature(cls) -> dict | None:
+    """Constructor signature with keywords merged along the ``**kwargs`` chain.
+
+    Manim constructors forward ``**kwargs`` to ``super().__init__``, so a class
+    accepts every keyword of its bases until one of them stops forwarding.
+    """
+    inits = [vars(klass)["__init__"] for klass in cls.__mro__ if "__init__" in vars(klass)]
+    if not inits or inits[0] is object.__init__:
+        return None
+    own = _signature(inits[0])
+    if own is None:
+        return None
+
+    keywords = set(own["params"]) | set(own["kwonly"])
+    varkw = own["varkw"]
+    for init in inits[1:]:
+        if not varkw:
+            break
+        if init is object.__init__:
+            break
+        base = _signature(init)
+        if base is None:
+            break
+        keywords |= set(base["params"]) | set(base["kwonly"])
+        varkw = base["varkw"]
+    return {**own, "kwonly": sorted(keywords - set(own["params"])), "varkw": varkw}
+
+
+def build_index() -> dict:
+    """Introspect the installed manim and return the index (imports manim)."""
+    import manim
+
+    names = getattr(manim, "__all__", None) or [n for n in dir(manim) if not n.startswith("_")]
+    index = {"version": manim.__version__, "classes": {}, "functions": {}, "names": sorted(names)}
+    for name in names:
+        obj = getattr(manim, name, None)
+        if inspect.isclass(obj):
+            index["classes"][name] = {
+                "init": _class_signature(obj),
+                "attrs": sorted(a for a in dir(obj) if not a.startswith("__")),
+            }
+        elif inspect.isfunction(obj) or inspect.isbuiltin(obj):
+            index["functions"][name] = _signature(obj)
+    return index
+
+
+def load_index() -> dict:
+    """Return the index for the installed manim, building and caching it on first use."""
+    global _index
+    if _index is not None:
+        return _index
+
+    version = importlib.metadata.version("manim")
+    path = os.path.join(INDEX_DIR, f"manim-api-{version}.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            _index = json.load(f)
+        return _index
+    except (OSError, ValueError):
+        pass
+
+    _index = build_index()
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(_index, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return _index
+
+
+# Checking
+
+def _bound_names(tree: ast.AST) -> tuple[set, bool]:
+    """Every name the script binds anywhere, and whether it star-imports from outside manim."""
+    bound, foreign_star = set(), False
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            bound.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            bound.add(node.name)
+        elif isinstance(node, ast.arg):
+            bound.add(node.arg)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name == "*":
+                    foreign_star |= getattr(node, "module", None) != "manim"
+                else:
+                    bound.add((alias.asname or alias.name).split(".")[0])
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            bound.add(node.name)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            bound.update(node.names)
+    return bound, foreign_star
+
+
+def _check_call(call: ast.Call, name: str, sig: dict, findings: list) -> None:
+    if any(isinstance(arg, ast.Starred) for arg in call.args):
+        return
+    if any(kw.arg is None for kw in call.keywords):
+        return
+
+    if not sig["varargs"] and len(call.args) > len(sig["params"]):
+        findings.append({
+            "line": call.lineno,
+            "message": f"{name}() takes at most {len(sig['params'])} positional "
+                       f"arguments ({', '.join(sig['params']) or 'none'}) but {len(call.args)} were given",
+        })
+
+    accepted = set(sig["params"]) | set(sig["kwonly"])
+    for kw in call.keywords:
+        if kw.arg not in accepted and not sig["varkw"]:
+            findings.append({
+                "line": call.lineno,
+                "message": f"{name}() got an unexpected keyword argument '{kw.arg}'",
+            })
+
+    supplied = set(sig["params"][:len(call.args)]) | {kw.arg for kw in call.keywords}
+    missing = [p for p in sig["params"][:sig["required"]] if p not in supplied]
+    if missing:
+        findings.append({
+            "line": call.lineno,
+            "message": f"{name}() is missing required arguments: {', '.join(missing)}",
+        })
+
+
+def _variable_types(tree: ast.AST, classes: dict) -> dict:
+    """Map variables assigned exactly once, from a direct manim constructor call, to that class."""
+    types, reassigned = {}, set()
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+            continue
+        targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+        for target in targets:
+            if not isinstance(target, ast.Name):
+                continue
+            value = node.value
+            if (
+                isinstance(node, ast.Assign)
+                and isinstance(value, ast.Call)
+                and isinstance(value.func, ast.Name)
+                and value.func.id in classes
+                and target.id not in types
+            ):
+                types[target.id] = value.func.id
+            else:
+                reassigned.add(target.id)
+    return {name: cls for name, cls in types.items() if name not in reassigned}
+
+
+def check_script(code: str) -> list[dict]:
+    """Return findings ``{"line": int, "message": str}`` for manim API misuse in ``code``.
+
+    Syntax errors are left to ``compile``; an unparsable script has no findings.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return []
+
+    index = load_index()
+    classes, functions = index["classes"], index["functions"]
+    bound, foreign_star = _bound_names(tree)
+    known = set(index["names"]) | set(dir(builtins)) | bound
+    var_types = _variable_types(tree, classes)
+    findings, unknown = [], set()
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+            if not foreign_star and node.id not in known and node.id not in unknown:
+                unknown.add(node.id)
+                findings.append({
+                    "line": node.lineno,
+                    "message": f"'{node.id}' is not defined and is not exported by manim {index['version']}",
+                })
+
+        if not isinstance(node, ast.Call):
+            continue
+        func = node.func
+        if isinstance(func, ast.Name) and func.id not in bound:
+            if func.id in classes and classes[func.id]["init"]:
+                _check_call(node, func.id, classes[func.id]["init"], findings)
+            elif functions.get(func.id):
+                _check_call(node, func.id, functions[func.id], findings)
+        elif isinstance(func, ast.Attribute):
+            owner = func.value
+            # `mob.animate.method(...)` calls `method` on the mobject too
+            if isinstance(owner, ast.Attribute) and owner.attr == "animate":
+                owner = owner.value
+            if isinstance(owner, ast.Name) and owner.id in var_types:
+                cls = var_types[owner.id]
+                if func.attr not in classes[cls]["attrs"]:
+                    findings.append({
+                        "line": node.lineno,
+                        "message": f"{cls} has no method '{func.attr}' (called on '{owner.id}')",
+                    })
+
+    findings.sort(key=lambda f: f["line"])
+    return findings
+
+
+def format_findings(findings: list[dict]) -> str:
+    """Render findings as one ``line N: message`` per line for prompts and logs."""
+    return "\n".join(f"line {f['line']}: {f['message']}" for f in findings)
+
+
+if __name__ == '__main__':
+    # Usage: python api_check.py <script.py>
+    if len(sys.argv) < 2:
+        print("Usage: api_check.py <script.py>", file=sys.stderr)
+        sys.exit(1)
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        results = check_script(f.read())
+    print(format_findings(results) or "No findings")
+    sys.exit(1 if results else 0)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""Batch mode: animate every theorem-like environment of a .tex project.
+
+Usage:
+    python batch.py <main.tex> [more.tex ...] --out-dir DIR [--jobs N]
+                    [--kinds theorem lemma proposition definition]
+
+Environments are collected with ``tex_scan`` (following ``\\input`` and
+``\\include``) and each one runs the full generate+render pipeline in a
+bounded process pool. Every job works in its own directory under
+``DIR/jobs``, while the artifact cache in ``DIR/.cache`` is shared, so
+re-running a lecture-note set only regenerates statements that changed.
+Compiled Tex/Text glyphs are shared through ``DIR/.cache/glyphs`` unless
+``MANIM_GEN_GLYPH_DIR`` points elsewhere, and scripts that render join the
+few-shot library in ``DIR/.fewshot`` that later jobs draw examples from.
+Model responses are memoized in ``DIR/.llm`` (see ``llm``).
+Results are written to ``DIR/batch.json`` as jobs finish.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import progress
+from tex_scan import ENVIRONMENTS, extract_all
+
+MANIFEST_FILE = "batch.json"
+
+
+def job_name(index: int, item: dict) -> str:
+    """A readable, unique directory name such as ``004-mean-value-theorem``."""
+    slug = re.sub(r'[^a-z0-9]+', '-', (item["name"] or item["kind"]).lower()).strip('-')
+    return f"{index:03d}-{slug[:48]}"
+
+
+def _save_manifest(path: str, records: list[dict]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(records, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _init_worker():
+    # Parallelism comes from running jobs side by side; nested render pools would oversubscribe
+    os.environ["MANIM_GEN_RENDER_WORKERS"] = "1"
+
+
+def _run(name: str, latex: str, job_dir: str, cache_dir: str) -> dict:
+    """Pool entry point: run one job, turning failures into a result."""
+    from make_animation import run_job
+
+    started = time.perf_counter()
+    try:
+        with progress.job_context(name):
+            result = run_job(latex, job_dir, cache_dir)
+    except Exception as e:
+        return {"ok": False, "error": str(e), "seconds": time.perf_counter() - started}
+    return {"ok": True, **result, "seconds": time.perf_counter() - started}
+
+
+def run_batch(paths: list[str], out_dir: str, jobs: int = None,
+              environments=ENVIRONMENTS) -> list[dict]:
+    """Run the pipeline for every environment in ``paths``; returns one record per job."""
+    items = extract_all(paths, environments)
+    cache_dir = os.path.join(out_dir, ".cache")
+    manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Set before the pool starts so every job process inherits it
+    os.environ.setdefault("MANIM_GEN_GLYPH_DIR", os.path.join(cache_dir, "glyphs"))
+    os.environ.setdefault("MANIM_GEN_FEWSHOT_DIR", os.path.join(out_dir, ".fewshot"))
+    os.environ.setdefault("MANIM_GEN_LLM_CACHE_DIR", os.path.join(out_dir, ".llm"))
+
+    records = []
+    for index, item in enumerate(items):
+        name = job_name(index, item)
+        job_dir = os.path.join(out_dir, "jobs", name)
+        os.makedirs(job_dir, exist_ok=True)
+        with open(os.path.join(job_dir, "statement.tex"), "w", encoding="utf-8") as f:
+            f.write(item["latex"])
+        records.append({
+            "job": name,
+            "kind": item["kind"],
+            "name": item["name"],
+            "file": item["file"],
+            "line": item["line"],
+            "end_line": item["end_line"],
+            "dir": job_dir,
+            "ok": None,
+        })
+    _save_manifest(manifest_path, records)
+    print(f"{len(records)} environments found", file=sys.stderr)
+
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count(), initializer=_init_worker) as pool:
+        futures = {
+            pool.submit(_run, record["job"], item["latex"], record["dir"], cache_dir): record
+            for record, item in zip(records, items)
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            record = futures[future]
+            record.update(future.result())
+            _save_manifest(manifest_path, records)
+            status = "ok" if record["ok"] else f"FAILED: {record['error']}"
+            print(
+                f"[{done}/{len(records)}] {record['job']} "
+                f"({os.path.basename(record['file'])}:{record['line']}) "
+                f"{record['seconds']:.1f}s {status}",
+                file=sys.stderr,
+            )
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("tex_files", nargs="+")
+    parser.add_argument("--out-dir", required=True)
+    parser.add_argument("--jobs", type=int, default=None, help="parallel jobs (default: CPU count)")
+    parser.add_argument("--kinds", nargs="+", default=list(ENVIRONMENTS))
+    args = parser.parse_args()
+
+    records = run_batch(args.tex_files, os.path.abspath(args.out_dir), args.jobs, tuple(args.kinds))
+    failed = [record for record in records if not record["ok"]]
+    print(f"{len(records) - len(failed)}/{len(records)} animations rendered", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
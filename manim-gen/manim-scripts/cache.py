@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+"""On-disk, content-addressed cache for intuitions, scripts and rendered videos."""
+import contextlib
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Bump when the on-disk layout changes so stale entries are never read back.
+CACHE_LAYOUT_VERSION = 1
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GiB
+
+INTUITION_FILE = "intuition.txt"
+SCRIPT_FILE = "theorem_animation.py"
+VIDEO_FILE = "video.mp4"
+
+INDEX_FILE = "index.json"
+STATS_FILE = "stats.json"
+LOCK_FILE = "index.lock"
+
+# Entry directories are named by their sha256 cache key
+_KEY_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+def normalize_latex(latex: str) -> str:
+    """Collapse whitespace so cosmetic differences in a selection share a cache entry."""
+    return " ".join(latex.split())
+
+
+def cache_key(latex: str, models: dict, prompt_versions: dict, quality: str) -> str:
+    """Hash everything that influences the produced artifacts into a stable key."""
+    payload = json.dumps(
+        {
+            "layout": CACHE_LAYOUT_VERSION,
+            "latex": normalize_latex(latex),
+            "models": models,
+            "prompts": prompt_versions,
+            "quality": quality,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _write_json_atomic(path: str, data) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for name in os.listdir(path):
+        full = os.path.join(path, name)
+        if os.path.isfile(full):
+            total += os.path.getsize(full)
+    return total
+
+
+class ArtifactCache:
+    """Size-bounded LRU store of pipeline artifacts, one directory per cache key.
+
+    The index keeps entries in least- to most-recently-used order so lookups,
+    touches and evictions never need to walk the cache directory; it is
+    reconciled with the directories on disk once, when the cache is opened.
+    The worker, batch runs and the CLI share one root, so every
+    read-modify-write of the index and stats happens under an exclusive lock
+    on ``index.lock`` and starts from ``index.json``. An entry larger than
+    ``max_bytes`` on its own is evicted as soon as it is stored.
+    """
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        with self._locked():
+            self._reload()
+            self._reconcile()
+
+    # Index / stats persistence
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Hold the exclusive cache lock around a read-modify-write of the index or stats."""
+        with open(os.path.join(self.root, LOCK_FILE), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _reload(self) -> None:
+        self._index = self._read_index()
+        self._stats = self._load_stats()
+
+    def _read_index(self) -> "OrderedDict[str, dict]":
+        entries = {}
+        try:
+            with open(os.path.join(self.root, INDEX_FILE), "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+        ordered = sorted(entries.items(), key=lambda item: item[1]["atime"])
+        return OrderedDict(ordered)
+
+    def _reconcile(self) -> None:
+        """Drop entries whose directory vanished and adopt entry directories the index lost."""
+        on_disk = {
+            name for name in os.listdir(self.root)
+            if os.path.isdir(os.path.join(self.root, name))
+        }
+        for key in list(self._index):
+            if key not in on_disk:
+                del self._index[key]
+        for key in on_disk - set(self._index):
+            entry_dir = os.path.join(self.root, key)
+            # Only key-named directories holding artifacts; anything else in the root is not ours
+            artifacts = (INTUITION_FILE, SCRIPT_FILE, VIDEO_FILE)
+            if not _KEY_PATTERN.fullmatch(key) or not any(
+                    os.path.exists(os.path.join(entry_dir, name)) for name in artifacts):
+                continue
+            self._index[key] = {"size": _dir_size(entry_dir), "atime": os.path.getmtime(entry_dir)}
+        self._index = OrderedDict(sorted(self._index.items(), key=lambda item: item[1]["atime"]))
+        self._save_index()
+
+    def _save_index(self) -> None:
+        _write_json_atomic(os.path.join(self.root, INDEX_FILE), self._index)
+
+    def _load_stats(self) -> dict:
+        stats = {"hits": 0, "partial_hits": 0, "misses": 0, "evictions": 0}
+        try:
+            with open(os.path.join(self.root, STATS_FILE), "r", encoding="utf-8") as f:
+                stats.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+        return stats
+
+    def _bump(self, counter: str) -> None:
+        self._stats[counter] += 1
+        _write_json_atomic(os.path.join(self.root, STATS_FILE), self._stats)
+
+    # Public API
+
+    def entry_dir(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def get(self, key: str) -> dict | None:
+        """Return the cached artifacts for ``key`` and mark it as recently used.
+
+        The result maps ``intuition``/``script`` to text and ``video`` to a file
+        path; artifacts that were never stored are ``None``. A lookup counts as
+        a hit only when the video is present.
+        """
+        with self._locked():
+            self._reload()
+            return self._get(key)
+
+    def _get(self, key: str) -> dict | None:
+        if key not in self._index:
+            self._bump("misses")
+            return None
+
+        entry_dir = self.entry_dir(key)
+        result = {"intuition": None, "script": None, "video": None}
+        for field, name in (("intuition", INTUITION_FILE), ("script", SCRIPT_FILE)):
+            path = os.path.join(entry_dir, name)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    result[field] = f.read()
+        video_path = os.path.join(entry_dir, VIDEO_FILE)
+        if os.path.exists(video_path):
+            result["video"] = video_path
+
+        if result["video"]:
+            self._bump("hits")
+        elif result["intuition"] or result["script"]:
+            self._bump("partial_hits")
+        else:
+            # Removed behind the index's back; forget it
+            del self._index[key]
+            self._bump("misses")
+            self._save_index()
+            return None
+
+        self._touch(key)
+        return result
+
+    def put(self, key: str, intuition: str = None, script: str = None,
+            video_path: str = None) -> None:
+        """Store any subset of artifacts under ``key`` and enforce the size bound."""
+        entry_dir = self.entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+        for text, name in ((intuition, INTUITION_FILE), (script, SCRIPT_FILE)):
+            if text is not None:
+                tmp_path = os.path.join(entry_dir, f"{name}.{os.getpid()}.tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(tmp_path, os.path.join(entry_dir, name))
+        if video_path is not None:
+            tmp_path = os.path.join(entry_dir, f"{VIDEO_FILE}.{os.getpid()}.tmp")
+            shutil.copyfile(video_path, tmp_path)
+            os.replace(tmp_path, os.path.join(entry_dir, VIDEO_FILE))
+
+        with self._locked():
+            self._reload()
+            self._index[key] = {"size": _dir_size(entry_dir), "atime": time.time()}
+            self._index.move_to_end(key)
+            self._evict()
+            self._save_index()
+
+    def stats(self) -> dict:
+        """Hit/miss counters plus current occupancy."""
+        with self._locked():
+            self._reload()
+        return {
+            **self._stats,
+            "entries": len(self._index),
+            "bytes": sum(e["size"] for e in self._index.values()),
+            "max_bytes": self.max_bytes,
+        }
+
+    # Internals
+
+    def _touch(self, key: str) -> None:
+        self._index[key]["atime"] = time.time()
+        self._index.move_to_end(key)
+        self._save_index()
+
+    def _evict(self) -> None:
+        total = sum(e["size"] for e in self._index.values())
+        while total > self.max_bytes and self._index:
+            key, entry = self._index.popitem(last=False)
+            shutil.rmtree(self.entry_dir(key), ignore_errors=True)
+            total -= entry["size"]
+            self._stats["evictions"] += 1
+        _write_json_atomic(os.path.join(self.root, STATS_FILE), self._stats)
+
+
+if __name__ == '__main__':
+    # Usage: python cache.py <cache_dir>
+    if len(sys.argv) < 2:
+        print("Usage: cache.py <cache_dir>", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(ArtifactCache(sys.argv[1]).stats(), indent=2))
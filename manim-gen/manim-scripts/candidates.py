@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""Concurrent candidate generation with first-valid-wins selection.
+
+Instead of one draft followed by a long sequential review/fix chain, N drafts
+are requested at once through the async side of the model's ``llm`` client.
+Each is validated as soon as it arrives, in a thread, so the other candidates
+keep arriving and validating meanwhile; the first that passes wins, the
+outstanding requests are cancelled and validations still running are told to
+stop (``validate`` gets the stop event, see ``first_valid``). Only when every
+candidate fails does the caller fall back to the repair loop, starting from
+the candidate with the fewest problems.
+"""
+import asyncio
+import contextvars
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_CANDIDATES = 3
+DEFAULT_TOKEN_BUDGET = 24000
+
+
+def candidate_settings() -> tuple[int, int]:
+    """Number of candidates and total output-token budget, from the environment."""
+    n = int(os.getenv("MANIM_GEN_CANDIDATES", DEFAULT_CANDIDATES))
+    budget = int(os.getenv("MANIM_GEN_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+    return max(n, 1), max(budget, 1)
+
+
+def _generation_config(i: int, n: int, budget: int) -> dict:
+    # Spread temperatures so the candidates actually differ from each other
+    return {
+        "temperature": 0.4 + 0.6 * i / max(n - 1, 1),
+        "max_output_tokens": budget // n,
+    }
+
+
+async def first_valid(model, prompt: str, n: int, budget: int, extract, validate) -> dict:
+    """Request ``n`` candidates from ``model`` (an ``llm.LLMClient``) concurrently and
+    return as soon as one validates.
+
+    ``extract(text)`` turns a response into code; ``validate(code, stop)``
+    returns a problem description or None and should give up early once the
+    ``threading.Event`` ``stop`` is set, which happens as soon as the outcome
+    is decided. The result has ``winner`` (code or None),
+    ``failures`` (list of ``(code, problem)`` in the order they were rejected) and
+    ``output_tokens`` spent across all finished candidates.
+    """
+    started = time.perf_counter()
+    result = {"winner": None, "failures": [], "output_tokens": 0}
+
+    async def attempt(i: int):
+        """Request and validate candidate ``i``, returning ``(code, problem)``."""
+        try:
+            response = await model.generate_async(prompt, f"candidate {i}",
+                                                  generation_config=_generation_config(i, n, budget))
+        except Exception as e:
+            return None, f"Request failed: {e}"
+        usage = getattr(response, "usage_metadata", None)
+        result["output_tokens"] += getattr(usage, "candidates_token_count", 0) or 0
+        if not getattr(response, "parts", None):
+            return None, "Empty response"
+        code = extract(response.text)
+        # Validation includes a dry run; off the loop, other candidates keep arriving meanwhile.
+        # Executor threads don't inherit context, so pass it along for the progress job id
+        context = contextvars.copy_context()
+        problem = await asyncio.get_running_loop().run_in_executor(validators, context.run, validate, code, stop)
+        return code, problem
+
+    # Not the loop's default executor: asyncio.run would wait for abandoned validations on exit
+    validators = ThreadPoolExecutor(max_workers=n, thread_name_prefix="candidate")
+    stop = threading.Event()
+    tasks = [asyncio.create_task(attempt(i)) for i in range(n)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            code, problem = await next_done
+            if problem is None:
+                result["winner"] = code
+                break
+            result["failures"].append((code, problem))
+    finally:
+        stop.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        validators.shutdown(wait=False, cancel_futures=True)
+
+    print(
+        f"[llm] candidates: {'winner found' if result['winner'] else 'all failed'} after "
+        f"{len(result['failures']) + bool(result['winner'])}/{n} responses, "
+        f"{result['output_tokens']} output tokens, {time.perf_counter() - started:.2f}s",
+        file=sys.stderr,
+    )
+    return result
+
+
+def generate_candidates(model, prompt: str, extract, validate, n: int = None,
+                        budget: int = None) -> dict:
+    """Synchronous entry point around ``first_valid`` using the configured settings."""
+    default_n, default_budget = candidate_settings()
+    return asyncio.run(first_valid(
+        model, prompt, n or default_n, budget or default_budget, extract, validate
+    ))
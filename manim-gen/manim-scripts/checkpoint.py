@@ -0,0 +1,200 @@
+"""Per-animation checkpoints, so a repaired script only re-renders what changed.
+
+While a scene renders, every finished ``play``/``wait`` is recorded in
+``<out_dir>/checkpoints``: a hard link to its partial movie, the script lines
+on the call stack that issued it, and digests of the scene's mobject tree
+before and after it plus of the animations themselves. When
+``fix_render_errors`` patches a script that failed at, say, the fifth
+animation, the next render compares the repaired script with the recorded one
+and resumes after the deepest checkpoint whose call lines all lie before the
+first changed line: those animations are stepped through without drawing (as
+manim does for ``from_animation_number``) and their partial movies are
+reused, so only the changed tail is rendered again.
+
+Python cannot restore a half-run ``construct()``, so the prefix is still
+executed; the digests confirm that it rebuilds the recorded state. A
+mismatch, e.g. from an edited helper the prefix calls or from updaters that
+integrate ``dt`` differently when skipped, raises ``CheckpointMismatch`` and
+the scene is rendered from the start instead.
+"""
+import hashlib
+import json
+import os
+import shutil
+from itertools import zip_longest
+
+import numpy as np
+
+# Bump when the index format or the digests change so old checkpoints are ignored
+CHECKPOINT_VERSION = 1
+INDEX_FILE = "index.json"
+
+# Digests round coordinates and colors so float noise from skipped interpolation doesn't count
+_DECIMALS = 4
+_ARRAYS = ("points", "fill_rgbas", "stroke_rgbas", "background_stroke_rgbas", "rgbas", "pixel_array")
+
+
+class CheckpointMismatch(RuntimeError):
+    """Raised when a resumed prefix does not reproduce its recorded state."""
+
+
+def _update_array(h, value) -> None:
+    value = np.asarray(value)
+    if value.dtype.kind == "f":
+        # Adding 0.0 turns -0.0 into 0.0, which hashes differently
+        value = np.round(value, _DECIMALS) + 0.0
+    h.update(str(value.shape).encode())
+    h.update(np.ascontiguousarray(value).tobytes())
+
+
+def _update_mobject(h, mobject) -> None:
+    for member in mobject.get_family():
+        h.update(type(member).__name__.encode())
+        for name in _ARRAYS:
+            value = vars(member).get(name)
+            if isinstance(value, np.ndarray):
+                _update_array(h, value)
+        h.update(repr((member.z_index, vars(member).get("stroke_width"))).encode())
+
+
+def state_digest(scene, camera) -> str:
+    """Digest of everything on screen: the scene's mobjects and the camera's own (frame, angles)."""
+    h = hashlib.blake2b(digest_size=16)
+    for mobject in [*scene.mobjects, *scene.foreground_mobjects]:
+        _update_mobject(h, mobject)
+    h.update(b"|camera")
+    for name, value in sorted(vars(camera).items()):
+        if hasattr(value, "get_family"):
+            h.update(name.encode())
+            _update_mobject(h, value)
+    return h.hexdigest()
+
+
+def animation_digest(scene) -> str:
+    """Digest of the compiled animations of the current play: kinds, timing and rate functions."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr(round(scene.duration, 6)).encode())
+    for animation in scene.animations:
+        rate_func = getattr(animation, "rate_func", None)
+        code = getattr(rate_func, "__code__", None)
+        h.update(repr((
+            type(animation).__name__,
+            round(animation.run_time, 6),
+            getattr(animation, "lag_ratio", None),
+            getattr(rate_func, "__qualname__", None),
+            code.co_code if code else None,
+            code.co_consts if code else None,
+        )).encode())
+    return h.hexdigest()
+
+
+def script_lines(script_path: str, frame) -> list[int]:
+    """Line numbers of the frames on the stack that belong to ``script_path``."""
+    lines = []
+    while frame is not None:
+        if frame.f_code.co_filename == script_path:
+            lines.append(frame.f_lineno)
+        frame = frame.f_back
+    return lines
+
+
+def first_changed_line(old: str, new: str) -> int | None:
+    """1-based number of the first line that differs between two scripts; None if they are equal."""
+    for number, (a, b) in enumerate(zip_longest(old.splitlines(), new.splitlines()), 1):
+        if a != b:
+            return number
+    return None
+
+
+class Checkpoints:
+    """The checkpoints of one script in ``directory``: the reusable prefix and the ones being recorded.
+
+    ``settings`` (resolution, frame rate, ...) must match the recording for
+    any checkpoint to be reused.
+    """
+
+    def __init__(self, directory: str, script_path: str, settings: dict):
+        self.directory = directory
+        self.script_path = script_path
+        self.settings = settings
+        with open(script_path, encoding="utf-8") as f:
+            self.script = f.read()
+        self.resume = self._reusable(self._load())
+        self.plays = list(self.resume)
+        os.makedirs(directory, exist_ok=True)
+        keep = {play["movie"] for play in self.resume} | {INDEX_FILE}
+        for name in os.listdir(directory):
+            if name not in keep:
+                os.remove(os.path.join(directory, name))
+        self._write_index()
+
+    def _load(self) -> dict | None:
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get("version") != CHECKPOINT_VERSION or index.get("settings") != self.settings:
+            return None
+        return index
+
+    def _reusable(self, index: dict | None) -> list[dict]:
+        if index is None:
+            return []
+        changed = first_changed_line(index["script"], self.script)
+        reusable = []
+        for play in index["plays"]:
+            # An animation issued from outside the script can't be placed relative to the edit
+            last_line = max(play["lines"], default=float("inf"))
+            if changed is not None and last_line >= changed:
+                break
+            if not os.path.exists(os.path.join(self.directory, play["movie"])):
+                break
+            reusable.append(play)
+        return reusable
+
+    def movie_path(self, play: dict) -> str:
+        return os.path.join(self.directory, play["movie"])
+
+    def expect(self, play: dict, field: str, digest: str) -> None:
+        """Raise ``CheckpointMismatch`` unless ``digest`` matches what ``play`` recorded for ``field``."""
+        if play[field] != digest:
+            raise CheckpointMismatch(f"animation {play['index']} no longer matches its checkpoint ({field})")
+
+    def record(self, index: int, lines: list[int], before: str, animation: str, after: str,
+               duration: float, partial_movie: str) -> None:
+        """Checkpoint animation ``index``, which just finished rendering into ``partial_movie``."""
+        if index != len(self.plays):
+            return  # Checkpoints only form a prefix; nothing after a gap can be resumed to
+        movie = f"play_{index:05d}{os.path.splitext(partial_movie)[1]}"
+        path = os.path.join(self.directory, movie)
+        tmp_path = f"{path}.tmp"
+        try:
+            os.link(partial_movie, tmp_path)
+        except OSError:
+            shutil.copyfile(partial_movie, tmp_path)
+        os.replace(tmp_path, path)
+        self.plays.append({"index": index, "lines": lines, "before": before, "animation": animation,
+                           "after": after, "duration": duration, "movie": movie})
+        self._write_index()
+
+    def discard(self) -> None:
+        """Forget every checkpoint, e.g. after a mismatch; recording starts over."""
+        self.resume = []
+        self.plays = []
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory)
+        self._write_index()
+
+    def remove(self) -> None:
+        """Delete the checkpoints once the scene rendered completely."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _write_index(self) -> None:
+        index = {"version": CHECKPOINT_VERSION, "settings": self.settings, "script": self.script,
+                 "plays": self.plays}
+        path = os.path.join(self.directory, INDEX_FILE)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+"""Headless dry run of generated scenes.
+
+Executes ``construct()`` with a renderer that never rasterizes or encodes: every
+``play``/``wait`` still compiles and begins its animations, runs updaters and
+interpolates at a handful of sampled alphas, but no Cairo drawing or ffmpeg
+work happens. Runtime API errors therefore surface in milliseconds instead of
+after a full render.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import traceback
+
+from manim import tempconfig
+from manim.renderer.cairo_renderer import CairoRenderer
+
+from render import DEFAULT_SCENE, RenderError, load_scene_class, scene_camera_class, scene_config
+
+# Alphas at which every animation is interpolated during a dry run.
+SAMPLED_ALPHAS = (0.0, 0.25, 0.5, 0.75, 1.0)
+
+
+class _NullFileWriter:
+    """Accepts every SceneFileWriter call and writes nothing."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class DryRunRenderer(CairoRenderer):
+    """CairoRenderer that steps through animations without producing frames."""
+
+    def __init__(self, camera_class=None):
+        super().__init__(file_writer_class=_NullFileWriter, camera_class=camera_class)
+        self.play_durations = []
+        self.max_mobjects = 0
+
+    def play(self, scene, *args, **kwargs):
+        scene.compile_animation_data(*args, **kwargs)
+        scene.begin_animations()
+        duration = scene.get_run_time(scene.animations)
+        if duration > 0:
+            for alpha in SAMPLED_ALPHAS:
+                scene.update_to_time(alpha * duration)
+        for animation in scene.animations:
+            animation.finish()
+            animation.clean_up_from_scene(scene)
+        scene.update_mobjects(0)
+
+        self.play_durations.append(duration)
+        self.time += duration
+        self.num_plays += 1
+        self._count_mobjects(scene)
+
+    def _count_mobjects(self, scene):
+        family_size = sum(len(mob.get_family()) for mob in scene.mobjects)
+        self.max_mobjects = max(self.max_mobjects, family_size)
+
+    # Nothing is ever drawn or written.
+
+    def update_frame(self, *args, **kwargs):
+        pass
+
+    def render(self, *args, **kwargs):
+        pass
+
+    def add_frame(self, *args, **kwargs):
+        pass
+
+    def freeze_current_frame(self, *args, **kwargs):
+        pass
+
+    def save_static_frame_data(self, *args, **kwargs):
+        pass
+
+    def scene_finished(self, scene):
+        self._count_mobjects(scene)
+
+
+def _describe_error(e: BaseException, script_path: str) -> str:
+    """Format ``e`` with the innermost line of the generated script that raised it."""
+    message = f"{type(e).__name__}: {e}"
+    script = os.path.abspath(script_path)
+    frames = [
+        frame for frame in traceback.extract_tb(e.__traceback__)
+        if os.path.abspath(frame.filename) == script
+    ]
+    if frames:
+        frame = frames[-1]
+        message += f" (line {frame.lineno}: {frame.line})"
+    return message
+
+
+def dry_run(script_path: str, out_dir: str = None, quality: str = "low_quality",
+            scene_name: str = DEFAULT_SCENE) -> dict:
+    """Execute the scene headlessly and report errors, duration and mobject count.
+
+    ``out_dir`` only hosts manim's Tex/Text caches (LaTeX still has to be
+    compiled to build the mobjects), so pointing it at the job's output
+    directory lets the real render reuse them.
+    """
+    out_dir = out_dir or tempfile.mkdtemp(prefix="manim-gen-dryrun-")
+    started = time.perf_counter()
+    report = {
+        "error": None,
+        "duration": 0.0,
+        "plays": 0,
+        "play_durations": [],
+        "mobjects": 0,
+        "seconds": 0.0,
+    }
+
+    try:
+        scene_cls = load_scene_class(script_path, scene_name)
+    except RenderError as e:
+        report["error"] = str(e)
+        report["seconds"] = time.perf_counter() - started
+        return report
+
+    overrides = {"dry_run": True, "disable_caching": True}
+    with tempconfig(scene_config(script_path, out_dir, quality, overrides)):
+        renderer = DryRunRenderer(scene_camera_class(scene_cls))
+        try:
+            scene = scene_cls(renderer=renderer)
+            scene.render()
+        except BaseException as e:
+            if isinstance(e, KeyboardInterrupt):
+                raise
+            report["error"] = _describe_error(e, script_path)
+
+    report.update(
+        duration=renderer.time,
+        plays=renderer.num_plays,
+        play_durations=renderer.play_durations,
+        mobjects=renderer.max_mobjects,
+        seconds=time.perf_counter() - started,
+    )
+    return report
+
+
+if __name__ == '__main__':
+    # Usage: python dryrun.py <script.py> [SceneName]
+    if len(sys.argv) < 2:
+        print("Usage: dryrun.py <script.py> [SceneName]", file=sys.stderr)
+        sys.exit(1)
+    result = dry_run(sys.argv[1], scene_name=sys.argv[2] if len(sys.argv) > 2 else DEFAULT_SCENE)
+    print(json.dumps(result, indent=2))
+    sys.exit(1 if result["error"] else 0)
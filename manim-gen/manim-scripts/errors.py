@@ -0,0 +1,9 @@
+"""Exceptions shared by the render, dry-run and sandbox modules.
+
+Kept free of manim imports so static checks (e.g. ``sandbox.check_budget``)
+can raise and catch them without loading manim.
+"""
+
+
+class RenderError(RuntimeError):
+    """Raised when a generated scene fails to load or render."""
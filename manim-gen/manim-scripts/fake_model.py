@@ -0,0 +1,107 @@
+"""Offline stand-in for ``genai.GenerativeModel``.
+
+Set ``MANIM_GEN_FAKE_MODEL=1`` to run the pipeline without network access or
+an API key. Responses are chosen by prompt type: intuition prompts get a short
+explanation, script prompts get a small valid scene, and diff prompts get an
+empty patch. Pass ``responses`` to script specific answers (e.g. a broken
+candidate followed by a good one), ``latency`` to simulate slow calls and
+``failures`` to make the first calls fail with a transient server error, as a
+stand-in server for exercising ``llm``'s retries. Calls slower than their
+``request_options`` timeout raise ``TimeoutError`` once it expires.
+"""
+import asyncio
+import itertools
+import time
+
+FAKE_INTUITION = (
+    "Draw the graph of f between a and b, connect the endpoints with a secant line, "
+    "then slide a tangent line along the curve until it is parallel to the secant."
+)
+
+FAKE_SCRIPT = '''```python
+from manim import *
+
+
+class TheoremScene(Scene):
+    def construct(self):
+        ax = Axes(x_range=[0, 4, 1], y_range=[0, 4, 1])
+        graph = ax.plot(lambda x: 0.25 * x ** 2, color="#00FF00")
+        secant = Line(ax.c2p(0, 0), ax.c2p(4, 4), color="#FF0000")
+        self.play(Create(ax), Create(graph))
+        self.play(Create(secant))
+        self.wait(1)
+```'''
+
+FAKE_DIFF = "```diff\n```"
+
+
+class _Usage:
+    def __init__(self, prompt: str, text: str):
+        # Rough 4-characters-per-token estimate, good enough for relative numbers
+        self.prompt_token_count = len(prompt) // 4
+        self.candidates_token_count = len(text) // 4
+
+
+class FakeResponse:
+    def __init__(self, prompt: str, text: str):
+        self.text = text
+        self.parts = [text] if text else []
+        self.usage_metadata = _Usage(prompt, text)
+
+
+class ServiceUnavailable(Exception):
+    """Named like google.api_core's 503 error, which ``llm`` retries."""
+
+    code = 503
+
+
+class FakeGenerativeModel:
+    """Drop-in for ``genai.GenerativeModel`` that never touches the network."""
+
+    def __init__(self, model_name: str = "fake", responses=None, latency: float = 0.0, failures: int = 0):
+        self.model_name = model_name
+        self.latency = latency
+        self.failures = failures
+        if callable(responses):
+            self._next = responses
+        elif responses is not None:
+            cycle = itertools.cycle(responses)
+            self._next = lambda prompt: next(cycle)
+        else:
+            self._next = self._default_response
+        self.calls = []
+
+    @staticmethod
+    def _default_response(prompt: str) -> str:
+        if "unified diff" in prompt:
+            return FAKE_DIFF
+        if "Explain the intuition" in prompt:
+            return FAKE_INTUITION
+        return FAKE_SCRIPT
+
+    def _outcome(self, prompt, request_options) -> tuple[float, Exception | None]:
+        """How long a call takes and what it raises at the end, if anything."""
+        self.calls.append(prompt)
+        if self.failures:
+            self.failures -= 1
+            return 0.0, ServiceUnavailable("fake server unavailable")
+        timeout = (request_options or {}).get("timeout")
+        if timeout is not None and self.latency > timeout:
+            return timeout, TimeoutError(f"fake server did not answer within {timeout}s")
+        return self.latency, None
+
+    def generate_content(self, prompt, generation_config=None, request_options=None, **kwargs):
+        delay, error = self._outcome(prompt, request_options)
+        if delay:
+            time.sleep(delay)
+        if error:
+            raise error
+        return FakeResponse(prompt, self._next(prompt))
+
+    async def generate_content_async(self, prompt, generation_config=None, request_options=None, **kwargs):
+        delay, error = self._outcome(prompt, request_options)
+        if delay:
+            await asyncio.sleep(delay)
+        if error:
+            raise error
+        return FakeResponse(prompt, self._next(prompt))
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+"""Local library of scripts that rendered, retrieved as few-shot examples.
+
+Every script that makes it through validation and rendering is stored with
+MinHash signatures of its statement and intuition: normalized LaTeX token
+shingles (commands, words, symbols; numbers collapsed) and word bigrams of
+the intuition. Generating a script for a new statement looks up the closest
+entries by estimated Jaccard similarity and shows them to the model as
+examples, so it starts from code that is known to work with the installed
+manim instead of from scratch. No embedding service is involved.
+
+Each entry is one JSON file in ``MANIM_GEN_FEWSHOT_DIR`` (default: a
+``.fewshot`` directory next to the artifact cache), written atomically so
+concurrent jobs can add to the library safely. ``MANIM_GEN_FEWSHOT_EXAMPLES``
+(default 2, 0 disables retrieval) sets how many examples a prompt gets and
+``MANIM_GEN_FEWSHOT_MAX`` (default 500) bounds the library; the least
+recently added entries go first.
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import time
+
+from cache import normalize_latex
+
+# Bump when signatures or the entry format change so old entries are ignored
+LIBRARY_VERSION = 1
+
+DEFAULT_EXAMPLES = 2
+DEFAULT_MAX_ENTRIES = 500
+NUM_PERM = 64
+# Below this the "closest" script is unrelated and only costs prompt tokens
+MIN_SIMILARITY = 0.12
+# Long scripts make poor examples and blow up the prompt
+MAX_SCRIPT_CHARS = 6000
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240917)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+_TEX_TOKEN = re.compile(r'\\[A-Za-z]+|[A-Za-z]+|\d+(?:\.\d+)?|[^\sA-Za-z\d{}]')
+_WORD = re.compile(r'[a-z]+')
+# Spacing and sizing commands say nothing about the mathematics
+_TEX_NOISE = {"\\left", "\\right", "\\big", "\\Big", "\\bigg", "\\Bigg", "\\quad", "\\qquad",
+              "\\label", "\\mathrm", "\\text", "\\displaystyle"}
+_STOPWORDS = set("""
+a an and are as at be by can for from has have in into is it its of on or so such that the their
+then there these this to we when where which while with as each any all also more most not only
+""".split())
+
+_loaded = {}
+
+
+def library_dir(cache_root: str) -> str:
+    """The library directory: MANIM_GEN_FEWSHOT_DIR, or ``.fewshot`` next to ``cache_root``."""
+    return os.getenv("MANIM_GEN_FEWSHOT_DIR") or os.path.join(
+        os.path.dirname(os.path.abspath(cache_root)), ".fewshot"
+    )
+
+
+def example_count() -> int:
+    return max(int(os.getenv("MANIM_GEN_FEWSHOT_EXAMPLES", DEFAULT_EXAMPLES)), 0)
+
+
+def tex_shingles(latex: str) -> set[str]:
+    """Commands on their own plus token bigrams and trigrams of the normalized statement."""
+    tokens = [
+        "0" if token[0].isdigit() else token if token.startswith("\\") else token.lower()
+        for token in _TEX_TOKEN.findall(normalize_latex(latex))
+        if token not in _TEX_NOISE
+    ]
+    shingles = {token for token in tokens if token.startswith("\\")}
+    for n in (2, 3):
+        shingles.update(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+    return shingles or set(tokens)
+
+
+def text_shingles(text: str) -> set[str]:
+    """Word bigrams of ``text`` without stopwords."""
+    words = [word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS and len(word) > 2]
+    return {f"{a} {b}" for a, b in zip(words, words[1:])} or set(words)
+
+
+def minhash(shingles: set[str]) -> list[int]:
+    """MinHash signature of ``shingles`` (NUM_PERM universal hash functions); empty for no shingles."""
+    if not shingles:
+        return []
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+              for s in shingles]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def similarity(sig_a: list[int], sig_b: list[int]) -> float:
+    """Estimated Jaccard similarity of the sets behind two signatures."""
+    if not sig_a or not sig_b:
+        return 0.0
+    return sum(a == b for a, b in zip(sig_a, sig_b)) / NUM_PERM
+
+
+def _signatures(latex: str, intuition: str) -> dict:
+    return {"tex": minhash(tex_shingles(latex)), "intuition": minhash(text_shingles(intuition or ""))}
+
+
+class Library:
+    """The entries under ``root``, reloaded incrementally as other processes add to it."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._entries = _loaded.setdefault(os.path.abspath(root), {})
+
+    def _refresh(self) -> dict:
+        try:
+            names = {entry.name: entry.stat().st_mtime for entry in os.scandir(self.root)
+                     if entry.name.endswith(".json")}
+        except OSError:
+            names = {}
+        for name in list(self._entries):
+            if name not in names:
+                del self._entries[name]
+        for name, mtime in names.items():
+            known = self._entries.get(name)
+            if known and known[0] == mtime:
+                continue
+            try:
+                with open(os.path.join(self.root, name), encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if entry.get("version") == LIBRARY_VERSION:
+                self._entries[name] = (mtime, entry)
+        return self._entries
+
+    def search(self, latex: str, intuition: str, k: int) -> list[dict]:
+        """Up to ``k`` entries most similar to the request, best first, each with its ``similarity``."""
+        query = _signatures(latex, intuition)
+        scored = []
+        for _, entry in self._refresh().values():
+            signatures = entry["signatures"]
+            score = similarity(query["tex"], signatures["tex"])
+            # Statement and intuition count equally when both sides have an intuition
+            if query["intuition"] and signatures["intuition"]:
+                score = 0.5 * score + 0.5 * similarity(query["intuition"], signatures["intuition"])
+            if score >= MIN_SIMILARITY:
+                scored.append((score, entry))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [{**entry, "similarity": round(score, 3)} for score, entry in scored[:k]]
+
+    def add(self, latex: str, intuition: str, script: str, attempts: int = 1) -> bool:
+        """Store a script that rendered; returns False if it is too long to be a useful example."""
+        if len(script) > MAX_SCRIPT_CHARS:
+            return False
+        os.makedirs(self.root, exist_ok=True)
+        name = hashlib.sha256(normalize_latex(latex).encode("utf-8")).hexdigest()[:16] + ".json"
+        entry = {
+            "version": LIBRARY_VERSION,
+            "latex": normalize_latex(latex),
+            "script": script,
+            "attempts": attempts,
+            "added": time.time(),
+            "signatures": _signatures(latex, intuition),
+        }
+        path = os.path.join(self.root, name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+        self.prune()
+        return True
+
+    def prune(self, max_entries: int = None) -> int:
+        """Drop the oldest entries beyond ``max_entries``; returns how many were removed."""
+        if max_entries is None:
+            max_entries = int(os.getenv("MANIM_GEN_FEWSHOT_MAX", DEFAULT_MAX_ENTRIES))
+        entries = self._refresh()
+        excess = sorted(entries, key=lambda name: entries[name][1]["added"])[:max(len(entries) - max_entries, 0)]
+        for name in excess:
+            try:
+                os.remove(os.path.join(self.root, name))
+            except OSError:
+                pass
+            entries.pop(name, None)
+        return len(excess)
+
+    def __len__(self) -> int:
+        return len(self._refresh())
+
+
+def format_examples(examples: list[dict]) -> str:
+    """Prompt section presenting retrieved scripts as examples."""
+    if not examples:
+        return ""
+    parts = ["These scripts rendered correctly for similar statements. Reuse their techniques and API usage "
+             "where they fit, but animate the theorem below, not theirs:"]
+    for i, example in enumerate(examples, 1):
+        parts.append(f"Example {i} - {example['latex']}\n```python\n{example['script'].strip()}\n```")
+    return "\n\n".join(parts) + "\n"
+
+
+if __name__ == '__main__':
+    # Usage: python fewshot.py <library_dir> ["<latex>" ["<intuition>"]]
+    if len(sys.argv) < 2:
+        print("Usage: fewshot.py <library_dir> [\"<latex>\" [\"<intuition>\"]]", file=sys.stderr)
+        sys.exit(1)
+    library = Library(sys.argv[1])
+    if len(sys.argv) < 3:
+        print(json.dumps({"entries": len(library)}, indent=2))
+        sys.exit(0)
+    started = time.perf_counter()
+    found = library.search(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else "",
+                           example_count() or DEFAULT_EXAMPLES)
+    print(json.dumps({
+        "entries": len(library),
+        "ms": round((time.perf_counter() - started) * 1000, 2),
+        "matches": [{"latex": match["latex"], "similarity": match["similarity"]} for match in found],
+    }, indent=2))
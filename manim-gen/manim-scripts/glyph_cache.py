@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+"""Shared, persistent cache of compiled Tex/Text SVGs and their parsed mobjects.
+
+Manim names the SVGs it compiles by a hash of their source, but keeps them in
+each render's media dir, so every new job starts cold and runs LaTeX, dvisvgm
+or Pango again for the same strings. Its Tex dir also can't simply be shared:
+every compile deletes the other non-SVG files in it, including another
+process's half-compiled ones.
+
+With ``MANIM_GEN_GLYPH_DIR`` set, ``install`` routes compilation through a
+private scratch dir per process and publishes each finished SVG into
+``<dir>/Tex`` or ``<dir>/texts`` with an atomic rename, under a
+cross-process lock so concurrent jobs compile a string once. The parsed submobjects of
+those SVGs are pickled to ``<dir>/mobjects``, keyed by manim's own SVG cache
+seed and version, so warm processes skip parsing too. Hits refresh the file's
+mtime and ``prune`` drops the least recently used files once the directory
+exceeds ``MANIM_GEN_GLYPH_CACHE_MB`` (default 256).
+"""
+import contextlib
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_MAX_MB = 256
+# Entries hash onto a fixed set of lock files so locks never pile up
+LOCK_STRIPES = 64
+
+_installed = False
+_scratch = None
+_stats = {"tex_hits": 0, "tex_misses": 0, "text_hits": 0, "text_misses": 0,
+          "mobject_hits": 0, "mobject_misses": 0}
+
+
+def glyph_dir() -> str | None:
+    """The shared cache directory (MANIM_GEN_GLYPH_DIR), or None when disabled."""
+    return os.getenv("MANIM_GEN_GLYPH_DIR") or None
+
+
+def config_overrides() -> dict:
+    """Manim config that points its own Tex/Text dirs at this process's scratch dir."""
+    global _scratch
+    if not glyph_dir():
+        return {}
+    if _scratch is None:
+        _scratch = tempfile.mkdtemp(prefix="manim-gen-glyphs-")
+    return {"tex_dir": os.path.join(_scratch, "Tex"), "text_dir": os.path.join(_scratch, "texts")}
+
+
+def stats() -> dict:
+    return dict(_stats)
+
+
+@contextlib.contextmanager
+def _locked(name: str):
+    """Hold an exclusive cross-process lock for the entry ``name``."""
+    stripe = int(hashlib.sha256(name.encode("utf-8")).hexdigest(), 16) % LOCK_STRIPES
+    lock_dir = os.path.join(glyph_dir(), "locks")
+    os.makedirs(lock_dir, exist_ok=True)
+    with open(os.path.join(lock_dir, f"{stripe:02d}.lock"), "a+b") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _touch(path: str) -> None:
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _publish(source: str, target: str) -> None:
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    with open(source, "rb") as src, open(tmp_path, "wb") as dst:
+        dst.write(src.read())
+    os.replace(tmp_path, target)
+
+
+def _shared_svg(kind: str, name: str, compile_svg) -> str:
+    """Return the shared SVG ``name`` of ``kind``, compiling it with ``compile_svg`` on a miss."""
+    directory = os.path.join(glyph_dir(), kind)
+    target = os.path.join(directory, name)
+    counter = "tex" if kind == "Tex" else "text"
+    if os.path.exists(target):
+        _stats[f"{counter}_hits"] += 1
+        _touch(target)
+        return target
+    os.makedirs(directory, exist_ok=True)
+    with _locked(target):
+        # Another process may have compiled it while we waited
+        if not os.path.exists(target):
+            _stats[f"{counter}_misses"] += 1
+            _publish(str(compile_svg()), target)
+        else:
+            _stats[f"{counter}_hits"] += 1
+    return target
+
+
+def _mobject_key(mobject) -> str:
+    import manim
+    seed = repr((manim.__version__, mobject.hash_seed))
+    return hashlib.sha256(seed.encode("utf-8")).hexdigest()
+
+
+def install() -> None:
+    """Route manim's Tex/Text compilation and SVG parsing through the shared cache.
+
+    A no-op when the cache is disabled or already installed.
+    """
+    global _installed
+    if _installed or not glyph_dir():
+        return
+    _installed = True
+
+    from manim.mobject.svg import svg_mobject
+    from manim.mobject.text import tex_mobject, text_mobject
+    from manim.utils import tex_file_writing
+
+    compile_tex_svg = tex_file_writing.tex_to_svg_file
+
+    def tex_to_svg_file(expression, environment=None, tex_template=None):
+        # Writing the .tex file is cheap and gives manim's content hash for the name
+        tex_file = tex_file_writing.generate_tex_file(expression, environment, tex_template)
+        return Path(_shared_svg(
+            "Tex", tex_file.with_suffix(".svg").name,
+            lambda: compile_tex_svg(expression, environment, tex_template),
+        ))
+
+    tex_file_writing.tex_to_svg_file = tex_to_svg_file
+    tex_mobject.tex_to_svg_file = tex_to_svg_file  # Imported by name there
+
+    for cls in (text_mobject.Text, text_mobject.MarkupText):
+        def _text2svg(self, color, _compile=cls._text2svg):
+            return _shared_svg("texts", f"{self._text2hash(color)}.svg", lambda: _compile(self, color))
+        cls._text2svg = _text2svg
+
+    init_svg_mobject = svg_mobject.SVGMobject.init_svg_mobject
+    shared_root = os.path.abspath(glyph_dir())
+
+    def cached_init_svg_mobject(self, use_svg_cache):
+        file_path = os.path.abspath(str(self.file_name or ""))
+        # Only content-addressed SVGs from the shared dirs are safe to key by path
+        if (not use_svg_cache or not file_path.startswith(shared_root + os.sep)
+                or svg_mobject.hash_obj(self.hash_seed) in svg_mobject.SVG_HASH_TO_MOB_MAP):
+            return init_svg_mobject(self, use_svg_cache)
+
+        pickle_path = os.path.join(shared_root, "mobjects", f"{_mobject_key(self)}.pickle")
+        try:
+            with open(pickle_path, "rb") as f:
+                submobjects = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            submobjects = None
+        if submobjects is not None:
+            _stats["mobject_hits"] += 1
+            _touch(pickle_path)
+            self.add(*submobjects)
+            svg_mobject.SVG_HASH_TO_MOB_MAP[svg_mobject.hash_obj(self.hash_seed)] = self.copy()
+            return None
+
+        _stats["mobject_misses"] += 1
+        # Parsing writes a modified copy next to the SVG, so parse each file one at a time
+        with _locked(file_path):
+            init_svg_mobject(self, use_svg_cache)
+        os.makedirs(os.path.dirname(pickle_path), exist_ok=True)
+        tmp_path = f"{pickle_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump([submobject.copy() for submobject in self.submobjects], f)
+            os.replace(tmp_path, pickle_path)
+        except (OSError, pickle.PicklingError, TypeError, AttributeError):
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+        return None
+
+    svg_mobject.SVGMobject.init_svg_mobject = cached_init_svg_mobject
+
+    prune()
+
+
+def prune(max_bytes: int = None) -> dict:
+    """Delete the least recently used cache files until the directory fits ``max_bytes``."""
+    root = glyph_dir()
+    if max_bytes is None:
+        max_bytes = int(os.getenv("MANIM_GEN_GLYPH_CACHE_MB", DEFAULT_MAX_MB)) * 1024 * 1024
+    files = []
+    for kind in ("Tex", "texts", "mobjects"):
+        directory = os.path.join(root, kind)
+        if not os.path.isdir(directory):
+            continue
+        for entry in os.scandir(directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        with contextlib.suppress(OSError):
+            os.remove(path)
+            removed += 1
+        total -= size
+    return {"files": len(files) - removed, "bytes": total, "removed": removed}
+
+
+if __name__ == '__main__':
+    # Usage: MANIM_GEN_GLYPH_DIR=<dir> python glyph_cache.py [--prune]
+    if not glyph_dir():
+        print("MANIM_GEN_GLYPH_DIR is not set", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(prune(None if "--prune" in sys.argv else float("inf")), indent=2))
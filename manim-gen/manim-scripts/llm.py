@@ -0,0 +1,426 @@
+#!/usr/bin/env python
+"""Shared client layer for every model call of the pipeline.
+
+``client(name)`` returns one ``LLMClient`` per model and process, so the
+underlying ``GenerativeModel`` and its transport are reused across calls and
+jobs in a warm worker (async calls get one model per event loop). Every call goes through ``generate`` (or
+``generate_async`` for concurrent candidates), which adds:
+
+* a deadline: each attempt times out after ``MANIM_GEN_LLM_TIMEOUT`` seconds
+  (default 120) and the call as a whole after ``MANIM_GEN_LLM_DEADLINE``
+  (default 300);
+* a token bucket of ``MANIM_GEN_LLM_RPM`` requests per minute (default 60,
+  bursts of ``MANIM_GEN_LLM_BURST``, default 10) shared by the process;
+* retries with exponential backoff and full jitter on rate limiting,
+  transient server errors, timeouts and empty responses;
+* an on-disk memo of responses in ``MANIM_GEN_LLM_CACHE_DIR`` (off when
+  unset), keyed by model, prompt and generation config like recordings (see
+  ``replay``) and bounded by ``MANIM_GEN_LLM_CACHE_MB`` (default 64). A prompt
+  that comes back within the same job (see ``job_scope``) is a retry of an
+  answer that did not work, so it always goes to the model. Offline runs
+  never use the memo.
+
+Each round is logged with ``log_round`` and its latency counted in a
+per-call-site histogram, see ``histograms``. ``fake_model`` can inject
+failures and latency to exercise all of this without a network.
+"""
+import asyncio
+import contextlib
+import contextvars
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+import weakref
+
+import replay
+from repair import log_round
+
+DEFAULT_TIMEOUT = 120
+DEFAULT_DEADLINE = 300
+DEFAULT_RPM = 60
+DEFAULT_BURST = 10
+DEFAULT_CACHE_MB = 64
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+# Upper bounds (seconds) of the latency histogram buckets; the last one is open
+HISTOGRAM_BOUNDS = (0.5, 1, 2, 4, 8, 16, 32, 64, 128)
+
+# google.api_core exception names (checked by name so importing them isn't needed)
+_RETRIABLE_ERRORS = {"ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+                     "DeadlineExceeded", "GatewayTimeout", "Aborted"}
+_RETRIABLE_CODES = {429, 500, 502, 503, 504}
+
+_clients = {}
+_clients_lock = threading.Lock()
+_histograms = {}
+_histograms_lock = threading.Lock()
+# Memo keys already asked in the current job, see job_scope
+_asked = contextvars.ContextVar("llm_asked", default=None)
+_asked_lock = threading.Lock()
+
+
+class LLMError(RuntimeError):
+    """Raised when a call still fails after its retries or runs past its deadline."""
+
+
+def _retriable(error: BaseException) -> bool:
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    return type(error).__name__ in _RETRIABLE_ERRORS or getattr(error, "code", None) in _RETRIABLE_CODES
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff before retry number ``attempt`` (1-based)."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def _observe(label: str, seconds: float, ok: bool) -> None:
+    site = label.split(" ")[0]  # "candidate 2" -> "candidate"
+    with _histograms_lock:
+        histogram = _histograms.setdefault(site, {
+            "count": 0, "errors": 0, "seconds": 0.0, "buckets": [0] * (len(HISTOGRAM_BOUNDS) + 1),
+        })
+        histogram["count"] += 1
+        histogram["errors"] += not ok
+        histogram["seconds"] += seconds
+        histogram["buckets"][next(
+            (i for i, bound in enumerate(HISTOGRAM_BOUNDS) if seconds <= bound), len(HISTOGRAM_BOUNDS)
+        )] += 1
+
+
+def histograms() -> dict:
+    """Latency of every model round so far, per call site (``intuition``, ``review``, ...).
+
+    Each site has ``count``, ``errors``, total ``seconds``, cumulative
+    ``buckets`` as ``{"<=0.5": n, ..., "+Inf": n}`` and ``p50``/``p95``
+    upper bounds taken from the buckets.
+    """
+    with _histograms_lock:
+        snapshot = {site: dict(h, buckets=list(h["buckets"])) for site, h in _histograms.items()}
+    result = {}
+    for site, h in snapshot.items():
+        labels = [f"<={bound:g}" for bound in HISTOGRAM_BOUNDS] + ["+Inf"]
+        cumulative, running = {}, 0
+        for label, count in zip(labels, h["buckets"]):
+            running += count
+            cumulative[label] = running
+
+        def percentile(p, h=h):
+            running = 0
+            for bound, count in zip(HISTOGRAM_BOUNDS + (float("inf"),), h["buckets"]):
+                running += count
+                if running >= p * h["count"]:
+                    return bound
+            return float("inf")
+
+        result[site] = {
+            "count": h["count"], "errors": h["errors"], "seconds": round(h["seconds"], 3),
+            "buckets": cumulative, "p50": percentile(0.5), "p95": percentile(0.95),
+        }
+    return result
+
+
+class TokenBucket:
+    """``rate`` requests per second with bursts of up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token, returning how long to wait before it may be used."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self) -> None:
+        """Give back a reserved token that will not be used."""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class ResponseMemo:
+    """Prompt-to-response files under ``root``, one JSON file per key."""
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> dict | None:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        with contextlib.suppress(OSError):
+            os.utime(self._path(key))
+        return entry
+
+    def put(self, key: str, entry: dict) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+        self._writes += 1
+        if self._writes % 50 == 1:
+            self.prune()
+
+    def prune(self) -> None:
+        """Delete the least recently used responses beyond ``max_bytes``."""
+        files = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(".json"):
+                    with contextlib.suppress(OSError):
+                        stat = os.stat(os.path.join(directory, name))
+                        files.append((stat.st_mtime, stat.st_size, os.path.join(directory, name)))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            with contextlib.suppress(OSError):
+                os.remove(path)
+            total -= size
+
+
+@contextlib.contextmanager
+def job_scope():
+    """Within the block, a prompt asked a second time bypasses the memo."""
+    token = _asked.set(set())
+    try:
+        yield
+    finally:
+        _asked.reset(token)
+
+
+class LLMClient:
+    """One model with deadlines, rate limiting, retries, memoization and latency histograms.
+
+    The async transport of a model binds to the event loop it is first used
+    on, and every job runs its candidates on a new loop. With
+    ``async_factory``, async calls therefore use a model of their own per
+    running loop; without it they share ``model``.
+    """
+
+    def __init__(self, name: str, model, bucket: TokenBucket, memo: ResponseMemo = None,
+                 async_factory=None):
+        self.name = name
+        self.model = model
+        self.bucket = bucket
+        self.memo = memo
+        self.async_factory = async_factory
+        self._loop_models = weakref.WeakKeyDictionary()
+        self._loop_models_lock = threading.Lock()
+        self.timeout = float(os.getenv("MANIM_GEN_LLM_TIMEOUT", DEFAULT_TIMEOUT))
+        self.deadline = float(os.getenv("MANIM_GEN_LLM_DEADLINE", DEFAULT_DEADLINE))
+
+    def _memo_lookup(self, key: str, label: str, mode: str):
+        if self.memo is None:
+            return None
+        asked = _asked.get()
+        repeated = False
+        if asked is not None:
+            with _asked_lock:
+                repeated = key in asked
+                asked.add(key)
+        entry = None if repeated else self.memo.get(key)
+        if not entry:
+            return None
+        response = replay.recorded_response(entry)
+        log_round(f"{label} (memo)", mode, response, 0.0)
+        return response
+
+    def _memo_store(self, key: str, response, seconds: float) -> None:
+        if self.memo is None or not getattr(response, "parts", None):
+            return
+        usage = getattr(response, "usage_metadata", None)
+        self.memo.put(key, {
+            "model": self.name,
+            "seconds": seconds,
+            "prompt_tokens": getattr(usage, "prompt_token_count", None),
+            "output_tokens": getattr(usage, "candidates_token_count", None),
+            "text": response.text,
+        })
+
+    def _async_model(self):
+        if self.async_factory is None:
+            return self.model
+        loop = asyncio.get_running_loop()
+        with self._loop_models_lock:
+            model = self._loop_models.get(loop)
+            if model is None:
+                model = self._loop_models[loop] = self.async_factory()
+        return model
+
+    def _reserve(self, label: str, started: float) -> float:
+        """Take a rate-limit token and return the wait before it may be used.
+
+        The full wait is always honoured; if it would run past the deadline
+        the token is returned and the call fails instead of going out early.
+        """
+        wait = self.bucket.reserve()
+        if time.monotonic() - started + wait >= self.deadline:
+            self.bucket.refund()
+            raise LLMError(f"{label}: the rate limit delays the request past the {self.deadline:.0f} s deadline")
+        return wait
+
+    def _attempt_timeout(self, started: float) -> float:
+        remaining = self.deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            raise LLMError(f"{self.name}: no response within the {self.deadline:.0f} s deadline")
+        return min(self.timeout, remaining)
+
+    def _settle(self, key: str, label: str, mode: str, round_started: float,
+                response=None, exception: Exception = None) -> str | None:
+        """Book one finished attempt: None if ``response`` is usable, else the error to retry on.
+
+        Errors that are not worth retrying are re-raised.
+        """
+        elapsed = time.perf_counter() - round_started
+        if exception is not None:
+            if not _retriable(exception):
+                _observe(label, elapsed, ok=False)
+                raise exception
+            error = f"{type(exception).__name__}: {exception}"
+        else:
+            error = None if getattr(response, "parts", None) else "empty response"
+        _observe(label, elapsed, ok=error is None)
+        if error is None:
+            log_round(label, mode, response, elapsed)
+            self._memo_store(key, response, elapsed)
+        return error
+
+    def _retry_delay(self, label: str, attempt: int, started: float, error: str) -> float:
+        """Backoff before the attempt after ``attempt``; ``LLMError`` once none is left."""
+        if attempt >= MAX_ATTEMPTS:
+            raise LLMError(f"{label}: no valid response after {MAX_ATTEMPTS} attempts ({error})")
+        delay = min(_backoff(attempt), max(self.deadline - (time.monotonic() - started), 0))
+        print(f"[llm] {label}: {error}; retrying in {delay:.1f}s", file=sys.stderr)
+        return delay
+
+    def generate(self, prompt: str, label: str, mode: str = "full", generation_config=None):
+        """The model's response to ``prompt``; ``label`` names the call site in logs and histograms."""
+        key = replay.prompt_key(self.name, prompt, generation_config)
+        cached = self._memo_lookup(key, label, mode)
+        if cached is not None:
+            return cached
+
+        started = time.monotonic()
+        for attempt in itertools.count(1):
+            time.sleep(self._reserve(label, started))
+            timeout = self._attempt_timeout(started)
+            round_started = time.perf_counter()
+            try:
+                response = self.model.generate_content(
+                    prompt, generation_config=generation_config, request_options={"timeout": timeout}
+                )
+            except Exception as e:
+                error = self._settle(key, label, mode, round_started, exception=e)
+            else:
+                error = self._settle(key, label, mode, round_started, response=response)
+            if error is None:
+                return response
+            time.sleep(self._retry_delay(label, attempt, started, error))
+
+    async def generate_async(self, prompt: str, label: str, mode: str = "async", generation_config=None):
+        """``generate`` for concurrent calls on an event loop."""
+        key = replay.prompt_key(self.name, prompt, generation_config)
+        cached = self._memo_lookup(key, label, mode)
+        if cached is not None:
+            return cached
+
+        model = self._async_model()
+        started = time.monotonic()
+        for attempt in itertools.count(1):
+            await asyncio.sleep(self._reserve(label, started))
+            timeout = self._attempt_timeout(started)
+            round_started = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(model.generate_content_async(
+                    prompt, generation_config=generation_config, request_options={"timeout": timeout}
+                ), timeout)
+            except Exception as e:
+                error = self._settle(key, label, mode, round_started, exception=e)
+            else:
+                error = self._settle(key, label, mode, round_started, response=response)
+            if error is None:
+                return response
+            await asyncio.sleep(self._retry_delay(label, attempt, started, error))
+
+
+_bucket = None
+
+
+def _shared_bucket() -> TokenBucket:
+    global _bucket
+    if _bucket is None:
+        rpm = float(os.getenv("MANIM_GEN_LLM_RPM", DEFAULT_RPM))
+        _bucket = TokenBucket(rpm / 60, float(os.getenv("MANIM_GEN_LLM_BURST", DEFAULT_BURST)))
+    return _bucket
+
+
+def client(name: str, factory) -> LLMClient:
+    """The process-wide client for model ``name``; ``factory(name)`` builds the live model once.
+
+    Offline and recording setups (see ``replay``) get their own clients, so
+    switching between them, as the benchmark does per item, takes effect.
+    """
+    mode = (replay.offline_mode(), os.getenv("MANIM_GEN_REPLAY"), os.getenv("MANIM_GEN_RECORD"),
+            os.getenv("MANIM_GEN_LLM_CACHE_DIR"))
+    with _clients_lock:
+        existing = _clients.get((name, mode))
+        if existing is None:
+            memo_dir = os.getenv("MANIM_GEN_LLM_CACHE_DIR")
+            memo = None
+            # A memo hit would never reach the recorder, leaving gaps in the recording
+            if memo_dir and not replay.offline_mode() and not os.getenv("MANIM_GEN_RECORD"):
+                max_bytes = int(os.getenv("MANIM_GEN_LLM_CACHE_MB", DEFAULT_CACHE_MB)) * 1024 * 1024
+                memo = ResponseMemo(memo_dir, max_bytes)
+            existing = _clients[(name, mode)] = LLMClient(
+                name, replay.new_model(name, factory), _shared_bucket(), memo,
+                async_factory=lambda: replay.new_model(name, factory),
+            )
+        return existing
+
+
+def stats() -> dict:
+    """Latency histograms plus memo hit counts, e.g. for the worker's ``llm_stats`` op."""
+    with _clients_lock:
+        memos = [c.memo for c in _clients.values() if c.memo is not None]
+    return {
+        "histograms": histograms(),
+        "memo": {"hits": sum(m.hits for m in memos), "misses": sum(m.misses for m in memos)},
+    }
+
+
+if __name__ == '__main__':
+    # Usage: MANIM_GEN_LLM_CACHE_DIR=<dir> python llm.py --prune
+    memo_dir = os.getenv("MANIM_GEN_LLM_CACHE_DIR")
+    if not memo_dir:
+        print("MANIM_GEN_LLM_CACHE_DIR is not set", file=sys.stderr)
+        sys.exit(1)
+    if "--prune" in sys.argv:
+        ResponseMemo(memo_dir, int(os.getenv("MANIM_GEN_LLM_CACHE_MB", DEFAULT_CACHE_MB)) * 1024 * 1024).prune()
+    files = [os.path.join(d, n) for d, _, names in os.walk(memo_dir) for n in names if n.endswith(".json")]
+    print(json.dumps({"responses": len(files), "bytes": sum(os.path.getsize(f) for f in files)}, indent=2))
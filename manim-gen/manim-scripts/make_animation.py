@@ -2,64 +2,272 @@
 import sys
 import os
 import re
+import json
+import tempfile
 import google.generativeai as genai
-from manim.__main__ import main as manim_main
+
+import fewshot
+import llm
+import progress
+import replay
+import stream
+from api_check import check_script, format_findings, load_index
+from cache import SCRIPT_FILE, ArtifactCache, cache_key
+from candidates import candidate_settings, generate_candidates
+from repair import PatchError, apply_unified_diff, diff_prompt, extract_diff
+
+INTUITION_MODEL = 'gemini-2.5-flash-preview-04-17'
+SCRIPT_MODEL = 'gemini-2.0-flash-exp'
+
+# Bump a prompt's version whenever its wording changes so cached artifacts
+# produced by the old prompt are not served for new requests.
+PROMPT_VERSIONS = {
+    "intuition": 1,
+    "generate": 4,
+    "review": 3,
+    "syntax_fix": 3,
+    "render_fix": 3,
+}
+
+RENDER_QUALITY = 'low_quality'
+
+_genai_configured = False
 
 
 def main():
-    # Usage: python generate_manim.py "<latex>" <out_dir>
+    # Usage: python make_animation.py "<latex>" <out_dir>
+    #        python make_animation.py --worker
+    #        python make_animation.py --render <script.py> <out_dir> <quality>
+    if len(sys.argv) == 2 and sys.argv[1] == "--worker":
+        from worker import serve
+        if os.getenv("GEMINI_API_KEY"):
+            configure_genai()
+        from tex_index import update_index
+        serve({
+            "render": lambda job, emit: run_job(job["latex"], job["out_dir"], job.get("cache_dir")),
+            # Speculative generation: fill the cache without showing anything
+            "prefetch": lambda job, emit: run_job(
+                job["latex"], job["out_dir"], job.get("cache_dir"), render=job.get("render", False)
+            ),
+            "index": lambda job, emit: update_index(job["index_path"], job["paths"], job.get("sources")),
+            "rerender": lambda job, emit: rerender(job["script"], job["out_dir"], job["quality"]),
+            "llm_stats": lambda job, emit: llm.stats(),
+        })
+        return
+
+    if len(sys.argv) == 5 and sys.argv[1] == "--render":
+        # Re-render an already validated script, e.g. the background high-quality pass
+        try:
+            result = rerender(sys.argv[2], sys.argv[3], sys.argv[4])
+        except Exception as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(result))
+        return
+
     if len(sys.argv) < 3:
-        print("Usage: generate_manim.py \"<latex>\" <out_dir>", file=sys.stderr)
+        print("Usage: make_animation.py \"<latex>\" <out_dir> | --worker | "
+              "--render <script.py> <out_dir> <quality>", file=sys.stderr)
         sys.exit(1)
 
-    latex_input = sys.argv[1]
-    out_dir     = sys.argv[2]
+    try:
+        result = run_job(sys.argv[1], sys.argv[2])
+    except Exception as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(result["video"])
 
-    # Ensure output folder exists
-    os.makedirs(out_dir, exist_ok=True)
 
-    # Configure API key
+def configure_genai():
+    """Configure the Gemini client once per process from GEMINI_API_KEY."""
+    global _genai_configured
+    if _genai_configured or replay.offline_mode():
+        return
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
-        print("ERROR: GEMINI_API_KEY not set in environment", file=sys.stderr)
-        sys.exit(1)
+        raise RuntimeError("GEMINI_API_KEY not set in environment")
     genai.configure(api_key=api_key)
+    _genai_configured = True
+
+
+def llm_client(name: str) -> llm.LLMClient:
+    """The shared client for a Gemini model, or for its offline stand-in (see ``replay.new_model``)."""
+    return llm.client(name, genai.GenerativeModel)
+
+
+def run_job(latex_input: str, out_dir: str, cache_dir: str = None, render: bool = True) -> dict:
+    """Run the full intuition → script → render pipeline.
+
+    Outputs are staged so callers can show something early: once the script
+    passes the dry run its last frame is rendered as a PNG, then the preview
+    MP4. Each stage is timed and reported through ``progress``, with an
+    ``artifact`` event for the ``"still"``, the ``"preview"`` and the final
+    ``"video"``. Returns the ``video`` path, the ``image`` path (None on
+    cache hits) and the validated ``script`` path.
+
+    With ``render=False`` the job stops once the script is generated and
+    cached, leaving ``video`` None; a later full run picks the script up.
+    """
+    # Within one job a repeated prompt is a retry, so it skips the LLM memo
+    with llm.job_scope():
+        return _run_job(latex_input, out_dir, cache_dir, render)
+
+
+def _run_job(latex_input: str, out_dir: str, cache_dir: str, render: bool) -> dict:
+    # Ensure output folder exists
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Serve previously generated artifacts for the same request
+    cache = ArtifactCache(
+        cache_dir or os.getenv("MANIM_GEN_CACHE_DIR") or os.path.join(out_dir, ".cache")
+    )
+    models = {"intuition": INTUITION_MODEL, "script": SCRIPT_MODEL}
+    offline = replay.offline_mode()
+    if offline:
+        models = {stage: f"{offline}/{name}" for stage, name in models.items()}
+    key = cache_key(latex_input, models, PROMPT_VERSIONS, RENDER_QUALITY)
+    with progress.stage("cache"):
+        cached = cache.get(key) or {}
+    if cached.get("video") or (cached.get("script") and not render):
+        if cached.get("video"):
+            progress.emit("artifact", kind="video", path=cached["video"])
+        return {
+            "video": cached.get("video"),
+            "image": None,
+            "script": os.path.join(cache.entry_dir(key), SCRIPT_FILE),
+        }
+
+    # Configure API key (a no-op once a warm worker has done it)
+    configure_genai()
 
     # Step 1: Generate intuition text
-    intuition = generate_intuition(latex_input)
+    intuition = cached.get("intuition")
+    if intuition is None:
+        with progress.stage("intuition"):
+            intuition = generate_intuition(latex_input)
+        cache.put(key, intuition=intuition)
     intuition_path = os.path.join(out_dir, "intuition.txt")
     with open(intuition_path, "w", encoding="utf-8") as f:
         f.write(intuition)
 
-    # Step 2: Draft and refine the Manim script
-    final_code = generate_manim_script(latex_input, intuition)
+    # Step 2: Draft and refine the Manim script, starting from similar scripts that rendered
+    library = fewshot.Library(fewshot.library_dir(cache.root))
+    final_code = cached.get("script")
+    if final_code is None:
+        examples = []
+        if fewshot.example_count():
+            with progress.stage("examples"):
+                examples = library.search(latex_input, intuition, fewshot.example_count())
+            progress.emit("retrieval", examples=len(examples),
+                          similarity=[example["similarity"] for example in examples])
+        with progress.stage("script"):
+            final_code = generate_manim_script(latex_input, intuition, out_dir, examples)
     script_name = "theorem_animation.py"
     script_path = os.path.join(out_dir, script_name)
     with open(script_path, "w", encoding="utf-8") as f:
         f.write(final_code)
+    if not render:
+        cache.put(key, script=final_code)
+        return {"video": None, "image": None, "script": script_path}
 
     # Step 3: Render the Manim scene with retry logic
+    # Imported lazily so cache hits don't pay for loading manim
+    import sandbox
+    from dryrun import dry_run
+    from parallel_render import render_parallel, render_workers
+    from render import RenderError, render_scene, render_still
+
+    # Generated code only ever runs in a resource-limited child process
+    limits = sandbox.limits()
     max_render_attempts = 4
     for attempt in range(1, max_render_attempts + 1):
         try:
-            render_manim(script_path, out_dir)
+            # Reject scenes that are obviously too long before running anything
+            final_code, problem = sandbox.check_budget(final_code, RENDER_QUALITY)
+            with open(script_path, "w", encoding="utf-8") as f:
+                f.write(final_code)
+            progress.emit("validation", check="budget", ok=problem is None, detail=problem)
+            if problem:
+                raise RenderError(problem)
+
+            # Catch runtime API errors headlessly before paying for a real render
+            with progress.stage("dry_run", attempt=attempt):
+                check = sandbox.run(dry_run, script_path, out_dir, RENDER_QUALITY,
+                                    timeout=limits["dry_run_seconds"])
+            progress.emit("validation", check="dry_run", ok=not check["error"], detail=check["error"])
+            if check["error"]:
+                raise RenderError(f"Dry run failed: {check['error']}")
+            sandbox.check_duration(check["duration"], RENDER_QUALITY)
+            print(
+                f"Dry run passed: {check['plays']} animations, {check['duration']:.1f}s, "
+                f"{check['mobjects']} mobjects in {check['seconds'] * 1000:.0f} ms",
+                file=sys.stderr,
+            )
+
+            # Stage 1: last frame only, so the user sees the scene within seconds
+            with progress.stage("still", attempt=attempt):
+                still = sandbox.run(render_still, script_path, out_dir, RENDER_QUALITY)
+            progress.emit("artifact", kind="still", path=still["image"])
+
+            # Stage 2: the preview-quality video
+            with progress.stage("render", attempt=attempt):
+                if render_workers() > 1:
+                    result = sandbox.run(render_parallel, script_path, out_dir, RENDER_QUALITY,
+                                         report=check)
+                else:
+                    # Each animation is streamed to the viewer as soon as it is written, and
+                    # checkpointed so a repaired script resumes after its unchanged prefix
+                    stream_dir = os.path.join(out_dir, "stream") if stream.enabled() else None
+                    result = sandbox.run(render_scene, script_path, out_dir, RENDER_QUALITY,
+                                         expected_duration=check["duration"], stream_dir=stream_dir,
+                                         checkpoint_dir=os.path.join(out_dir, "checkpoints"))
+            print(
+                f"Rendered {result['plays']} animations ({result.get('resumed_plays', 0)} from checkpoints), "
+                f"{result['frames']} frames in {result['render_seconds']:.1f}s",
+                file=sys.stderr,
+            )
+            video_path = result["video"]
+            # When every segment streamed, the player already holds the whole preview
+            streamed = result.get("stream") or {}
+            progress.emit("artifact", kind="preview", path=video_path,
+                          segments=streamed["segments"] if streamed.get("complete") else None)
             break
         except Exception as e:
             print(f"Render attempt {attempt} failed: {e}", file=sys.stderr)
+            if isinstance(e, sandbox.SandboxError):
+                progress.emit("validation", check="limits", ok=False, detail=str(e))
             if attempt < max_render_attempts:
-                # Attempt to fix the script and retry
-                fixed_code = fix_render_errors(final_code, str(e))
-                with open(script_path, "w", encoding="utf-8") as f:
-                    f.write(fixed_code)
-                final_code = fixed_code
+                # Attempt to fix the script and retry; the error says which limit was hit
+                with progress.stage("repair", attempt=attempt):
+                    final_code = fix_render_errors(final_code, str(e))
             else:
-                print("ERROR: Exceeded maximum render retries", file=sys.stderr)
-                sys.exit(1)
+                raise RuntimeError("Exceeded maximum render retries")
+
+    cache.put(key, script=final_code, video_path=video_path)
+    library.add(latex_input, intuition, final_code, attempts=attempt)
+    progress.emit("artifact", kind="video", path=video_path)
+    return {"video": video_path, "image": still["image"], "script": script_path}
+
+
+def rerender(script_path: str, out_dir: str, quality: str) -> dict:
+    """Render an already validated script at ``quality`` (e.g. the high-quality pass)."""
+    import sandbox
+    from dryrun import dry_run
+    from render import render_scene
+
+    # The dry run is cheap and gives the frame count for progress reporting
+    check = sandbox.run(dry_run, script_path, out_dir, quality,
+                        timeout=sandbox.limits()["dry_run_seconds"])
+    with progress.stage("render"):
+        result = sandbox.run(render_scene, script_path, out_dir, quality,
+                             expected_duration=None if check["error"] else check["duration"])
+    progress.emit("artifact", kind="video", path=result["video"])
+    return result
 
 
 def generate_intuition(latex: str) -> str:
     """Call Gemini to explain the intuition behind the given LaTeX theorem/formula."""
-    model = genai.GenerativeModel('gemini-2.5-flash-preview-04-17')
+    model = llm_client(INTUITION_MODEL)
     prompt = f"""
 Explain the intuition behind this theorem or formula in a way suitable for creating a visual animation.
 Focus on geometric interpretations, spatial relationships, and dynamic movements.
@@ -68,8 +276,7 @@ Return the explanation in 2–3 paragraphs.
 
 Theorem/Formula: {latex}
 """
-    response = model.generate_content(prompt)
-    return response.text.strip()
+    return model.generate(prompt, "intuition").text.strip()
 
 
 def extract_code_block(text: str) -> str:
@@ -78,15 +285,6 @@ def extract_code_block(text: str) -> str:
     return match.group(1).strip() if match else text.strip()
 
 
-def generate_with_retry(model, prompt: str, max_retries: int = 3):
-    """Generates content with retry logic on empty parts."""
-    for attempt in range(max_retries):
-        response = model.generate_content(prompt)
-        if getattr(response, 'parts', None):
-            return response
-    raise RuntimeError("Failed to generate valid response after multiple attempts")
-
-
 def fix_manim_imports(code: str) -> str:
     """Ensure a single wildcard import from manim at the top."""
     lines = code.strip().splitlines()
@@ -104,107 +302,193 @@ def check_syntax_errors(code: str) -> str or None:
         return str(e)
 
 
-def generate_manim_script(latex: str, intuition: str) -> str:
-    """Use Gemini to draft and refine a Manim CE v0.18.0 script."""
-    model = genai.GenerativeModel('gemini-2.0-flash-exp')
-    
+def repair_code(model, code: str, problem: str, label: str) -> str:
+    """Ask for a unified diff that fixes ``problem``; fall back to a full rewrite if it doesn't apply."""
+    response = model.generate(diff_prompt(problem, code), label, mode="diff")
+    diff = extract_diff(response.text)
+    if diff is None:
+        print(f"[llm] {label}: no diff in response, rewriting in full", file=sys.stderr)
+    else:
+        try:
+            patched = fix_manim_imports(apply_unified_diff(code, diff))
+            if check_syntax_errors(patched) is None:
+                return patched
+            print(f"[llm] {label}: patched script does not compile, rewriting in full", file=sys.stderr)
+        except PatchError as e:
+            print(f"[llm] {label}: patch did not apply ({e}), rewriting in full", file=sys.stderr)
+
+    rewrite_prompt = f"""
+{problem}
+Please fix the code accordingly, output only corrected code in ```python fences```.
+
+```python
+{code}
+```"""
+    response = model.generate(rewrite_prompt, label)
+    return fix_manim_imports(extract_code_block(response.text))
+
+
+def api_problems(code: str) -> str | None:
+    """Run the static manim API checker, returning its findings as text or None."""
+    findings = check_script(code)
+    return format_findings(findings) if findings else None
+
+
+def validate_script(code: str, work_dir: str, stop=None) -> str | None:
+    """Compile, API-check, budget-check and dry-run ``code``; return the first problem found or None.
+
+    Setting the ``threading.Event`` ``stop`` skips or kills the dry run.
+    """
+    import sandbox
+    from dryrun import dry_run
+    from errors import RenderError
+
+    error = check_syntax_errors(code)
+    progress.emit("validation", check="syntax", ok=error is None, detail=error)
+    if error:
+        return f"Syntax error: {error}"
+    findings = api_problems(code)
+    progress.emit("validation", check="api", ok=findings is None, detail=findings)
+    if findings:
+        return f"Static API check:\n{findings}"
+    try:
+        code, problem = sandbox.check_budget(code, RENDER_QUALITY)
+    except RenderError as e:
+        problem = str(e)
+    progress.emit("validation", check="budget", ok=problem is None, detail=problem)
+    if problem:
+        return problem
+
+    if stop is not None and stop.is_set():
+        return "Validation stopped"
+    fd, path = tempfile.mkstemp(prefix="candidate_", suffix=".py", dir=work_dir)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(code)
+    try:
+        report = sandbox.run(dry_run, path, work_dir, RENDER_QUALITY,
+                             timeout=sandbox.limits()["dry_run_seconds"], cancel=stop)
+    except sandbox.Cancelled:
+        return "Validation stopped"
+    except sandbox.SandboxError as e:
+        report = {"error": str(e)}
+    finally:
+        os.remove(path)
+    progress.emit("validation", check="dry_run", ok=not report["error"], detail=report["error"])
+    if report["error"]:
+        return f"Dry run failed: {report['error']}"
+    return None
+
+
+# Failed candidates are ranked by how far they got through validate_script
+_VALIDATION_STAGES = ("Dry run failed", "Scene budget", "Static API check", "Syntax error")
+
+
+def _closest_candidate(failures: list) -> tuple[str, str] | None:
+    scored = [(code, problem) for code, problem in failures if code]
+    if not scored:
+        return None
+    return min(scored, key=lambda item: next(
+        (rank for rank, stage in enumerate(_VALIDATION_STAGES) if item[1].startswith(stage)),
+        len(_VALIDATION_STAGES),
+    ))
+
+
+def generate_manim_script(latex: str, intuition: str, work_dir: str, examples: list = None) -> str:
+    """Use Gemini to draft and refine a Manim CE script for the installed manim version.
+
+    ``examples`` are library entries (see ``fewshot``) shown to the model in the first prompt.
+    """
+    model = llm_client(SCRIPT_MODEL)
+    version = load_index()["version"]
+
     # Initial generation prompt
     gen_prompt = f"""
-You are writing a Manim Community Edition (v0.18.0) script to animate this theorem's intuition.
+You are writing a Manim Community Edition (v{version}) script to animate this theorem's intuition.
 
-1. Import every Manim class you intend to use and print dir() for each as comments.
+1. Start with `from manim import *` and import anything else you need.
 2. Write a Scene subclass TheoremScene with construct() using self.play() and self.add().
 3. Use RGB hex colors and string-based color names.
-4. Output introspection comments followed by final code in ```python fences```.
-
+4. For tangent or secant lines, points moving along a graph, Riemann rectangles and vector fields,
+   use the precomputed helpers instead of recomputing geometry in updaters, importing them by name:
+   `from scene_helpers import sample_graph, moving_dot, tangent_line, secant_line, riemann_rectangles, vector_field`.
+   - `graph = sample_graph(axes, func, [x_min, x_max])`, then `moving_dot(graph, tracker)`,
+     `tangent_line(graph, tracker, length=2)` and `secant_line(graph, tracker_a, tracker_b)`
+     follow ValueTrackers by themselves; `graph.point(x)`, `graph.slope(x)` and `graph.angle(x)` are cheap lookups.
+   - `riemann_rectangles(axes, func, [a, b], n, sample="left")` returns a VGroup of rectangles.
+   - `vector_field(axes, lambda x, y: (vx, vy), step=0.5, scale=0.4)` is one mobject; pass
+     `tracker=t` and a `lambda x, y, t: ...` field to animate it.
+5. Output only the final code in ```python fences```.
+
+{fewshot.format_examples(examples or [])}
 Theorem: {latex}
 Intuition: {intuition}
 """
-    response = generate_with_retry(model, gen_prompt)
-    initial_code = extract_code_block(response.text)
-
-    # Review & fix prompt
-    review_prompt = f"""
-Review and fix this Manim code for syntax, imports, and API correctness.
-List dir() introspection again as comments before your fixes.
-Return only the corrected code in ```python fences```.
-
-Code to fix:
-{initial_code}
+    # Draft several candidates at once and take the first that validates
+    initial_code, candidate_problem = None, None
+    n, budget = candidate_settings()
+    if n > 1:
+        outcome = generate_candidates(
+            model,
+            gen_prompt,
+            extract=lambda text: fix_manim_imports(extract_code_block(text)),
+            validate=lambda code, stop: validate_script(code, work_dir, stop),
+            n=n,
+            budget=budget,
+        )
+        if outcome["winner"]:
+            return outcome["winner"]
+        closest = _closest_candidate(outcome["failures"])
+        if closest:
+            initial_code, candidate_problem = closest
+
+    if initial_code is None:
+        response = model.generate(gen_prompt, "generate")
+        initial_code = extract_code_block(response.text)
+
+    # Review & fix round, seeded with what the static checker already knows
+    initial_code = fix_manim_imports(initial_code)
+    findings = api_problems(initial_code)
+    review_problem = f"""
+Review this Manim v{version} code for syntax, imports, and API correctness.
+A static check against the installed manim API reported:
+{findings or "no problems"}
+{f"Validating it failed with: {candidate_problem}" if candidate_problem else ""}
 """
-    reviewed = generate_with_retry(model, review_prompt)
-    final_code = extract_code_block(reviewed.text)
-
-    # Ensure correct imports
-    final_code = fix_manim_imports(final_code)
+    final_code = repair_code(model, initial_code, review_problem, "review")
 
-    # Retry on syntax errors
+    # Retry on syntax errors and on API misuse the static checker can see
     error = check_syntax_errors(final_code)
+    findings = None if error else api_problems(final_code)
     attempts = 0
-    while error and attempts < 5:
+    while (error or findings) and attempts < 5:
         attempts += 1
-        fix_prompt = f"""
-The following syntax error occurred: {error}
-Please fix the code accordingly, output only corrected code in ```python fences```.```\n{final_code}```
-"""
-        reviewed = generate_with_retry(model, fix_prompt)
-        final_code = extract_code_block(reviewed.text)
-        final_code = fix_manim_imports(final_code)
+        problem = f"The following syntax error occurred: {error}" if error else (
+            f"A static check against the manim v{version} API reported:\n{findings}"
+        )
+        final_code = repair_code(model, final_code, problem, "syntax_fix")
         error = check_syntax_errors(final_code)
+        findings = None if error else api_problems(final_code)
 
     if error:
         raise RuntimeError(f"Unresolved syntax errors after retries: {error}")
-    
+    # Remaining static findings may be false positives; the dry run has the final say.
+    if findings:
+        print(f"Unresolved API check findings:\n{findings}", file=sys.stderr)
+
     return final_code
 
 
 def fix_render_errors(code: str, error_msg: str) -> str:
     """Use Gemini to fix Manim script after a rendering failure."""
-    model = genai.GenerativeModel('gemini-2.0-flash-exp')
-    prompt = f"""
+    model = llm_client(SCRIPT_MODEL)
+    problem = f"""
 The following error occurred during Manim rendering: {error_msg}
+A static check against the installed manim v{load_index()["version"]} API reported:
+{api_problems(code) or "no problems"}
 Please fix the Manim Community Edition script so that it renders correctly.
-Return only the corrected code in ```python fences```.
+"""
+    return repair_code(model, code, problem, "render_fix")
 
-Original code:
-```python
-{code}
-```"""
-    response = generate_with_retry(model, prompt)
-    new_code = extract_code_block(response.text)
-    return fix_manim_imports(new_code)
-
-
-def render_manim(script_path: str, out_dir: str) -> str:
-    """Render the generated Manim script into an MP4 using the Manim CLI programmatically and return its filepath."""
-    # Backup sys.argv and set new args for Manim
-    original_argv = sys.argv.copy()
-    sys.argv = [
-        'manim', '-ql',
-        '-o', out_dir,
-        script_path,
-        'TheoremScene'
-    ]
-    try:
-        manim_main()
-    except Exception as e:
-        raise RuntimeError(f"Manim rendering failed: {e}")
-    finally:
-        sys.argv = original_argv
-
-    # Build expected output path
-    base = os.path.splitext(os.path.basename(script_path))[0]
-    video_path = os.path.join(
-        out_dir,
-        'media',
-        'videos',
-        base,
-        '480p15',
-        f"{base}.mp4"
-    )
-    if not os.path.exists(video_path):
-        raise FileNotFoundError(f"Rendered video not found at {video_path}")
-    return video_path
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,165 @@
+"""Parallel segment rendering of a scene across CPU cores.
+
+Manim already writes one partial movie file per ``play``/``wait`` and then
+concatenates them. This module splits the scene at those animation boundaries:
+each worker process replays the scene up to its segment's first animation with
+rendering skipped (manim's ``from_animation_number``), rasterizes only its own
+animations and stops early after the last one (``upto_animation_number``). The
+parent joins every partial movie in order with ffmpeg's concat demuxer without
+re-encoding, as manim's own sequential combine step does.
+
+The output is not byte-identical to a sequential render: the container's
+metadata (timestamps, muxer details) differs. For deterministic scenes the
+decoded frames are identical, which ``tests/test_parallel_render.py`` and
+``benchmarks/bench_parallel_render.py`` check with ffmpeg's ``framemd5``.
+Scenes driven by unseeded randomness or wall-clock time can differ.
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from manim import config, tempconfig
+
+import glyph_cache
+from dryrun import dry_run
+from progress import FrameCounter
+from render import DEFAULT_SCENE, RenderError, render_scene, scene_config
+
+
+def render_workers() -> int:
+    """Configured number of render processes (MANIM_GEN_RENDER_WORKERS, default 1)."""
+    return max(int(os.getenv("MANIM_GEN_RENDER_WORKERS", "1")), 1)
+
+
+def plan_segments(play_durations: list[float], workers: int) -> list[tuple[int, int]]:
+    """Split animations into at most ``workers`` contiguous, duration-balanced ranges.
+
+    Ranges are inclusive ``(first, last)`` animation indices.
+    """
+    count = len(play_durations)
+    workers = max(min(workers, count), 1)
+    total = sum(play_durations) or count
+    target = total / workers
+
+    segments, start, acc = [], 0, 0.0
+    for i, duration in enumerate(play_durations):
+        acc += duration or (total / count)
+        remaining_plays = count - i - 1
+        remaining_segments = workers - len(segments) - 1
+        if remaining_segments and (acc >= target or remaining_plays == remaining_segments):
+            segments.append((start, i))
+            start, acc = i + 1, 0.0
+    segments.append((start, count - 1))
+    return segments
+
+
+def _render_segment(script_path: str, out_dir: str, quality: str, scene_name: str,
+                    index: int, first: int, last: int, is_last: bool) -> list[str]:
+    """Worker entry point: render animations ``first..last`` and return their partial movies."""
+    shared_media = os.path.join(out_dir, "media")
+    overrides = {
+        # Each segment gets its own media dir so their combined movies don't collide,
+        # but Tex/Text caches are shared (the dry run has already filled them).
+        "media_dir": os.path.join(shared_media, "segments", f"{index:03d}"),
+        "from_animation_number": first,
+    }
+    if not glyph_cache.glyph_dir():
+        overrides.update(tex_dir=os.path.join(shared_media, "Tex"),
+                         text_dir=os.path.join(shared_media, "texts"))
+    if not is_last:
+        overrides["upto_animation_number"] = last
+    result = render_scene(script_path, out_dir, quality, scene_name, overrides,
+                          keep_partial_movies=True)
+    return result["partial_movie_files"]
+
+
+def concat_movies(paths: list[str], output_path: str, ffmpeg: str = "ffmpeg") -> None:
+    """Join movie files with ffmpeg's concat demuxer, copying streams without re-encoding."""
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    fd, list_path = tempfile.mkstemp(prefix="concat_", suffix=".txt",
+                                     dir=os.path.dirname(output_path))
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for path in paths:
+            escaped = Path(path).as_posix().replace("'", r"'\''")
+            f.write(f"file '{escaped}'\n")
+    try:
+        subprocess.run(
+            [
+                ffmpeg, "-y", "-loglevel", "error", "-nostdin",
+                "-f", "concat", "-safe", "0", "-i", list_path,
+                "-c", "copy", output_path,
+            ],
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        raise RenderError(f"ffmpeg concat failed: {e}") from e
+    finally:
+        os.remove(list_path)
+
+
+def render_parallel(script_path: str, out_dir: str, quality: str = "low_quality",
+                    scene_name: str = DEFAULT_SCENE, workers: int = None,
+                    report: dict = None) -> dict:
+    """Render ``scene_name`` with animation segments spread over a process pool.
+
+    ``report`` is a passing ``dry_run`` report for the script, if the caller
+    already has one. Returns the same shape as ``render_scene``. Falls back to
+    a sequential render when there is only one worker or fewer than two
+    animations.
+    """
+    workers = workers or render_workers()
+    started = time.perf_counter()
+
+    # The dry run gives per-animation durations for balancing and warms the Tex cache
+    if report is None:
+        report = dry_run(script_path, out_dir, quality, scene_name)
+    if report["error"]:
+        raise RenderError(f"Dry run failed: {report['error']}")
+    if workers < 2 or report["plays"] < 2:
+        return render_scene(script_path, out_dir, quality, scene_name,
+                            expected_duration=report["duration"])
+
+    with tempconfig(scene_config(script_path, out_dir, quality)):
+        video_dir = config.get_dir("video_dir", module_name=Path(script_path).stem)
+        frame_rate = config.frame_rate
+        resolution = [config.pixel_width, config.pixel_height]
+        ffmpeg = config.ffmpeg_executable
+
+    # Progress is reported per finished segment; the workers themselves stay quiet
+    durations = report["play_durations"]
+    segments = plan_segments(durations, workers)
+    counter = FrameCounter(round(report["duration"] * frame_rate), interval=0)
+    with ProcessPoolExecutor(max_workers=len(segments)) as pool:
+        futures = {
+            pool.submit(
+                _render_segment, script_path, out_dir, quality, scene_name,
+                index, first, last, index == len(segments) - 1,
+            ): (first, last)
+            for index, (first, last) in enumerate(segments)
+        }
+        for future in as_completed(futures):
+            future.result()  # Fail fast if a segment raised
+            first, last = futures[future]
+            counter.add(round(sum(durations[first:last + 1]) * frame_rate))
+        partial_movies = [path for future in futures for path in future.result()]
+
+    video_path = os.path.join(str(video_dir), f"{scene_name}.mp4")
+    concat_movies(partial_movies, video_path, ffmpeg)
+    # The segments' partial and combined movies are all in the joined video now
+    shutil.rmtree(os.path.join(out_dir, "media", "segments"), ignore_errors=True)
+
+    return {
+        "video": video_path,
+        "image": None,
+        "plays": report["plays"],
+        "duration": report["duration"],
+        "frame_rate": frame_rate,
+        "frames": round(report["duration"] * frame_rate),
+        "resolution": resolution,
+        "segments": segments,
+        "render_seconds": time.perf_counter() - started,
+    }
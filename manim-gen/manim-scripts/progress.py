@@ -0,0 +1,133 @@
+"""Structured progress events, written as JSON lines to a dedicated stream.
+
+The extension opens an extra pipe for the Python process and passes its file
+descriptor in ``MANIM_GEN_EVENTS_FD``; every event goes there, one JSON object
+per line, so stdout and stderr stay free for results and logs. In-process
+consumers (benchmarks, tests) can subscribe with ``add_listener``.
+
+Event types:
+
+* ``stage_start`` / ``stage_end`` - ``stage``, and on end ``seconds``, ``ok``
+  and ``error`` if it failed
+* ``llm_call`` - ``label``, ``mode``, ``seconds``, ``prompt_tokens``,
+  ``output_tokens``
+* ``validation`` - ``check`` (``syntax``/``api``/``budget``/``dry_run``/``limits``),
+  ``ok``, ``detail``
+* ``retrieval`` - ``examples`` (few-shot scripts found), ``similarity`` of each
+* ``render_progress`` - ``frames_done``, ``frames_total``
+* ``artifact`` - ``kind`` (``still``/``segment``/``preview``/``video``), ``path``;
+  segments also carry ``index``, ``duration`` and ``mime`` (see ``stream``)
+
+Every event carries ``event``, a wall-clock ``t`` and, inside ``job_context``,
+the ``job`` id it belongs to. A sandboxed child process (see ``sandbox``) hands
+its events to the parent with ``relay``, which republishes them with ``publish``.
+"""
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+
+_job = contextvars.ContextVar("job", default=None)
+_listeners = []
+_lock = threading.Lock()
+_stream = None
+_stream_resolved = False
+_relay = None
+
+
+def _event_stream():
+    global _stream, _stream_resolved
+    if not _stream_resolved:
+        _stream_resolved = True
+        fd = os.getenv("MANIM_GEN_EVENTS_FD")
+        if fd:
+            try:
+                _stream = os.fdopen(int(fd), "w", encoding="utf-8", buffering=1)
+            except (OSError, ValueError):
+                _stream = None
+    return _stream
+
+
+def emit(event: str, **fields) -> None:
+    """Publish one event to the events stream and to in-process listeners."""
+    record = {"event": event, "t": time.time(), **fields}
+    job = _job.get()
+    if job is not None:
+        record.setdefault("job", job)
+    if _relay is not None:
+        _relay(record)
+        return
+    publish(record)
+
+
+def publish(record: dict) -> None:
+    """Write an already built event record to the stream and listeners."""
+    with _lock:
+        stream = _event_stream()
+        if stream is not None:
+            try:
+                stream.write(json.dumps(record) + "\n")
+            except (OSError, ValueError):
+                pass  # The reader went away; progress is best-effort
+        listeners = list(_listeners)
+    for listener in listeners:
+        listener(record)
+
+
+def relay(send) -> None:
+    """Hand every event of this process to ``send`` instead of publishing it."""
+    global _relay
+    _relay = send
+
+
+def add_listener(listener) -> None:
+    with _lock:
+        _listeners.append(listener)
+
+
+def remove_listener(listener) -> None:
+    with _lock:
+        _listeners.remove(listener)
+
+
+@contextlib.contextmanager
+def job_context(job_id):
+    """Tag every event emitted inside the block with ``job_id``."""
+    token = _job.set(job_id)
+    try:
+        yield
+    finally:
+        _job.reset(token)
+
+
+@contextlib.contextmanager
+def stage(name: str, **fields):
+    """Emit ``stage_start``/``stage_end`` around the block, timing it."""
+    emit("stage_start", stage=name, **fields)
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        emit("stage_end", stage=name, ok=False, seconds=time.perf_counter() - started,
+             error=str(e), **fields)
+        raise
+    emit("stage_end", stage=name, ok=True, seconds=time.perf_counter() - started, **fields)
+
+
+class FrameCounter:
+    """Throttled ``render_progress`` reporting for a render of known length."""
+
+    def __init__(self, frames_total: int, interval: float = 0.25):
+        self.frames_total = frames_total
+        self.frames_done = 0
+        self.interval = interval
+        self._last = 0.0
+
+    def add(self, frames: int) -> None:
+        self.frames_done += frames
+        now = time.perf_counter()
+        if now - self._last >= self.interval or self.frames_done >= self.frames_total:
+            self._last = now
+            emit("render_progress", frames_done=self.frames_done, frames_total=self.frames_total)
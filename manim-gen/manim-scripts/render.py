@@ -0,0 +1,270 @@
+"""In-process rendering of generated Manim scenes.
+
+``render_scene`` replaces driving the ``manim`` CLI through ``sys.argv``: it
+loads the generated module, renders its scene under a scoped ``tempconfig``
+and reports exactly where the video landed. Every call restores manim's global
+config and drops the generated module afterwards, so one warm process can
+render many scenes back to back.
+"""
+import importlib.util
+import inspect
+import os
+import shutil
+import sys
+import time
+import uuid
+
+from manim import config, tempconfig
+from manim.renderer.cairo_renderer import CairoRenderer
+
+import glyph_cache
+from checkpoint import CheckpointMismatch, Checkpoints, animation_digest, script_lines, state_digest
+from errors import RenderError
+from progress import FrameCounter
+from stream import SegmentStream
+
+DEFAULT_SCENE = "TheoremScene"
+
+
+def load_scene_class(script_path: str, scene_name: str = DEFAULT_SCENE):
+    """Import ``script_path`` under a throwaway module name and return ``scene_name``.
+
+    The module is removed from ``sys.modules`` again before returning; the
+    returned class keeps its globals alive for as long as it is needed.
+    """
+    module_name = f"_manim_gen_scene_{uuid.uuid4().hex}"
+    spec = importlib.util.spec_from_file_location(module_name, script_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException as e:
+        if isinstance(e, KeyboardInterrupt):
+            raise
+        raise RenderError(f"Failed to import {os.path.basename(script_path)}: {e!r}") from e
+    finally:
+        sys.modules.pop(module_name, None)
+
+    scene_cls = getattr(module, scene_name, None)
+    if scene_cls is None:
+        raise RenderError(f"{os.path.basename(script_path)} does not define {scene_name}")
+    return scene_cls
+
+
+def scene_camera_class(scene_cls):
+    """The camera class ``scene_cls`` would construct its own renderer with.
+
+    Scenes pick their camera through a ``camera_class`` default on
+    ``__init__`` (``MovingCameraScene``, ``ThreeDScene``, ...); a renderer
+    passed in from outside has to use the same one.
+    """
+    for klass in scene_cls.__mro__:
+        init = vars(klass).get("__init__")
+        if init is None:
+            continue
+        param = inspect.signature(init).parameters.get("camera_class")
+        if param is not None and param.default is not param.empty:
+            return param.default
+    return None
+
+
+class ProgressRenderer(CairoRenderer):
+    """CairoRenderer that reports ``render_progress`` events as frames are written.
+
+    With a ``stream`` (see ``stream.SegmentStream``) every finished partial
+    movie is also handed over for streaming playback. With ``checkpoints``
+    (see ``checkpoint``) the reusable prefix is replayed without drawing and
+    every animation rendered after it is checkpointed.
+    """
+
+    def __init__(self, frames_total: int = None, stream=None, checkpoints: Checkpoints = None, **kwargs):
+        super().__init__(**kwargs)
+        self.counter = FrameCounter(frames_total) if frames_total is not None else None
+        self.stream = stream
+        self.checkpoints = checkpoints
+
+    def add_frame(self, frame, num_frames=1):
+        super().add_frame(frame, num_frames)
+        if self.counter and not self.skip_animations:
+            self.counter.add(num_frames)
+        if self.stream:
+            self.stream.collect()
+
+    def play(self, scene, *args, **kwargs):
+        started = self.time
+        checkpoints = self.checkpoints
+        if checkpoints and self.num_plays < len(checkpoints.resume):
+            self._resume_play(scene, checkpoints.resume[self.num_plays], *args, **kwargs)
+            checkpoints = None
+        elif checkpoints:
+            lines = script_lines(checkpoints.script_path, sys._getframe(1))
+            before = state_digest(scene, self.camera)
+            super().play(scene, *args, **kwargs)
+        else:
+            super().play(scene, *args, **kwargs)
+        # Also set for plays served from manim's own cache; None for skipped ones
+        partial_movie = self.file_writer.partial_movie_files[-1] if self.file_writer.partial_movie_files else None
+        if checkpoints and partial_movie:
+            checkpoints.record(self.num_plays - 1, lines, before, animation_digest(scene), state_digest(scene, self.camera),
+                               self.time - started, str(partial_movie))
+        if self.stream and partial_movie:
+            self.stream.add(str(partial_movie), self.time - started)
+
+    def _resume_play(self, scene, checkpoint: dict, *args, **kwargs):
+        """Step through a checkpointed animation without drawing and reuse its partial movie."""
+        self.checkpoints.expect(checkpoint, "before", state_digest(scene, self.camera))
+        self.skip_animations = True
+        scene.compile_animation_data(*args, **kwargs)
+        self.checkpoints.expect(checkpoint, "animation", animation_digest(scene))
+        self.time += scene.duration
+        movie = self.checkpoints.movie_path(checkpoint)
+        self.file_writer.partial_movie_files.append(movie)
+        self.file_writer.sections[-1].partial_movie_files.append(movie)
+        self.animations_hashes.append(None)
+        scene.begin_animations()
+        if not scene.is_current_animation_frozen_frame():
+            scene.play_internal(skip_rendering=True)
+        self.num_plays += 1
+        self.skip_animations = self._original_skipping_status
+        self.checkpoints.expect(checkpoint, "after", state_digest(scene, self.camera))
+        if self.counter:
+            self.counter.add(round(scene.duration * config.frame_rate))
+
+
+def scene_config(script_path: str, out_dir: str, quality: str, overrides: dict = None) -> dict:
+    """Build the manim config used for rendering ``script_path`` into ``out_dir``.
+
+    With the shared glyph cache enabled (see ``glyph_cache``) Tex and Text
+    SVGs come from there instead of the job's media dir.
+    """
+    glyph_cache.install()
+    options = {
+        "quality": quality,
+        "media_dir": os.path.join(out_dir, "media"),
+        "input_file": script_path,
+        "write_to_movie": True,
+        "save_last_frame": False,
+        "progress_bar": "none",
+        "verbosity": "WARNING",
+        **glyph_cache.config_overrides(),
+    }
+    options.update(overrides or {})
+    return options
+
+
+def render_scene(script_path: str, out_dir: str, quality: str = "low_quality",
+                 scene_name: str = DEFAULT_SCENE, config_overrides: dict = None,
+                 expected_duration: float = None, keep_partial_movies: bool = False,
+                 stream_dir: str = None, checkpoint_dir: str = None) -> dict:
+    """Render ``scene_name`` from ``script_path`` and describe the result.
+
+    With ``expected_duration`` (from a dry run) the render reports
+    ``render_progress`` events against the frame count it implies. Manim's
+    per-animation partial movies are deleted once the video is muxed unless
+    ``keep_partial_movies`` is set, which also lists them in the result. With
+    ``stream_dir`` each animation is published there as a fragmented MP4
+    segment as soon as it is written (see ``stream``), and the result's
+    ``stream`` says how many were and whether they cover the whole scene. With ``checkpoint_dir``
+    every animation is checkpointed there and a re-render of an edited script
+    resumes after the unchanged prefix (see ``checkpoint``). Returns a dict
+    with the exact ``video`` path (or ``image`` path when rendering only the
+    last frame) and frame statistics. Any failure, including the
+    ``SystemExit`` manim raises on some errors, surfaces as ``RenderError``.
+    """
+    scene_cls = load_scene_class(script_path, scene_name)
+    started = time.perf_counter()
+
+    with tempconfig(scene_config(script_path, out_dir, quality, config_overrides)):
+        checkpoints = None
+        if checkpoint_dir and config.write_to_movie and not config.save_last_frame:
+            checkpoints = Checkpoints(checkpoint_dir, script_path, {
+                "resolution": [config.pixel_width, config.pixel_height],
+                "frame_rate": config.frame_rate,
+                "background": str(config.background_color),
+                "transparent": config.transparent,
+                "extension": config.movie_file_extension,
+            })
+        resumed = len(checkpoints.resume) if checkpoints else 0
+        if resumed:
+            print(f"[checkpoint] resuming after animation {resumed - 1}", file=sys.stderr)
+
+        streamed = {}
+
+        def render_once():
+            segments = None
+            if stream_dir and config.movie_file_extension == ".mp4" and not config.transparent:
+                segments = SegmentStream(stream_dir, config.ffmpeg_executable)
+            if expected_duration is None and segments is None and checkpoints is None:
+                scene = scene_cls()
+            else:
+                scene = scene_cls(renderer=ProgressRenderer(
+                    None if expected_duration is None else round(expected_duration * config.frame_rate),
+                    stream=segments,
+                    checkpoints=checkpoints,
+                    camera_class=scene_camera_class(scene_cls),
+                ))
+            scene.render()
+            if segments:
+                streamed.update(segments.finish())
+            return scene
+
+        try:
+            try:
+                scene = render_once()
+            except CheckpointMismatch as e:
+                print(f"[checkpoint] {e}; rendering from the start", file=sys.stderr)
+                checkpoints.discard()
+                resumed = 0
+                scene = render_once()
+        except BaseException as e:
+            if isinstance(e, KeyboardInterrupt):
+                raise
+            raise RenderError(f"Manim rendering failed: {e!r}") from e
+
+        file_writer = scene.renderer.file_writer
+        result = {
+            "video": None,
+            "image": None,
+            "plays": scene.renderer.num_plays,
+            "duration": scene.renderer.time,
+            "frame_rate": config.frame_rate,
+            "frames": round(scene.renderer.time * config.frame_rate),
+            "resolution": [config.pixel_width, config.pixel_height],
+            "render_seconds": time.perf_counter() - started,
+            "resumed_plays": resumed,
+            "stream": streamed or None,
+        }
+        if config.write_to_movie and not config.save_last_frame:
+            result["video"] = str(file_writer.movie_file_path)
+            # Skipped animations (see from_animation_number) leave None entries
+            partial_movies = [str(path) for path in file_writer.partial_movie_files if path]
+            if keep_partial_movies:
+                result["partial_movie_files"] = partial_movies
+            else:
+                for partial_dir in {os.path.dirname(path) for path in partial_movies}:
+                    shutil.rmtree(partial_dir, ignore_errors=True)
+            if checkpoints:
+                checkpoints.remove()
+        if config.save_last_frame:
+            result["image"] = str(file_writer.image_file_path)
+
+    for key in ("video", "image"):
+        if result[key] and not os.path.exists(result[key]):
+            raise RenderError(f"Rendered output not found at {result[key]}")
+    return result
+
+
+def render_still(script_path: str, out_dir: str, quality: str = "low_quality",
+                 scene_name: str = DEFAULT_SCENE) -> dict:
+    """Render only the scene's last frame as a PNG (the CLI's ``-s``).
+
+    The image is written next to the videos as ``<module>.png``, the path
+    ``display_image.py`` looks for.
+    """
+    module_name = os.path.splitext(os.path.basename(script_path))[0]
+    return render_scene(script_path, out_dir, quality, scene_name, {
+        "save_last_frame": True,
+        "write_to_movie": False,
+        "images_dir": "{media_dir}/videos/{module_name}/{quality}",
+        "output_file": module_name,
+    })
@@ -0,0 +1,130 @@
+"""Diff-based repair helpers: ask the model for a patch instead of a full rewrite.
+
+Output tokens dominate LLM latency, and a fix round usually touches a few
+lines. The model sees the script with line numbers and answers with a unified
+diff, which is applied locally. Callers fall back to a full rewrite when the
+patch is missing, malformed or doesn't apply.
+"""
+import re
+import sys
+import time
+
+import progress
+
+_HUNK_HEADER = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+_LINE_NUMBER_PREFIX = re.compile(r'^\s*\d+ \| ?')
+
+
+class PatchError(ValueError):
+    """Raised when a diff cannot be parsed or applied to the script."""
+
+
+def number_lines(code: str) -> str:
+    """Prefix each line with its 1-based number so the model can address hunks."""
+    lines = code.splitlines()
+    width = len(str(len(lines)))
+    return "\n".join(f"{i:>{width}} | {line}" for i, line in enumerate(lines, 1))
+
+
+def diff_prompt(problem: str, code: str) -> str:
+    """Prompt asking for a unified diff that fixes ``problem`` in ``code``."""
+    return f"""
+{problem}
+
+Fix the script below. Reply with ONLY a unified diff against it inside a ```diff fence:
+- use hunk headers `@@ -<start>,<count> +<start>,<count> @@` with the line numbers shown
+- keep 2 lines of unchanged context around each change
+- do not repeat unchanged parts of the script and do not include the line-number prefixes
+If nothing needs to change, reply with an empty ```diff fence.
+
+```python
+{number_lines(code)}
+```
+"""
+
+
+def extract_diff(text: str) -> str | None:
+    """Return the body of the first ```diff fence, or None if there is none."""
+    match = re.search(r'```diff[^\n]*\n(.*?)```', text, re.DOTALL)
+    return match.group(1) if match else None
+
+
+def _parse_hunks(diff: str) -> list[tuple[int, list[str], list[str]]]:
+    hunks = []
+    current = None
+    for raw in diff.splitlines():
+        if raw.startswith(("---", "+++")) and current is None:
+            continue
+        header = _HUNK_HEADER.match(raw)
+        if header:
+            current = (int(header.group(1)), [], [])
+            hunks.append(current)
+            continue
+        if current is None:
+            if raw.strip():
+                raise PatchError(f"Diff line outside of a hunk: {raw!r}")
+            continue
+        if raw.startswith("\\"):
+            continue  # "\ No newline at end of file"
+        tag, body = (raw[0], raw[1:]) if raw else (" ", "")
+        body = _LINE_NUMBER_PREFIX.sub("", body, count=1)
+        if tag == " ":
+            current[1].append(body)
+            current[2].append(body)
+        elif tag == "-":
+            current[1].append(body)
+        elif tag == "+":
+            current[2].append(body)
+        else:
+            raise PatchError(f"Unexpected diff line: {raw!r}")
+    return hunks
+
+
+def _find_block(lines: list[str], block: list[str], hint: int) -> int:
+    """Index where ``block`` occurs in ``lines``, preferring the one nearest ``hint``."""
+    wanted = [line.rstrip() for line in block]
+    stripped = [line.rstrip() for line in lines]
+    size = len(wanted)
+    candidates = range(0, len(lines) - size + 1)
+    for start in sorted(candidates, key=lambda i: abs(i - hint)):
+        if stripped[start:start + size] == wanted:
+            return start
+    raise PatchError("Hunk context does not match the script:\n" + "\n".join(block))
+
+
+def apply_unified_diff(code: str, diff: str) -> str:
+    """Apply ``diff`` to ``code``, tolerating shifted line numbers and trailing whitespace."""
+    hunks = _parse_hunks(diff)
+    lines = code.splitlines()
+    offset = 0
+    for start, old, new in hunks:
+        hint = max(start - 1 + offset, 0)
+        if old:
+            position = _find_block(lines, old, hint)
+        else:
+            position = min(hint, len(lines))
+        lines[position:position + len(old)] = new
+        offset += len(new) - len(old)
+    return "\n".join(lines) + "\n"
+
+
+def log_round(label: str, mode: str, response, elapsed: float) -> None:
+    """Log token counts and wall time of one LLM round to stderr and the events stream."""
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", None)
+    output_tokens = getattr(usage, "candidates_token_count", None)
+    print(
+        f"[llm] {label} ({mode}): {prompt_tokens} prompt / {output_tokens} output tokens, "
+        f"{elapsed:.2f}s",
+        file=sys.stderr,
+    )
+    progress.emit("llm_call", label=label, mode=mode, seconds=elapsed,
+                  prompt_tokens=prompt_tokens, output_tokens=output_tokens)
+
+
+def timed(generate, prompt: str, label: str, mode: str):
+    """Call ``generate(prompt)`` and log the round; returns the response."""
+    started = time.perf_counter()
+    response = generate(prompt)
+    log_round(label, mode, response, time.perf_counter() - started)
+    return response
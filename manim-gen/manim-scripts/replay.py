@@ -0,0 +1,183 @@
+"""Record/replay stand-ins for ``genai.GenerativeModel``.
+
+``MANIM_GEN_RECORD=<file.jsonl>`` wraps the live model and appends every
+response to the file. ``MANIM_GEN_REPLAY=<file.jsonl>`` answers from such a
+recording without network access, so a pipeline run can be repeated offline
+with the exact responses of a real one; set ``MANIM_GEN_REPLAY_LATENCY=1`` to
+also sleep for each call's recorded duration.
+
+Responses are matched by model, prompt and generation config. Prompts that
+embed run-specific text (temp paths in error messages) won't match exactly;
+those take the oldest unused response recorded for the same model and
+generation config, which keeps sequential repair rounds in order while
+keeping concurrent candidates apart.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+
+_recordings = {}
+_recordings_lock = threading.Lock()
+
+
+class ReplayMiss(LookupError):
+    """Raised when a replayed run asks for a response that was never recorded."""
+
+
+def offline_mode() -> str | None:
+    """``"replay"`` or ``"fake"`` when model calls are served offline, else None."""
+    if os.getenv("MANIM_GEN_REPLAY"):
+        return "replay"
+    if os.getenv("MANIM_GEN_FAKE_MODEL"):
+        return "fake"
+    return None
+
+
+def new_model(name: str, factory):
+    """The model to use for ``name``: replayed, fake, recorded or live (``factory(name)``)."""
+    mode = offline_mode()
+    if mode == "replay":
+        return ReplayModel(name, os.environ["MANIM_GEN_REPLAY"])
+    if mode == "fake":
+        from fake_model import FakeGenerativeModel
+        return FakeGenerativeModel(name)
+    model = factory(name)
+    if os.getenv("MANIM_GEN_RECORD"):
+        return RecordingModel(model, name, os.environ["MANIM_GEN_RECORD"])
+    return model
+
+
+def _config_key(generation_config) -> str:
+    return json.dumps(generation_config, sort_keys=True, default=str)
+
+
+def prompt_key(model_name: str, prompt: str, generation_config) -> str:
+    """Stable hash of everything that determines a response (also keys ``llm``'s memo)."""
+    payload = json.dumps([model_name, prompt, _config_key(generation_config)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RecordingModel:
+    """Wraps a live model and appends each response to a JSON-lines recording."""
+
+    def __init__(self, model, model_name: str, path: str):
+        self.model = model
+        self.model_name = model_name
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _record(self, prompt, generation_config, response, seconds: float) -> None:
+        usage = getattr(response, "usage_metadata", None)
+        entry = {
+            "model": self.model_name,
+            "key": prompt_key(self.model_name, prompt, generation_config),
+            "config": _config_key(generation_config),
+            "seconds": seconds,
+            "prompt_tokens": getattr(usage, "prompt_token_count", None),
+            "output_tokens": getattr(usage, "candidates_token_count", None),
+            "text": response.text if getattr(response, "parts", None) else "",
+        }
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def generate_content(self, prompt, generation_config=None, **kwargs):
+        started = time.perf_counter()
+        response = self.model.generate_content(prompt, generation_config=generation_config, **kwargs)
+        self._record(prompt, generation_config, response, time.perf_counter() - started)
+        return response
+
+    async def generate_content_async(self, prompt, generation_config=None, **kwargs):
+        started = time.perf_counter()
+        response = await self.model.generate_content_async(
+            prompt, generation_config=generation_config, **kwargs
+        )
+        self._record(prompt, generation_config, response, time.perf_counter() - started)
+        return response
+
+
+class Recording:
+    """A loaded recording; each entry is handed out at most once."""
+
+    def __init__(self, path: str):
+        with open(path, encoding="utf-8") as f:
+            self.entries = [json.loads(line) for line in f if line.strip()]
+        self.used = set()
+        self.exact = 0
+        self.fallbacks = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._by_key = defaultdict(list)
+        for i, entry in enumerate(self.entries):
+            self._by_key[entry["key"]].append(i)
+
+    def take(self, model_name: str, prompt: str, generation_config) -> dict:
+        key = prompt_key(model_name, prompt, generation_config)
+        config = _config_key(generation_config)
+        with self._lock:
+            for i in self._by_key.get(key, ()):
+                if i not in self.used:
+                    self.used.add(i)
+                    self.exact += 1
+                    return self.entries[i]
+            for i, entry in enumerate(self.entries):
+                if i not in self.used and entry["model"] == model_name and entry["config"] == config:
+                    self.used.add(i)
+                    self.fallbacks += 1
+                    return entry
+            self.misses += 1
+        raise ReplayMiss(f"No recorded {model_name} response left for this prompt")
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "exact": self.exact,
+            "fallbacks": self.fallbacks,
+            "misses": self.misses,
+        }
+
+
+def load_recording(path: str, fresh: bool = False) -> Recording:
+    """The shared ``Recording`` for ``path``; ``fresh`` starts a new replay of it."""
+    with _recordings_lock:
+        if fresh or path not in _recordings:
+            _recordings[path] = Recording(path)
+        return _recordings[path]
+
+
+def recorded_response(entry: dict):
+    """A response object shaped like Gemini's from a stored ``text`` and token counts."""
+    return SimpleNamespace(
+        text=entry["text"],
+        parts=[entry["text"]] if entry["text"] else [],
+        usage_metadata=SimpleNamespace(
+            prompt_token_count=entry["prompt_tokens"],
+            candidates_token_count=entry["output_tokens"],
+        ),
+    )
+
+
+class ReplayModel:
+    """Drop-in for ``genai.GenerativeModel`` that answers from a recording."""
+
+    def __init__(self, model_name: str, path: str):
+        self.model_name = model_name
+        self.recording = load_recording(path)
+        self.latency = os.getenv("MANIM_GEN_REPLAY_LATENCY") == "1"
+
+    def generate_content(self, prompt, generation_config=None, **kwargs):
+        entry = self.recording.take(self.model_name, prompt, generation_config)
+        if self.latency:
+            time.sleep(entry["seconds"])
+        return recorded_response(entry)
+
+    async def generate_content_async(self, prompt, generation_config=None, **kwargs):
+        entry = self.recording.take(self.model_name, prompt, generation_config)
+        if self.latency:
+            await asyncio.sleep(entry["seconds"])
+        return recorded_response(entry)
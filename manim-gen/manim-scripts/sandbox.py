@@ -0,0 +1,491 @@
+#!/usr/bin/env python
+"""Resource-limited execution of generated scene code.
+
+Generated scripts are imported and run by manim, so a ``while`` loop, a
+``run_time=600`` or a million-point mobject used to tie up the pipeline
+process. ``run`` executes a dry run or render in a forked child (manim stays
+warm) with rlimits on CPU time, address space and written file size, plus a
+wall-clock timeout enforced by the parent, which kills the child and the
+processes it started. Progress events are relayed back to the parent. Limit
+violations raise ``SandboxError`` with a ``kind`` and a hint aimed at the
+repair prompt.
+
+``check_budget`` is the static counterpart: it estimates a script's total
+duration and frame count from its AST before anything runs, clamps
+oversized literal ``run_time``/``wait`` values and rejects scenes that would
+still run too long.
+
+Limits come from the environment:
+
+* ``MANIM_GEN_SANDBOX`` - ``0`` runs everything in-process, unlimited
+* ``MANIM_GEN_SANDBOX_TIMEOUT`` - wall seconds per render (default 600)
+* ``MANIM_GEN_SANDBOX_DRY_RUN_TIMEOUT`` - wall seconds per dry run (default 60)
+* ``MANIM_GEN_SANDBOX_CPU`` - CPU seconds per process (default 900)
+* ``MANIM_GEN_SANDBOX_MEMORY_MB`` - address space per process (default 6144)
+* ``MANIM_GEN_SANDBOX_FILE_MB`` - largest file a render may write (default 2048)
+* ``MANIM_GEN_MAX_SCENE_SECONDS`` - longest scene accepted (default 180)
+* ``MANIM_GEN_MAX_RUN_TIME`` - single ``run_time``/``wait`` clamp (default 30)
+"""
+import ast
+import errno
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+import progress
+from errors import RenderError
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Frame rates of manim's quality presets, so the budget check needs no manim import
+FRAME_RATES = {
+    "low_quality": 15,
+    "medium_quality": 30,
+    "high_quality": 60,
+    "production_quality": 60,
+    "fourk_quality": 60,
+}
+
+HINTS = {
+    "wall_time": "Remove unbounded loops and shorten run_time/wait values or the number of animations.",
+    "cpu_time": "Reduce per-frame work: fewer updaters, fewer mobjects, coarser sampling, "
+                "or the precomputed helpers from scene_helpers.",
+    "memory": "Create fewer mobjects and points (e.g. smaller VGroups, fewer samples per curve).",
+    "file_size": "The video is far too large; shorten the scene.",
+    "duration": "Shorten the scene: reduce run_time/wait values and loop counts.",
+    "killed": "The scene was killed; it most likely used too much memory or CPU.",
+    "crashed": "The scene crashed the renderer process.",
+}
+
+
+class SandboxError(RenderError):
+    """A generated scene exceeded a resource limit or crashed its sandbox."""
+
+    def __init__(self, kind: str, detail: str):
+        super().__init__(f"Resource limit exceeded ({kind}): {detail}. {HINTS[kind]}")
+        self.kind = kind
+        self.detail = detail
+
+
+class Cancelled(RenderError):
+    """``run`` was told to stop and killed its child before it finished."""
+
+
+class _CpuTimeExceeded(Exception):
+    pass
+
+
+def _env_number(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+def enabled() -> bool:
+    """Whether ``run`` forks a limited child (needs ``fork`` and ``resource``, i.e. POSIX)."""
+    return (os.getenv("MANIM_GEN_SANDBOX", "1") != "0" and resource is not None
+            and "fork" in multiprocessing.get_all_start_methods())
+
+
+def limits() -> dict:
+    return {
+        "wall_seconds": _env_number("MANIM_GEN_SANDBOX_TIMEOUT", 600),
+        "dry_run_seconds": _env_number("MANIM_GEN_SANDBOX_DRY_RUN_TIMEOUT", 60),
+        "cpu_seconds": int(_env_number("MANIM_GEN_SANDBOX_CPU", 900)),
+        "memory_mb": int(_env_number("MANIM_GEN_SANDBOX_MEMORY_MB", 6144)),
+        "file_mb": int(_env_number("MANIM_GEN_SANDBOX_FILE_MB", 2048)),
+        "max_scene_seconds": _env_number("MANIM_GEN_MAX_SCENE_SECONDS", 180),
+        "max_run_time": _env_number("MANIM_GEN_MAX_RUN_TIME", 30),
+    }
+
+
+# Running in a child
+
+def _on_cpu_limit(signum, frame):
+    raise _CpuTimeExceeded("CPU time limit reached")
+
+
+def _apply_limits(current: dict) -> None:
+    cpu = current["cpu_seconds"]
+    # Soft limit raises in Python; the hard limit a little later kills a stuck process
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 10))
+    signal.signal(signal.SIGXCPU, _on_cpu_limit)
+    for limit, megabytes in ((resource.RLIMIT_AS, current["memory_mb"]),
+                             (resource.RLIMIT_FSIZE, current["file_mb"])):
+        try:
+            resource.setrlimit(limit, (megabytes * 1024 * 1024, resource.getrlimit(limit)[1]))
+        except (ValueError, OSError):
+            pass  # Not enforceable here (e.g. RLIMIT_AS on macOS)
+    # Oversized writes fail with EFBIG instead of killing the process
+    signal.signal(signal.SIGXFSZ, signal.SIG_IGN)
+
+
+def _classify(e: BaseException) -> str:
+    """Which limit, if any, ``e`` (or an exception it wraps) comes from."""
+    seen = set()
+    while e is not None and id(e) not in seen:
+        seen.add(id(e))
+        if isinstance(e, _CpuTimeExceeded):
+            return "cpu_time"
+        if isinstance(e, MemoryError):
+            return "memory"
+        if isinstance(e, OSError) and e.errno == errno.EFBIG:
+            return "file_size"
+        e = e.__cause__ or e.__context__
+    return "error"
+
+
+def _child(conn, current: dict, func, args, kwargs) -> None:
+    # Stays in the worker's process group, so cancelling a job kills the render too
+    _apply_limits(current)
+    progress.relay(lambda record: conn.send(("event", record)))
+    try:
+        outcome = ("ok", func(*args, **kwargs))
+    except BaseException as e:
+        outcome = ("error", _classify(e), str(e))
+    conn.send(outcome)
+    conn.close()
+
+
+def _descendants(pid: int) -> list[int]:
+    """Child processes of ``pid``, recursively (Linux ``/proc``; empty elsewhere)."""
+    found = []
+    try:
+        tasks = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return found
+    for task in tasks:
+        try:
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children = [int(child) for child in f.read().split()]
+        except (OSError, ValueError):
+            continue
+        for child in children:
+            found.extend([child, *_descendants(child)])
+    return found
+
+
+def _kill(proc) -> None:
+    """Kill the child and what it started (ffmpeg, render pools), collected before they are orphaned."""
+    descendants = _descendants(proc.pid)
+    proc.kill()
+    for pid in descendants:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def _exit_error(exitcode: int, current: dict) -> SandboxError:
+    if exitcode == -signal.SIGXCPU:
+        return SandboxError("cpu_time", f"used more than {current['cpu_seconds']} s of CPU")
+    if exitcode == -signal.SIGKILL:
+        return SandboxError("killed", f"killed (memory limit {current['memory_mb']} MB, "
+                                      f"CPU limit {current['cpu_seconds']} s)")
+    if exitcode is not None and exitcode < 0:
+        return SandboxError("crashed", f"terminated by {signal.Signals(-exitcode).name}")
+    return SandboxError("crashed", f"exited with code {exitcode} without a result")
+
+
+def run(func, *args, timeout: float = None, cancel=None, **kwargs):
+    """Call ``func(*args, **kwargs)`` in a resource-limited child and return its result.
+
+    The child is a fork of this process, so ``func`` needs no pickling; only
+    its return value travels back. Ordinary exceptions come back as
+    ``RenderError`` with the same message, limit violations as
+    ``SandboxError``. Setting the ``threading.Event`` ``cancel`` kills the
+    child and raises ``Cancelled``. Without sandbox support this is a plain
+    call.
+    """
+    if not enabled():
+        return func(*args, **kwargs)
+    current = limits()
+    timeout = timeout or current["wall_seconds"]
+
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    # Not a daemon: parallel renders start their own process pool inside
+    proc = context.Process(target=_child, args=(sender, current, func, args, kwargs))
+    proc.start()
+    sender.close()
+
+    deadline = time.monotonic() + timeout
+    outcome = None
+    try:
+        while outcome is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise SandboxError("wall_time", f"did not finish within {timeout:.0f} s")
+            if cancel is not None and cancel.is_set():
+                raise Cancelled("stopped before it finished")
+            if not receiver.poll(min(remaining, 1.0 if cancel is None else 0.1)):
+                continue
+            try:
+                message = receiver.recv()
+            except EOFError:
+                break  # Died without reporting back
+            if message[0] == "event":
+                progress.publish(message[1])
+            else:
+                outcome = message
+    finally:
+        if outcome is None and proc.is_alive():
+            _kill(proc)
+        proc.join()
+        receiver.close()
+
+    if outcome is None:
+        raise _exit_error(proc.exitcode, current)
+    if outcome[0] == "ok":
+        return outcome[1]
+    _, kind, message = outcome
+    if kind == "error":
+        raise RenderError(message)
+    raise SandboxError(kind, {
+        "cpu_time": f"used more than {current['cpu_seconds']} s of CPU",
+        "memory": f"ran out of memory (limit {current['memory_mb']} MB)",
+        "file_size": f"wrote a file larger than {current['file_mb']} MB",
+    }[kind])
+
+
+# Static duration budget
+
+def _number(node) -> float | None:
+    """Value of a numeric literal expression such as ``2``, ``-0.5`` or ``3 * 2``."""
+    try:
+        value = ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Sub, ast.Mult, ast.Div)):
+            left, right = _number(node.left), _number(node.right)
+            if left is None or right is None:
+                return None
+            if isinstance(node.op, ast.Add):
+                return left + right
+            if isinstance(node.op, ast.Sub):
+                return left - right
+            if isinstance(node.op, ast.Mult):
+                return left * right
+            return left / right if right else None
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+def _keyword(call: ast.Call, name: str):
+    return next((kw.value for kw in call.keywords if kw.arg == name), None)
+
+
+def _self_call(node, name: str = None) -> ast.Call | None:
+    """``node`` if it is a call ``self.<name>(...)`` (any method when ``name`` is None)."""
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+            and isinstance(node.func.value, ast.Name) and node.func.value.id == "self"
+            and (name is None or node.func.attr == name)):
+        return node
+    return None
+
+
+class _DurationEstimate:
+    """Walks ``construct`` (and the methods it calls) adding up play/wait durations."""
+
+    def __init__(self, methods: dict):
+        self.methods = methods
+        self.bounded = True
+        self.infinite = False
+        self.plays = 0
+        self.timings = []  # (node, seconds) of every literal run_time/wait duration
+        self._stack = []
+
+    def block(self, body: list) -> float:
+        return sum(self.statement(stmt) for stmt in body)
+
+    def statement(self, stmt) -> float:
+        if isinstance(stmt, ast.For):
+            return self._iterations(stmt.iter) * self.block(stmt.body) + self.block(stmt.orelse)
+        if isinstance(stmt, ast.While):
+            # Unknown trip count: counted once, but the estimate is only a lower bound
+            self.bounded = False
+            always = _number(stmt.test) or (isinstance(stmt.test, ast.Constant) and stmt.test.value is True)
+            if always and not any(isinstance(node, (ast.Break, ast.Return, ast.Raise))
+                                  for node in ast.walk(stmt)):
+                self.infinite = True
+            return self.block(stmt.body)
+        if isinstance(stmt, ast.If):
+            return max(self.block(stmt.body), self.block(stmt.orelse))
+        if isinstance(stmt, (ast.With, ast.AsyncWith)):
+            return self.block(stmt.body)
+        if isinstance(stmt, ast.Try):
+            return self.block(stmt.body) + self.block(stmt.orelse) + self.block(stmt.finalbody)
+        return sum(self.call(node) for node in ast.walk(stmt) if isinstance(node, ast.Call))
+
+    def call(self, node: ast.Call) -> float:
+        call = _self_call(node)
+        if call is None:
+            return 0.0
+        if call.func.attr == "play":
+            self.plays += 1
+            return self._play_duration(call)
+        if call.func.attr == "wait":
+            duration = _keyword(call, "duration") or (call.args[0] if call.args else None)
+            return self._timing(duration, 1.0)
+        method = self.methods.get(call.func.attr)
+        if method is not None and method.name not in self._stack:
+            self._stack.append(method.name)
+            try:
+                return self.block(method.body)
+            finally:
+                self._stack.pop()
+        return 0.0
+
+    def _play_duration(self, call: ast.Call) -> float:
+        run_time = _keyword(call, "run_time")
+        if run_time is not None:
+            return self._timing(run_time, 1.0)
+        # Without a play-level run_time the longest animation decides
+        durations = [
+            self._timing(_keyword(arg, "run_time"), 1.0)
+            for arg in call.args if isinstance(arg, ast.Call)
+        ]
+        return max(durations, default=1.0)
+
+    def _timing(self, node, default: float) -> float:
+        if node is None:
+            return default
+        value = _number(node)
+        if value is None:
+            return default
+        self.timings.append((node, value))
+        return value
+
+    def _iterations(self, iterable) -> float:
+        if isinstance(iterable, (ast.List, ast.Tuple, ast.Set)):
+            return len(iterable.elts)
+        if isinstance(iterable, ast.Call) and isinstance(iterable.func, ast.Name):
+            if iterable.func.id == "range":
+                bounds = [_number(arg) for arg in iterable.args]
+                if bounds and None not in bounds:
+                    return len(range(*(int(bound) for bound in bounds)))
+            if iterable.func.id == "enumerate" and iterable.args:
+                return self._iterations(iterable.args[0])
+        self.bounded = False
+        return 1
+
+
+def estimate_duration(code: str, quality: str = "low_quality") -> dict:
+    """Estimate the rendered length of ``code``'s scene without running it.
+
+    Returns ``seconds``, ``frames``, ``plays`` (``self.play`` calls in the
+    source), whether the estimate is ``bounded`` (False when a loop's trip
+    count is unknown, making it a lower bound), whether a loop is certainly
+    ``infinite`` and ``timings``, the AST nodes of literal durations.
+    """
+    tree = ast.parse(code)
+    estimate = None
+    for cls in (node for node in tree.body if isinstance(node, ast.ClassDef)):
+        methods = {node.name: node for node in cls.body if isinstance(node, ast.FunctionDef)}
+        if "construct" not in methods:
+            continue
+        walker = _DurationEstimate(methods)
+        walker._stack.append("construct")
+        seconds = walker.block(methods["construct"].body)
+        if estimate is None or seconds > estimate["seconds"]:
+            estimate = {"seconds": seconds, "plays": walker.plays, "bounded": walker.bounded,
+                        "infinite": walker.infinite, "timings": walker.timings}
+    estimate = estimate or {"seconds": 0.0, "plays": 0, "bounded": True, "infinite": False,
+                            "timings": []}
+    estimate["frames"] = round(estimate["seconds"] * FRAME_RATES.get(quality, 15))
+    return estimate
+
+
+def _replace_literals(code: str, replacements: list) -> str:
+    """Replace the source of each ``(node, text)``, working backwards so offsets hold.
+
+    A node may be listed more than once (a helper method called twice is
+    walked twice); it is replaced once. Raises ``ValueError`` if two
+    different spans overlap, since splicing both would corrupt the code.
+    """
+    lines = code.splitlines(keepends=True)
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line.encode("utf-8")))
+    data = code.encode("utf-8")
+    spans = {}
+    for node, text in replacements:
+        start = offsets[node.lineno - 1] + node.col_offset
+        end = offsets[node.end_lineno - 1] + node.end_col_offset
+        spans[(start, end)] = text
+    ordered = sorted(spans.items(), reverse=True)
+    for (earlier, _), (later, _) in zip(ordered[1:], ordered):
+        if earlier[1] > later[0]:
+            raise ValueError("overlapping replacements")
+    for (start, end), text in ordered:
+        data = data[:start] + text.encode("utf-8") + data[end:]
+    return data.decode("utf-8")
+
+
+def check_budget(code: str, quality: str = "low_quality") -> tuple[str, str | None]:
+    """Clamp literal durations above the limit, then check the whole scene's length.
+
+    Returns the (possibly clamped) code and a problem description, or None
+    when the estimated duration fits ``MANIM_GEN_MAX_SCENE_SECONDS``.
+    """
+    current = limits()
+    try:
+        estimate = estimate_duration(code, quality)
+    except SyntaxError:
+        return code, None  # Reported by the syntax check
+    max_run_time = current["max_run_time"]
+    oversized = {(node.lineno, node.col_offset, node.end_lineno, node.end_col_offset): node
+                 for node, value in estimate["timings"] if value > max_run_time}
+    if oversized:
+        try:
+            clamped = _replace_literals(code, [(node, f"{max_run_time:g}") for node in oversized.values()])
+        except ValueError:
+            return code, (
+                f"Scene budget: some run_time/wait values exceed the {max_run_time:g} s limit per "
+                f"animation. {HINTS['duration']}"
+            )
+        try:
+            estimate = estimate_duration(clamped, quality)
+        except SyntaxError as e:
+            raise RenderError(f"Clamping durations produced invalid code: {e}") from e
+        print(f"[sandbox] clamped {len(oversized)} durations to {max_run_time:g}s", file=sys.stderr)
+        code = clamped
+
+    if estimate["infinite"]:
+        return code, (
+            "Scene budget: construct() has a `while True` loop with no break, so the scene "
+            "never ends. Loop a fixed number of times instead."
+        )
+    if estimate["seconds"] > current["max_scene_seconds"]:
+        return code, (
+            f"Scene budget: the scene would run about {estimate['seconds']:.0f} s "
+            f"({estimate['frames']} frames at {quality}), "
+            f"more than the {current['max_scene_seconds']:.0f} s limit. {HINTS['duration']}"
+        )
+    return code, None
+
+
+def check_duration(seconds: float, quality: str = "low_quality") -> None:
+    """Reject a measured scene length (e.g. from a dry run) over the limit."""
+    max_seconds = limits()["max_scene_seconds"]
+    if seconds > max_seconds:
+        frames = round(seconds * FRAME_RATES.get(quality, 15))
+        raise SandboxError("duration", f"the scene runs {seconds:.0f} s ({frames} frames), "
+                                       f"more than the {max_seconds:.0f} s limit")
+
+
+if __name__ == '__main__':
+    # Usage: python sandbox.py <script.py> [quality]
+    if len(sys.argv) < 2:
+        print("Usage: sandbox.py <script.py> [quality]", file=sys.stderr)
+        sys.exit(1)
+    with open(sys.argv[1], encoding="utf-8") as f:
+        source = f.read()
+    result = estimate_duration(source, *sys.argv[2:3])
+    result["timings"] = [(node.lineno, value) for node, value in result["timings"]]
+    print(json.dumps(result, indent=2))
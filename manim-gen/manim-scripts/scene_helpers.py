@@ -0,0 +1,251 @@
+"""Vectorized helpers for patterns generated scenes use all the time.
+
+Updaters written the obvious way redo scalar work on every frame: a ruler
+sliding along a graph calls the function and ``coords_to_point`` twice per
+frame and takes a finite difference for the tangent. These helpers sample
+the graph once with NumPy and only interpolate a table per frame, and draw
+vector fields as a single mobject whose points are recomputed in one array
+operation. Generated scripts import them with
+``from scene_helpers import ...`` (see the generation prompt).
+
+    graph = sample_graph(ax, f, [1, 8])
+    tracker = ValueTracker(1)
+    self.add(tangent_line(graph, tracker, length=2), moving_dot(graph, tracker))
+    self.play(tracker.animate.set_value(8), run_time=5)
+"""
+import numpy as np
+from manim import WHITE, Dot, Line, Polygon, VGroup, VMobject
+
+__all__ = [
+    "GraphSamples",
+    "sample_graph",
+    "moving_dot",
+    "tangent_line",
+    "secant_line",
+    "riemann_rectangles",
+    "vector_field",
+]
+
+# Bezier handles along a straight segment, for building line curves in bulk
+_LINE_WEIGHTS = np.array([0.0, 1 / 3, 2 / 3, 1.0])[:, None]
+
+
+def _evaluate(func, *args) -> np.ndarray:
+    """``func`` over arrays, vectorized if it accepts them, element by element otherwise."""
+    try:
+        values = np.asarray(func(*args), dtype=float)
+        if values.shape == np.shape(args[0]):
+            return values
+    except Exception:
+        pass
+    return np.array([func(*point) for point in zip(*args)], dtype=float)
+
+
+def _affine_basis(axes):
+    """Origin and unit vectors of ``axes`` in scene coordinates, or None if not linear (log axes)."""
+    origin = np.asarray(axes.coords_to_point(0, 0), dtype=float)
+    unit_x = np.asarray(axes.coords_to_point(1, 0), dtype=float) - origin
+    unit_y = np.asarray(axes.coords_to_point(0, 1), dtype=float) - origin
+    probe = np.asarray(axes.coords_to_point(2.5, -1.5), dtype=float)
+    if not np.allclose(origin + 2.5 * unit_x - 1.5 * unit_y, probe, atol=1e-6):
+        return None
+    return origin, unit_x, unit_y
+
+
+def _to_points(axes, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """``axes.coords_to_point`` for many coordinates at once, as an (n, 3) array."""
+    basis = _affine_basis(axes)
+    if basis is None:
+        return np.array([axes.coords_to_point(x, y) for x, y in zip(xs, ys)], dtype=float)
+    origin, unit_x, unit_y = basis
+    return origin + xs[:, None] * unit_x + ys[:, None] * unit_y
+
+
+class GraphSamples:
+    """A function on ``axes`` sampled once over ``x_range``, with O(1) lookups per frame.
+
+    ``point``, ``direction``, ``angle``, ``slope`` and ``y`` interpolate
+    linearly between the precomputed samples; x outside the range is clamped.
+    """
+
+    def __init__(self, axes, func, x_range, samples: int = 512):
+        self.axes = axes
+        self.x_min, self.x_max = float(x_range[0]), float(x_range[1])
+        self.xs = np.linspace(self.x_min, self.x_max, samples)
+        self.ys = _evaluate(func, self.xs)
+        self.points = _to_points(axes, self.xs, self.ys)
+        tangents = np.gradient(self.points, axis=0)
+        norms = np.linalg.norm(tangents, axis=1, keepdims=True)
+        self.directions = tangents / np.where(norms == 0, 1, norms)
+        self.slopes = np.gradient(self.ys, self.xs)
+        self._step = (self.x_max - self.x_min) / (samples - 1)
+
+    def _lerp(self, x: float, table: np.ndarray):
+        t = min(max((x - self.x_min) / self._step, 0.0), len(self.xs) - 1.0)
+        i = min(int(t), len(self.xs) - 2)
+        f = t - i
+        return table[i] * (1 - f) + table[i + 1] * f
+
+    def point(self, x: float) -> np.ndarray:
+        return self._lerp(x, self.points)
+
+    def direction(self, x: float) -> np.ndarray:
+        """Unit tangent of the drawn graph in scene coordinates."""
+        direction = self._lerp(x, self.directions)
+        return direction / (np.linalg.norm(direction) or 1)
+
+    def angle(self, x: float) -> float:
+        direction = self._lerp(x, self.directions)
+        return float(np.arctan2(direction[1], direction[0]))
+
+    def slope(self, x: float) -> float:
+        """dy/dx in the function's own coordinates."""
+        return float(self._lerp(x, self.slopes))
+
+    def y(self, x: float) -> float:
+        return float(self._lerp(x, self.ys))
+
+
+def sample_graph(axes, func, x_range, samples: int = 512) -> GraphSamples:
+    """Sample ``func`` on ``axes`` over ``x_range`` for the other helpers."""
+    return GraphSamples(axes, func, x_range, samples)
+
+
+def moving_dot(graph: GraphSamples, tracker, **kwargs) -> Dot:
+    """A Dot that stays on ``graph`` at x = ``tracker.get_value()``."""
+    dot = Dot(graph.point(tracker.get_value()), **kwargs)
+    dot.add_updater(lambda mob: mob.move_to(graph.point(tracker.get_value())))
+    return dot
+
+
+def tangent_line(graph: GraphSamples, tracker, length: float = 2.0, **kwargs) -> Line:
+    """A Line of ``length`` tangent to ``graph`` at x = ``tracker.get_value()``."""
+    def ends():
+        x = tracker.get_value()
+        center, half = graph.point(x), graph.direction(x) * (length / 2)
+        return center - half, center + half
+
+    line = Line(*ends(), **kwargs)
+    line.add_updater(lambda mob: mob.set_points_by_ends(*ends()))
+    return line
+
+
+def secant_line(graph: GraphSamples, tracker_a, tracker_b, extend: float = 0.0, **kwargs) -> Line:
+    """A Line through the graph at the two trackers' x values, extended by ``extend`` on both sides."""
+    def ends():
+        start, end = graph.point(tracker_a.get_value()), graph.point(tracker_b.get_value())
+        direction = end - start
+        norm = np.linalg.norm(direction)
+        offset = direction / norm * extend if norm else 0
+        return start - offset, end + offset
+
+    line = Line(*ends(), **kwargs)
+    line.add_updater(lambda mob: mob.set_points_by_ends(*ends()))
+    return line
+
+
+def riemann_rectangles(axes, func, x_range, n: int, sample: str = "left",
+                       color=None, fill_opacity: float = 0.5, stroke_width: float = 1) -> VGroup:
+    """``n`` Riemann rectangles under ``func`` over ``x_range``, heights computed in one pass.
+
+    ``sample`` picks each rectangle's height from its ``"left"``, ``"right"``
+    or ``"mid"`` point. Returns a VGroup of Polygons, so it can be colored
+    with ``set_color_by_gradient`` and transformed into a finer one.
+    """
+    edges = np.linspace(float(x_range[0]), float(x_range[1]), n + 1)
+    samples = {"left": edges[:-1], "right": edges[1:], "mid": (edges[:-1] + edges[1:]) / 2}[sample]
+    heights = _evaluate(func, samples)
+    zeros = np.zeros(n)
+    corners = np.stack([
+        _to_points(axes, edges[:-1], zeros),
+        _to_points(axes, edges[1:], zeros),
+        _to_points(axes, edges[1:], heights),
+        _to_points(axes, edges[:-1], heights),
+    ], axis=1)
+    style = {"fill_opacity": fill_opacity, "stroke_width": stroke_width}
+    if color is not None:
+        style["color"] = color
+    return VGroup(*(Polygon(*rect, **style) for rect in corners))
+
+
+class _FieldSegments(VMobject):
+    """Every arrow of a vector field as straight curves of one VMobject."""
+
+    def __init__(self, starts: np.ndarray, unit_x, unit_y, scale, max_length, tip_ratio, **kwargs):
+        super().__init__(**kwargs)
+        self.starts = starts
+        self.unit_x, self.unit_y = unit_x, unit_y
+        self.scale_factor = scale
+        self.max_length = max_length
+        self.tip_ratio = tip_ratio
+
+    def set_vectors(self, vectors: np.ndarray) -> "_FieldSegments":
+        """Redraw every arrow from an (n, 2) array of vectors in axes units, in one pass."""
+        shafts = (vectors[:, :1] * self.unit_x + vectors[:, 1:2] * self.unit_y) * self.scale_factor
+        lengths = np.linalg.norm(shafts, axis=1, keepdims=True)
+        if self.max_length:
+            shafts *= np.minimum(1, self.max_length / np.where(lengths == 0, 1, lengths))
+            lengths = np.minimum(lengths, self.max_length)
+        ends = self.starts + shafts
+        # Two barbs per arrow: the shaft reversed, shortened and rotated by +-25 degrees
+        back = -shafts * self.tip_ratio
+        cos, sin = np.cos(np.radians(25)), np.sin(np.radians(25))
+        barb_a = np.stack([back[:, 0] * cos - back[:, 1] * sin, back[:, 0] * sin + back[:, 1] * cos,
+                           back[:, 2]], axis=1)
+        barb_b = np.stack([back[:, 0] * cos + back[:, 1] * sin, -back[:, 0] * sin + back[:, 1] * cos,
+                           back[:, 2]], axis=1)
+        segments = np.stack([
+            np.stack([self.starts, ends], axis=1),
+            np.stack([ends, ends + barb_a], axis=1),
+            np.stack([ends, ends + barb_b], axis=1),
+        ], axis=1).reshape(-1, 2, 3)
+        # Drop zero-length arrows entirely; each remaining segment becomes one cubic curve
+        segments = segments[np.repeat(lengths[:, 0] > 1e-9, 3)]
+        curves = segments[:, :1] + _LINE_WEIGHTS[None] * (segments[:, 1:] - segments[:, :1])
+        self.set_points(curves.reshape(-1, 3))
+        return self
+
+
+def vector_field(axes, field, x_range=None, y_range=None, step: float = 0.5, scale: float = 0.4,
+                 max_length: float = None, tracker=None, color=WHITE, stroke_width: float = 2,
+                 tip_ratio: float = 0.25) -> VMobject:
+    """Arrows of ``field(x, y) -> (vx, vy)`` on a grid over ``axes``, as a single mobject.
+
+    ``field`` receives coordinate arrays (or single floats when it doesn't
+    handle arrays) in the axes' own units and returns the vector components.
+    With a ``tracker``, ``field(x, y, t)`` is re-evaluated on every frame
+    with t = ``tracker.get_value()``. ``scale`` converts vector length to
+    scene units and ``max_length`` caps it.
+    """
+    x_range = x_range or axes.x_range[:2]
+    y_range = y_range or axes.y_range[:2]
+    xs = np.arange(x_range[0], x_range[1] + step / 2, step)
+    ys = np.arange(y_range[0], y_range[1] + step / 2, step)
+    grid_x, grid_y = (values.ravel() for values in np.meshgrid(xs, ys))
+    starts = _to_points(axes, grid_x, grid_y)
+    basis = _affine_basis(axes)
+    if basis is None:
+        raise ValueError("vector_field needs linear axes")
+    _, unit_x, unit_y = basis
+
+    def components(*args) -> np.ndarray:
+        values = field(*args)
+        return np.stack([np.broadcast_to(np.asarray(v, dtype=float), np.shape(args[0])) for v in values[:2]],
+                        axis=-1)
+
+    def vectors(t=None) -> np.ndarray:
+        args = (grid_x, grid_y) if t is None else (grid_x, grid_y, np.full(len(grid_x), t))
+        try:
+            result = components(*args)
+            if result.shape == (len(grid_x), 2):
+                return result
+        except Exception:
+            pass
+        return np.array([[float(v) for v in field(*point)[:2]] for point in zip(*args)])
+
+    segments = _FieldSegments(starts, unit_x, unit_y, scale, max_length, tip_ratio,
+                              color=color, stroke_width=stroke_width)
+    segments.set_vectors(vectors(None if tracker is None else tracker.get_value()))
+    if tracker is not None:
+        segments.add_updater(lambda mob: mob.set_vectors(vectors(tracker.get_value())))
+    return segments
@@ -0,0 +1,100 @@
+"""Fragmented MP4 segments of a render in progress, so playback can start early.
+
+Manim writes every ``play``/``wait`` call to its own partial movie and only
+joins them once the scene is done. With streaming enabled
+(``MANIM_GEN_STREAM=1``) each finished partial movie is also remuxed, without
+re-encoding, into a self-contained fragmented MP4 in ``<out_dir>/stream``.
+The remux runs in the background while the next animation renders. Each
+segment is announced with an ``artifact`` event of kind ``segment`` (``path``,
+``index``, ``duration``, ``mime``), which the extension posts to the
+webview's Media Source Extensions player as it arrives. Segment 0 of a new
+attempt means the previous attempt's segments are stale. ``finish`` reports
+how many segments were published and whether they cover the whole render,
+so the player can end the stream instead of reloading the finished video.
+"""
+import contextlib
+import os
+import shutil
+import subprocess
+import sys
+from collections import deque
+
+import progress
+
+_REMUX_FLAGS = ["-c", "copy", "-movflags", "+frag_keyframe+empty_moov+default_base_moof", "-f", "mp4"]
+
+
+def enabled() -> bool:
+    return os.getenv("MANIM_GEN_STREAM", "") not in ("", "0")
+
+
+def codec_mime(path: str) -> str | None:
+    """The MSE type of an H.264 MP4, e.g. ``video/mp4; codecs="avc1.64001e"``, read from its avcC box."""
+    with open(path, "rb") as f:
+        head = f.read(64 * 1024)  # The init segment comes first and is small
+    at = head.find(b"avcC")
+    if at < 0 or at + 8 > len(head):
+        return None
+    profile, compatibility, level = head[at + 5], head[at + 6], head[at + 7]
+    return f'video/mp4; codecs="avc1.{profile:02x}{compatibility:02x}{level:02x}"'
+
+
+class SegmentStream:
+    """Remuxes partial movies into ``directory`` in order and announces each segment."""
+
+    def __init__(self, directory: str, ffmpeg: str = "ffmpeg"):
+        self.directory = directory
+        self.ffmpeg = ffmpeg
+        self.mime = None
+        self.segments = []
+        self.pending = deque()
+        self.failed = False
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+    def add(self, partial_movie: str, duration: float) -> None:
+        """Start remuxing the next partial movie (``duration`` seconds long)."""
+        if self.failed:
+            return
+        index = len(self.segments) + len(self.pending)
+        path = os.path.join(self.directory, f"segment_{index:05d}.mp4")
+        process = subprocess.Popen(
+            [self.ffmpeg, "-y", "-loglevel", "error", "-nostdin", "-i", partial_movie, *_REMUX_FLAGS,
+             f"{path}.tmp"],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        )
+        self.pending.append((process, path, duration))
+        self.collect()
+
+    def collect(self, wait: bool = False) -> None:
+        """Publish the segments whose remux finished, in order; cheap enough to call per frame."""
+        while self.pending:
+            process, path, duration = self.pending[0]
+            if not wait and process.poll() is None:
+                return
+            _, error = process.communicate()
+            self.pending.popleft()
+            if process.returncode != 0 or self.failed:
+                # A gap would desynchronize the player; the finished video still follows
+                if not self.failed:
+                    print(f"[stream] remux failed, streaming stopped: {error.decode(errors='replace').strip()}",
+                          file=sys.stderr)
+                self.failed = True
+                with contextlib.suppress(OSError):
+                    os.remove(f"{path}.tmp")
+                continue
+            os.replace(f"{path}.tmp", path)
+            self.mime = self.mime or codec_mime(path)
+            if self.mime is None:
+                print("[stream] not an H.264 MP4, streaming stopped", file=sys.stderr)
+                self.failed = True
+                continue
+            index = len(self.segments)
+            self.segments.append({"file": os.path.basename(path), "duration": duration})
+            progress.emit("artifact", kind="segment", path=path, index=index, duration=duration,
+                          mime=self.mime)
+
+    def finish(self) -> dict:
+        """Wait for outstanding remuxes; returns the number of ``segments`` and whether they are ``complete``."""
+        self.collect(wait=True)
+        return {"segments": len(self.segments), "complete": not self.failed}
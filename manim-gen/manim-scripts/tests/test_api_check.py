@@ -0,0 +1,123 @@
+import json
+
+import pytest
+
+import api_check
+
+
+class Mobject:
+    def __init__(self, color=None, name=None):
+        pass
+
+    def shift(self, *vectors):
+        pass
+
+
+class Circle(Mobject):
+    def __init__(self, radius=1.0, **kwargs):
+        super().__init__(**kwargs)
+
+    def surround(self, mobject, buff=0.2):
+        pass
+
+
+class Line(Mobject):
+    def __init__(self, start, end, *, buff=0, **kwargs):
+        super().__init__(**kwargs)
+
+
+def always_redraw(func):
+    pass
+
+
+def fake_index():
+    classes = {cls.__name__: cls for cls in (Mobject, Circle, Line)}
+    return {
+        "version": "0.0.test",
+        "classes": {
+            name: {"init": api_check._class_signature(cls), "attrs": sorted(a for a in dir(cls) if not a.startswith("__"))}
+            for name, cls in classes.items()
+        },
+        "functions": {"always_redraw": api_check._signature(always_redraw)},
+        "names": sorted([*classes, "always_redraw", "UP", "Scene"]),
+    }
+
+
+@pytest.fixture(autouse=True)
+def index(monkeypatch):
+    monkeypatch.setattr(api_check, "_index", fake_index())
+
+
+def messages(code):
+    return [finding["message"] for finding in api_check.check_script(code)]
+
+
+def test_constructor_keywords_follow_the_kwargs_chain():
+    signature = api_check._class_signature(Circle)
+    assert signature["params"] == ["radius"]
+    assert signature["kwonly"] == ["color", "name"]
+    assert not signature["varkw"]
+
+
+def test_valid_script_has_no_findings():
+    code = """from manim import *
+import numpy as np
+
+
+class TheoremScene(Scene):
+    def construct(self):
+        circle = Circle(radius=2, color="#FF0000")
+        circle.shift(UP)
+        line = Line(np.zeros(3), UP, buff=0.1)
+        always_redraw(lambda: line)
+"""
+    assert messages(code) == []
+
+
+def test_api_misuse_is_reported_with_lines():
+    code = """from manim import *
+
+circle = Circle(2, 3, fill=1)
+circle.animate.rotate_about(UP)
+Line(UP)
+ShowCreation(circle)
+always_redraw()
+"""
+    findings = api_check.check_script(code)
+    assert [(finding["line"], finding["message"]) for finding in findings] == [
+        (3, "Circle() takes at most 1 positional arguments (radius) but 2 were given"),
+        (3, "Circle() got an unexpected keyword argument 'fill'"),
+        (4, "Circle has no method 'rotate_about' (called on 'circle')"),
+        (5, "Line() is missing required arguments: end"),
+        (6, "'ShowCreation' is not defined and is not exported by manim 0.0.test"),
+        (7, "always_redraw() is missing required arguments: func"),
+    ]
+    assert api_check.format_findings(findings[:1]) == f"line 3: {findings[0]['message']}"
+
+
+def test_reassigned_and_locally_defined_names_are_not_guessed():
+    code = """from manim import *
+
+circle = Circle()
+circle = make_something()
+circle.anything()
+
+
+def make_something():
+    return Circle()
+"""
+    assert messages(code) == []
+
+
+def test_foreign_star_imports_silence_unknown_names_and_syntax_errors_are_skipped():
+    assert messages("from numpy import *\nlinspace(0, 1)\n") == []
+    assert messages("def broken(:\n") == []
+
+
+def test_the_index_is_read_from_disk_without_importing_manim(tmp_path, monkeypatch):
+    monkeypatch.setattr(api_check, "_index", None)
+    monkeypatch.setattr(api_check, "INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(api_check.importlib.metadata, "version", lambda name: "0.0.test")
+    monkeypatch.setattr(api_check, "build_index", lambda: pytest.fail("rebuilt a cached index"))
+    (tmp_path / "manim-api-0.0.test.json").write_text(json.dumps(fake_index()))
+    assert api_check.load_index()["version"] == "0.0.test"
@@ -0,0 +1,83 @@
+import json
+import multiprocessing
+import os
+
+from cache import INDEX_FILE, ArtifactCache
+
+
+def put_text(cache, key, size=10):
+    cache.put(key, script="x" * size)
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = ArtifactCache(str(tmp_path), max_bytes=25)
+    put_text(cache, "a")
+    put_text(cache, "b")
+    assert cache.get("a")["script"]  # "b" is now the least recently used
+    put_text(cache, "c")
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")
+    assert not os.path.exists(tmp_path / "b")
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"]) == (2, 1)
+
+
+def test_instances_sharing_a_root_keep_each_others_entries(tmp_path):
+    worker, batch = ArtifactCache(str(tmp_path)), ArtifactCache(str(tmp_path))
+    put_text(worker, "a")
+    put_text(batch, "b")
+    assert worker.get("b") is not None
+    assert batch.get("missing") is None
+    with open(tmp_path / INDEX_FILE) as f:
+        assert set(json.load(f)) == {"a", "b"}
+    stats = ArtifactCache(str(tmp_path)).stats()
+    assert (stats["hits"], stats["partial_hits"], stats["misses"]) == (0, 1, 1)
+
+
+def _put_many(root, prefix, count):
+    cache = ArtifactCache(root)
+    for i in range(count):
+        cache.put(f"{prefix}{i}", script="x")
+        cache.get(f"{prefix}{i}")
+
+
+def test_concurrent_processes_lose_no_index_entries_or_counts(tmp_path):
+    context = multiprocessing.get_context("fork")
+    procs = [context.Process(target=_put_many, args=(str(tmp_path), prefix, 20)) for prefix in "pq"]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+    with open(tmp_path / INDEX_FILE) as f:
+        assert len(json.load(f)) == 40
+    assert ArtifactCache(str(tmp_path)).stats()["partial_hits"] == 40
+
+
+def test_an_entry_larger_than_the_bound_is_not_kept(tmp_path):
+    cache = ArtifactCache(str(tmp_path), max_bytes=25)
+    put_text(cache, "a")
+    put_text(cache, "big", size=30)
+    assert cache.get("big") is None and cache.get("a") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_only_entry_directories_are_adopted_and_only_when_opened(tmp_path, monkeypatch):
+    key = "ab" * 32
+    os.makedirs(tmp_path / key)
+    (tmp_path / key / "theorem_animation.py").write_text("scene")
+    os.makedirs(tmp_path / ("cd" * 32))  # No artifacts
+    os.makedirs(tmp_path / "glyphs")
+    (tmp_path / "glyphs" / "theorem_animation.py").write_text("not an entry")
+    cache = ArtifactCache(str(tmp_path))
+    assert cache.stats()["entries"] == 1
+
+    listdir = os.listdir
+
+    def no_walk(path):
+        assert path != str(tmp_path), "the cache directory was walked after opening"
+        return listdir(path)
+
+    monkeypatch.setattr(os, "listdir", no_walk)
+    assert cache.get(key)["script"] == "scene"
+    put_text(cache, "b")
+    assert cache.stats()["entries"] == 2
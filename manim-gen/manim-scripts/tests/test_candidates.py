@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+
+import progress
+from candidates import first_valid
+from fake_model import FakeResponse
+
+
+class StaggeredModel:
+    """Candidate i answers after ``delays[i]`` seconds with ``texts[i]``."""
+
+    def __init__(self, delays, texts):
+        self.delays = delays
+        self.texts = texts
+        self.cancelled = []
+
+    async def generate_async(self, prompt, label, generation_config=None):
+        i = int(label.split()[-1])
+        try:
+            await asyncio.sleep(self.delays[i])
+        except asyncio.CancelledError:
+            self.cancelled.append(i)
+            raise
+        return FakeResponse(prompt, self.texts[i])
+
+
+def slow_validator(seconds):
+    def validate(code, stop):
+        if code == "slow":
+            stop.wait(seconds)
+            return "slow candidate is broken"
+        return None if code == "good" else f"{code} is broken"
+    return validate
+
+
+def run(model, n, validate):
+    return asyncio.run(first_valid(model, "prompt", n, 3000, lambda text: text, validate))
+
+
+def test_slow_validation_does_not_hold_up_other_candidates():
+    model = StaggeredModel([0.0, 0.05, 5.0], ["slow", "good", "late"])
+    started = time.perf_counter()
+    result = run(model, 3, slow_validator(1.0))
+    assert result["winner"] == "good"
+    assert time.perf_counter() - started < 0.8
+    assert model.cancelled == [2]
+
+
+def test_all_failing_candidates_are_reported():
+    model = StaggeredModel([0.0, 0.01], ["slow", "bad"])
+    result = run(model, 2, slow_validator(0.05))
+    assert result["winner"] is None
+    assert sorted(problem for _, problem in result["failures"]) == ["bad is broken", "slow candidate is broken"]
+    assert result["output_tokens"] > 0
+
+
+def test_losing_validations_are_told_to_stop():
+    stopped = threading.Event()
+
+    def validate(code, stop):
+        if code == "slow":
+            if stop.wait(5.0):
+                stopped.set()
+            return "slow candidate is broken"
+        return None
+
+    model = StaggeredModel([0.0, 0.05], ["slow", "good"])
+    assert run(model, 2, validate)["winner"] == "good"
+    assert stopped.wait(1.0)
+
+
+def test_validation_events_carry_the_job_id():
+    events = []
+    progress.add_listener(events.append)
+
+    def validate(code, stop):
+        progress.emit("validation", check="dry_run", ok=True)
+        return None
+
+    async def job():
+        with progress.job_context("job-7"):
+            return await first_valid(StaggeredModel([0.0], ["good"]), "prompt", 1, 3000, lambda text: text, validate)
+
+    try:
+        assert asyncio.run(job())["winner"] == "good"
+    finally:
+        progress.remove_listener(events.append)
+    assert [event.get("job") for event in events if event["event"] == "validation"] == ["job-7"]
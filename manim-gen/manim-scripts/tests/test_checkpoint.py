@@ -0,0 +1,105 @@
+import os
+import shutil
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import checkpoint  # noqa: E402
+
+SCRIPT = "".join(f"line {i}\n" for i in range(1, 11))
+SETTINGS = {"resolution": [854, 480], "frame_rate": 15}
+
+
+def record_plays(directory, script_path, call_lines):
+    checkpoints = checkpoint.Checkpoints(directory, script_path, SETTINGS)
+    for index, line in enumerate(call_lines):
+        movie = os.path.join(os.path.dirname(directory), f"partial_{index}.mp4")
+        with open(movie, "w") as f:
+            f.write(f"movie {index}")
+        checkpoints.record(index, [line], f"before {index}", f"animation {index}", f"after {index}", 1.0, movie)
+    return checkpoints
+
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / "scene.py"
+    path.write_text(SCRIPT)
+    return str(path)
+
+
+def test_edit_keeps_the_checkpoints_before_it(tmp_path, script):
+    directory = str(tmp_path / "checkpoints")
+    record_plays(directory, script, [3, 5, 7, 9])
+    with open(script, "w") as f:
+        f.write(SCRIPT.replace("line 6\n", "line 6 repaired\n"))
+
+    resumed = checkpoint.Checkpoints(directory, script, SETTINGS)
+    assert [play["index"] for play in resumed.resume] == [0, 1]
+    assert sorted(os.listdir(directory)) == ["index.json", "play_00000.mp4", "play_00001.mp4"]
+    with open(resumed.movie_path(resumed.resume[1])) as f:
+        assert f.read() == "movie 1"
+
+
+def test_unchanged_script_reuses_every_checkpoint(tmp_path, script):
+    directory = str(tmp_path / "checkpoints")
+    record_plays(directory, script, [3, 5])
+    assert len(checkpoint.Checkpoints(directory, script, SETTINGS).resume) == 2
+
+
+def test_other_settings_reuse_nothing(tmp_path, script):
+    directory = str(tmp_path / "checkpoints")
+    record_plays(directory, script, [3, 5])
+    assert checkpoint.Checkpoints(directory, script, {**SETTINGS, "frame_rate": 60}).resume == []
+
+
+def test_recording_after_a_gap_is_ignored(tmp_path, script):
+    directory = str(tmp_path / "checkpoints")
+    checkpoints = record_plays(directory, script, [3])
+    checkpoints.record(2, [5], "b", "a", "a", 1.0, checkpoints.movie_path(checkpoints.plays[0]))
+    assert len(checkpoints.plays) == 1
+
+
+def test_mismatched_digest_raises(tmp_path, script):
+    directory = str(tmp_path / "checkpoints")
+    record_plays(directory, script, [3])
+    resumed = checkpoint.Checkpoints(directory, script, SETTINGS)
+    resumed.expect(resumed.resume[0], "after", "after 0")
+    with pytest.raises(checkpoint.CheckpointMismatch):
+        resumed.expect(resumed.resume[0], "after", "something else")
+
+
+def test_first_changed_line():
+    assert checkpoint.first_changed_line("a\nb\n", "a\nb\n") is None
+    assert checkpoint.first_changed_line("a\nb\n", "a\nc\n") == 2
+    assert checkpoint.first_changed_line("a\n", "a\nb\n") == 2
+
+
+SCENE = '''
+from manim import *
+
+
+class TheoremScene(Scene):
+    def construct(self):
+        square = Square()
+        self.play(Create(square), run_time=0.5)
+        self.play(square.animate.shift(RIGHT), run_time=0.5)
+        self.play({last}, run_time=0.5)
+'''
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+def test_render_resumes_after_the_unchanged_prefix(tmp_path):
+    pytest.importorskip("manim")
+    from render import RenderError, render_scene
+
+    script_path = tmp_path / "scene.py"
+    directory = str(tmp_path / "checkpoints")
+    script_path.write_text(SCENE.format(last="FadeOut(squar)"))
+    with pytest.raises(RenderError):
+        render_scene(str(script_path), str(tmp_path), checkpoint_dir=directory)
+    script_path.write_text(SCENE.format(last="FadeOut(square)"))
+    result = render_scene(str(script_path), str(tmp_path), checkpoint_dir=directory)
+    assert (result["plays"], result["resumed_plays"]) == (3, 2)
+    assert os.path.exists(result["video"])
+    assert not os.path.exists(directory)
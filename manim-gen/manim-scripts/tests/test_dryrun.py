@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip("manim")
+
+from dryrun import dry_run  # noqa: E402
+
+SCENE = '''
+from manim import *
+
+
+class TheoremScene(Scene):
+    def construct(self):
+        square = Square()
+        self.play(Create(square), run_time=0.5)
+        self.play(square.animate.shift(RIGHT), run_time=1.5)
+        self.wait(0.5)
+{extra}
+'''
+
+
+def write_scene(tmp_path, extra=""):
+    path = tmp_path / "scene.py"
+    path.write_text(SCENE.format(extra=extra))
+    return str(path)
+
+
+def test_valid_scene_reports_timing_without_writing_a_video(tmp_path):
+    report = dry_run(write_scene(tmp_path), str(tmp_path / "out"))
+    assert report["error"] is None
+    assert report["plays"] == 3
+    assert report["play_durations"] == pytest.approx([0.5, 1.5, 0.5])
+    assert report["duration"] == pytest.approx(2.5)
+    assert report["mobjects"] >= 1
+    assert not list(tmp_path.rglob("*.mp4"))
+
+
+def test_runtime_errors_name_the_script_line(tmp_path):
+    report = dry_run(write_scene(tmp_path, "        square.no_such_method()"), str(tmp_path / "out"))
+    assert report["error"].startswith("AttributeError:")
+    assert "(line 11: square.no_such_method())" in report["error"]
+    assert report["plays"] == 3
+
+
+def test_import_errors_are_reported(tmp_path):
+    path = tmp_path / "scene.py"
+    path.write_text("from manim import *\nraise ValueError('broken module')\n")
+    report = dry_run(str(path), str(tmp_path / "out"))
+    assert "Failed to import scene.py" in report["error"]
+    assert report["plays"] == 0
@@ -0,0 +1,59 @@
+import fewshot
+
+MVT = r"If $f$ is continuous on $[a, b]$ and differentiable on $(a, b)$, then $f'(c) = \frac{f(b) - f(a)}{b - a}$."
+MVT_RENAMED = r"If $g$ is continuous on $[p, q]$ and differentiable on $(p, q)$, then $g'(r) = \frac{g(q) - g(p)}{q - p}$."
+PYTHAGORAS = r"For a right triangle with legs $a, b$ and hypotenuse $c$, $a^2 + b^2 = c^2$."
+GEOMETRIC = r"$\sum_{k=0}^{\infty} r^k = \frac{1}{1 - r}$ for $|r| < 1$."
+
+SECANT = "Draw the secant through the endpoints and slide a tangent line until it is parallel to the secant."
+
+
+def test_signatures_estimate_jaccard_similarity():
+    a = fewshot.minhash({f"s{i}" for i in range(100)})
+    b = fewshot.minhash({f"s{i}" for i in range(50, 150)})  # True Jaccard similarity 1/3
+    assert fewshot.similarity(a, a) == 1.0
+    assert abs(fewshot.similarity(a, b) - 1 / 3) < 0.15
+    assert fewshot.similarity(a, fewshot.minhash(set())) == 0.0
+
+
+def test_statement_shingles_ignore_spacing_and_sizing_commands():
+    assert fewshot.tex_shingles(r"\left( x + 1 \right)") == fewshot.tex_shingles(r"(x+1)")
+    assert fewshot.tex_shingles(r"x^{2}") == fewshot.tex_shingles(r"x^{3}")  # Numbers collapse
+
+
+def test_search_ranks_the_closest_statement_first(tmp_path):
+    library = fewshot.Library(str(tmp_path / "lib"))
+    library.add(PYTHAGORAS, "Squares on the sides of the triangle.", "pythagoras script")
+    library.add(MVT, SECANT, "mvt script")
+    library.add(GEOMETRIC, "Stack shrinking rectangles.", "series script")
+
+    found = library.search(MVT_RENAMED, SECANT, k=2)
+    assert [example["script"] for example in found] == ["mvt script"]
+    assert found[0]["similarity"] > 0.5
+    # The statement alone still finds it, with a lower score
+    alone = library.search(MVT_RENAMED, "", k=2)
+    assert [example["script"] for example in alone] == ["mvt script"]
+    assert alone[0]["similarity"] < found[0]["similarity"]
+    assert library.search("Unrelated words entirely", "", k=2) == []
+
+
+def test_other_processes_see_new_entries_and_the_library_stays_bounded(tmp_path, monkeypatch):
+    root = str(tmp_path / "lib")
+    writer = fewshot.Library(root)
+    writer.add(MVT, SECANT, "mvt script")
+    fewshot._loaded.clear()  # As in a fresh process
+    reader = fewshot.Library(root)
+    assert len(reader) == 1
+
+    monkeypatch.setenv("MANIM_GEN_FEWSHOT_MAX", "2")
+    writer.add(PYTHAGORAS, "", "pythagoras script")
+    writer.add(GEOMETRIC, "", "series script")
+    assert sorted(entry["script"] for _, entry in reader._refresh().values()) == ["pythagoras script",
+                                                                                  "series script"]
+    assert not writer.add(GEOMETRIC, "", "x" * (fewshot.MAX_SCRIPT_CHARS + 1))
+
+
+def test_examples_are_formatted_for_the_prompt():
+    assert fewshot.format_examples([]) == ""
+    section = fewshot.format_examples([{"latex": "a = b", "script": "code\n"}])
+    assert "Example 1 - a = b\n```python\ncode\n```" in section
@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+
+import pytest
+
+import glyph_cache
+
+
+@pytest.fixture
+def glyphs(tmp_path, monkeypatch):
+    monkeypatch.setenv("MANIM_GEN_GLYPH_DIR", str(tmp_path / "glyphs"))
+    monkeypatch.setattr(glyph_cache, "_scratch", None)
+    monkeypatch.setattr(glyph_cache, "_stats", dict.fromkeys(glyph_cache._stats, 0))
+    return tmp_path / "glyphs"
+
+
+def compiler(tmp_path, content=b"<svg/>", delay=0.0):
+    """A stand-in for LaTeX/Pango that writes ``content`` and counts its calls."""
+    calls = []
+
+    def compile_svg():
+        calls.append(threading.get_ident())
+        time.sleep(delay)
+        path = tmp_path / f"compiled-{len(calls)}.svg"
+        path.write_bytes(content)
+        return path
+
+    return compile_svg, calls
+
+
+def test_disabled_without_a_directory(monkeypatch):
+    monkeypatch.delenv("MANIM_GEN_GLYPH_DIR", raising=False)
+    assert glyph_cache.glyph_dir() is None
+    assert glyph_cache.config_overrides() == {}
+
+
+def test_scratch_dirs_are_private_and_stable(glyphs):
+    overrides = glyph_cache.config_overrides()
+    assert overrides == glyph_cache.config_overrides()
+    assert not overrides["tex_dir"].startswith(str(glyphs))
+    assert os.path.dirname(overrides["tex_dir"]) == os.path.dirname(overrides["text_dir"])
+
+
+def test_concurrent_misses_compile_once(glyphs, tmp_path):
+    compile_svg, calls = compiler(tmp_path, delay=0.05)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(glyph_cache._shared_svg("Tex", "a.svg", compile_svg)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    target = str(glyphs / "Tex" / "a.svg")
+    assert results == [target] * 4
+    assert len(calls) == 1
+    assert (glyphs / "Tex" / "a.svg").read_bytes() == b"<svg/>"
+    assert glyph_cache.stats()["tex_misses"] == 1
+    assert glyph_cache.stats()["tex_hits"] == 3
+    assert not [name for name in os.listdir(glyphs / "Tex") if name.endswith(".tmp")]
+
+
+def test_prune_drops_least_recently_used_files(glyphs, tmp_path):
+    for i, kind in enumerate(("Tex", "texts", "mobjects")):
+        directory = glyphs / kind
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{i}.svg"
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (1000 + i, 1000 + i))
+    (glyphs / "Tex" / "half-written.svg.123.tmp").write_bytes(b"x" * 1000)
+
+    # A hit refreshes the oldest file, so the next oldest goes first
+    compile_svg, calls = compiler(tmp_path)
+    glyph_cache._shared_svg("Tex", "0.svg", compile_svg)
+    assert calls == []
+
+    assert glyph_cache.prune(250) == {"files": 2, "bytes": 200, "removed": 1}
+    assert not (glyphs / "texts" / "1.svg").exists()
+    assert (glyphs / "Tex" / "0.svg").exists()
+    assert (glyphs / "Tex" / "half-written.svg.123.tmp").exists()
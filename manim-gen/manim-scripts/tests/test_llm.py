@@ -0,0 +1,110 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+import llm
+from fake_model import FakeGenerativeModel
+
+
+def test_token_bucket_paces_beyond_the_burst():
+    bucket = llm.TokenBucket(rate=10, capacity=2)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(0.1, abs=0.01)
+    assert waits[3] == pytest.approx(0.2, abs=0.01)
+
+
+def test_refund_returns_the_token():
+    bucket = llm.TokenBucket(rate=10, capacity=1)
+    bucket.reserve()
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    bucket.refund()
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+
+
+def test_request_waits_for_its_token_even_past_the_attempt_timeout():
+    sent = []
+
+    def respond(prompt):
+        sent.append(time.monotonic())
+        return "ok"
+
+    client = llm.LLMClient("fake", FakeGenerativeModel(responses=respond), llm.TokenBucket(rate=5, capacity=1))
+    client.timeout = 0.05
+    for i in range(3):
+        client.generate(f"prompt {i}", "test")
+    gaps = [later - earlier for earlier, later in zip(sent, sent[1:])]
+    assert min(gaps) >= 0.19
+
+
+def test_wait_past_the_deadline_fails_without_sending():
+    model = FakeGenerativeModel(responses=["ok"])
+    bucket = llm.TokenBucket(rate=0.01, capacity=1)
+    client = llm.LLMClient("fake", model, bucket)
+    client.deadline = 1
+    client.generate("first", "test")
+    with pytest.raises(llm.LLMError, match="deadline"):
+        client.generate("second", "test")
+    assert model.calls == ["first"]
+    assert bucket.tokens == pytest.approx(0, abs=0.01)
+
+
+def test_memo_answers_later_jobs_but_not_a_repeat_within_one(tmp_path):
+    memo = llm.ResponseMemo(str(tmp_path), max_bytes=1024 * 1024)
+    first = FakeGenerativeModel(responses=["first"])
+    with llm.job_scope():
+        llm.LLMClient("fake", first, llm.TokenBucket(rate=100, capacity=10), memo).generate("prompt", "test")
+
+    # A warm worker keeps one client across jobs
+    second = FakeGenerativeModel(responses=["second"])
+    client = llm.LLMClient("fake", second, llm.TokenBucket(rate=100, capacity=10), memo)
+    for _ in range(2):
+        with llm.job_scope():
+            assert client.generate("prompt", "test").text == "first"
+    assert second.calls == []
+    with llm.job_scope():
+        assert client.generate("prompt", "test").text == "first"
+        # Asking again in the same job means the memoized answer was not good enough
+        assert client.generate("prompt", "test").text == "second"
+    assert (memo.hits, memo.misses) == (3, 1)
+
+
+def test_sync_and_async_calls_retry_the_same_way(monkeypatch):
+    monkeypatch.setattr(llm, "_backoff", lambda attempt: 0.0)
+    for failures, ok in ((llm.MAX_ATTEMPTS - 1, True), (llm.MAX_ATTEMPTS, False)):
+        for call in ("sync", "async"):
+            model = FakeGenerativeModel(responses=["ok"], failures=failures)
+            client = llm.LLMClient("fake", model, llm.TokenBucket(rate=1000, capacity=10))
+            if call == "sync":
+                generate = lambda: client.generate("prompt", "test")  # noqa: E731
+            else:
+                generate = lambda: asyncio.run(client.generate_async("prompt", "test"))  # noqa: E731
+            if ok:
+                assert generate().text == "ok"
+            else:
+                with pytest.raises(llm.LLMError, match="ServiceUnavailable"):
+                    generate()
+            assert len(model.calls) == min(failures + 1, llm.MAX_ATTEMPTS)
+
+
+def test_errors_that_are_not_transient_are_not_retried():
+    def respond(prompt):
+        raise ValueError("bad request")
+
+    model = FakeGenerativeModel(responses=respond)
+    with pytest.raises(ValueError):
+        llm.LLMClient("fake", model, llm.TokenBucket(rate=100, capacity=10)).generate("prompt", "test")
+    assert len(model.calls) == 1
+
+
+def test_memo_prune_drops_the_least_recently_used(tmp_path):
+    memo = llm.ResponseMemo(str(tmp_path), max_bytes=1024 * 1024)
+    for i, key in enumerate(["aa01", "bb02", "cc03"]):
+        memo.put(key, {"text": "x" * 100})
+        os.utime(memo._path(key), (i, i))
+    memo.max_bytes = 250
+    memo.prune()
+    assert memo.get("aa01") is None
+    assert memo.get("bb02") is not None and memo.get("cc03") is not None
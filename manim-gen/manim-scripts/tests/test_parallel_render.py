@@ -0,0 +1,44 @@
+import shutil
+import subprocess
+
+import pytest
+
+pytest.importorskip("manim")
+if shutil.which("ffmpeg") is None:
+    pytest.skip("needs ffmpeg", allow_module_level=True)
+
+from parallel_render import render_parallel  # noqa: E402
+from render import render_scene  # noqa: E402
+
+SCENE = '''
+from manim import *
+
+
+class TheoremScene(Scene):
+    def construct(self):
+        square = Square()
+        self.play(Create(square), run_time=0.5)
+        self.play(square.animate.shift(RIGHT), run_time=0.5)
+        self.play(Rotate(square, PI / 4), run_time=0.5)
+        self.wait(0.5)
+        self.play(FadeOut(square), run_time=0.5)
+'''
+
+
+def frame_hashes(video_path):
+    output = subprocess.run(
+        ["ffmpeg", "-loglevel", "error", "-nostdin", "-i", video_path, "-map", "0:v", "-f", "framemd5", "-"],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return [line.rsplit(",", 1)[-1].strip() for line in output.splitlines() if not line.startswith("#")]
+
+
+def test_parallel_render_decodes_to_the_sequential_frames(tmp_path):
+    script = tmp_path / "scene.py"
+    script.write_text(SCENE)
+    sequential = render_scene(str(script), str(tmp_path / "sequential"))
+    parallel = render_parallel(str(script), str(tmp_path / "parallel"), workers=3)
+    assert len(parallel["segments"]) == 3
+    hashes = frame_hashes(sequential["video"])
+    assert hashes
+    assert frame_hashes(parallel["video"]) == hashes
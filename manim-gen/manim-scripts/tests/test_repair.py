@@ -0,0 +1,57 @@
+import pytest
+
+from repair import PatchError, apply_unified_diff, extract_diff, number_lines
+
+SCRIPT = """from manim import *
+
+
+class TheoremScene(Scene):
+    def construct(self):
+        square = Square()
+        self.play(Create(squar))
+        self.wait(1)
+"""
+
+
+def test_applies_a_hunk_with_shifted_line_numbers_and_trailing_whitespace():
+    diff = """--- a/theorem_animation.py
++++ b/theorem_animation.py
+@@ -9,3 +9,3 @@
+         square = Square()   
+-        self.play(Create(squar))
++        self.play(Create(square))
+         self.wait(1)
+"""
+    patched = apply_unified_diff(SCRIPT, diff)
+    assert [line.rstrip() for line in patched.splitlines()] == SCRIPT.replace("squar)", "square)").splitlines()
+
+
+def test_strips_the_line_numbers_the_prompt_showed():
+    numbered = number_lines(SCRIPT).splitlines()
+    diff = "\n".join(["@@ -7,1 +7,2 @@", f"-{numbered[6]}", "+        self.play(Create(square))",
+                      "+        self.play(square.animate.shift(RIGHT))"])
+    patched = apply_unified_diff(SCRIPT, diff)
+    assert "Create(square))\n        self.play(square.animate.shift(RIGHT))\n        self.wait(1)" in patched
+
+
+def test_later_hunks_follow_the_lines_earlier_ones_added():
+    diff = """@@ -6,1 +6,2 @@
+         square = Square()
++        circle = Circle()
+@@ -7,1 +8,1 @@
+-        self.play(Create(squar))
++        self.play(Create(square), Create(circle))
+"""
+    patched = apply_unified_diff(SCRIPT, diff).splitlines()
+    assert patched[5:8] == ["        square = Square()", "        circle = Circle()",
+                            "        self.play(Create(square), Create(circle))"]
+
+
+def test_context_that_is_not_in_the_script_is_rejected():
+    with pytest.raises(PatchError):
+        apply_unified_diff(SCRIPT, "@@ -7,1 +7,1 @@\n-        self.play(Write(text))\n+        pass\n")
+
+
+def test_extract_diff_takes_the_fenced_block():
+    assert extract_diff("Fix:\n```diff\n@@ -1 +1 @@\n-a\n+b\n```\n") == "@@ -1 +1 @@\n-a\n+b\n"
+    assert extract_diff("```python\nprint()\n```") is None
@@ -0,0 +1,97 @@
+import ast
+import os
+import threading
+import time
+
+import pytest
+
+import sandbox
+
+HELPER_TWICE = '''
+from manim import *
+
+
+class TheoremScene(Scene):
+    def construct(self):
+        self.helper()
+        self.play(Create(Circle()), run_time=2)
+        self.helper()
+
+    def helper(self):
+        self.wait(100)
+'''
+
+
+@pytest.fixture(autouse=True)
+def budget(monkeypatch):
+    monkeypatch.setenv("MANIM_GEN_MAX_RUN_TIME", "30")
+    monkeypatch.setenv("MANIM_GEN_MAX_SCENE_SECONDS", "180")
+
+
+def test_repeated_helper_is_clamped_once():
+    code, problem = sandbox.check_budget(HELPER_TWICE)
+    ast.parse(code)
+    assert "self.wait(30)" in code
+    assert "100" not in code
+    assert problem is None
+    assert sandbox.estimate_duration(code)["seconds"] == 62
+
+
+def test_repeated_helper_over_the_scene_limit_is_reported(monkeypatch):
+    monkeypatch.setenv("MANIM_GEN_MAX_SCENE_SECONDS", "50")
+    code, problem = sandbox.check_budget(HELPER_TWICE)
+    ast.parse(code)
+    assert problem.startswith("Scene budget")
+
+
+def test_overlapping_replacements_are_refused():
+    code = "self.wait(max(100, 200))\n"
+    call = ast.parse(code).body[0].value
+    inner = call.args[0].args[0]
+    with pytest.raises(ValueError):
+        sandbox._replace_literals(code, [(call.args[0], "30"), (inner, "30")])
+
+
+def test_within_budget_is_unchanged():
+    code = HELPER_TWICE.replace("self.wait(100)", "self.wait(5)")
+    assert sandbox.check_budget(code) == (code, None)
+
+
+def _spawn_and_hang(pid_file):
+    import subprocess
+
+    child = subprocess.Popen(["sleep", "60"])
+    with open(pid_file, "w") as f:
+        f.write(f"{os.getpgid(0)} {child.pid}")
+    time.sleep(60)
+
+
+@pytest.mark.skipif(not sandbox.enabled() or not os.path.isdir("/proc"), reason="needs fork and /proc")
+def test_timeout_kills_what_the_child_started_in_the_callers_group(tmp_path):
+    pid_file = tmp_path / "pids"
+    with pytest.raises(sandbox.SandboxError, match="wall_time"):
+        sandbox.run(_spawn_and_hang, str(pid_file), timeout=1)
+    group, grandchild = map(int, pid_file.read_text().split())
+    assert group == os.getpgid(0)
+    for _ in range(50):
+        try:
+            os.kill(grandchild, 0)
+        except ProcessLookupError:
+            break
+        time.sleep(0.05)
+    else:
+        pytest.fail("subprocess of the sandboxed call survived the timeout")
+
+
+def _hang():
+    time.sleep(60)
+
+
+@pytest.mark.skipif(not sandbox.enabled(), reason="needs fork")
+def test_cancel_kills_the_child_early():
+    cancel = threading.Event()
+    threading.Timer(0.2, cancel.set).start()
+    started = time.monotonic()
+    with pytest.raises(sandbox.Cancelled):
+        sandbox.run(_hang, timeout=30, cancel=cancel)
+    assert time.monotonic() - started < 2
@@ -0,0 +1,64 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("manim")
+
+from manim import Axes, ValueTracker  # noqa: E402
+
+from scene_helpers import moving_dot, riemann_rectangles, sample_graph, tangent_line, vector_field  # noqa: E402
+
+
+@pytest.fixture
+def axes():
+    return Axes(x_range=[-2, 4, 1], y_range=[-1, 10, 1])
+
+
+def test_samples_match_the_axes_and_the_function(axes):
+    graph = sample_graph(axes, lambda x: x ** 2, [0, 3], samples=1001)
+    for x in (0.0, 1.3, 2.9):
+        assert np.allclose(graph.point(x), axes.coords_to_point(x, x ** 2), atol=1e-3)
+        assert graph.y(x) == pytest.approx(x ** 2, abs=1e-3)
+        assert graph.slope(x) == pytest.approx(2 * x, abs=1e-2)
+    # Outside the sampled range the ends are held
+    assert np.allclose(graph.point(-5), axes.coords_to_point(0, 0))
+    assert np.allclose(graph.point(9), axes.coords_to_point(3, 9))
+
+
+def test_scalar_only_functions_are_evaluated_per_point(axes):
+    graph = sample_graph(axes, math.sin, [0, 3])
+    assert graph.y(1.0) == pytest.approx(math.sin(1.0), abs=1e-4)
+
+
+def test_updaters_follow_the_tracker(axes):
+    graph = sample_graph(axes, lambda x: x ** 2, [0, 3])
+    tracker = ValueTracker(1)
+    dot = moving_dot(graph, tracker)
+    line = tangent_line(graph, tracker, length=2)
+    tracker.set_value(2)
+    dot.update()
+    line.update()
+    assert np.allclose(dot.get_center(), graph.point(2))
+    assert np.allclose(line.get_center(), graph.point(2))
+    assert line.get_length() == pytest.approx(2)
+    assert np.allclose(line.get_unit_vector(), graph.direction(2))
+
+
+def test_riemann_rectangles_use_the_sample_point(axes):
+    for sample, x in (("left", 1.0), ("right", 1.5), ("mid", 1.25)):
+        rects = riemann_rectangles(axes, lambda x: x ** 2, [1, 2], n=2, sample=sample)
+        assert len(rects) == 2
+        top = rects[0].get_vertices()[:, 1].max()
+        assert top == pytest.approx(axes.coords_to_point(0, x ** 2)[1])
+
+
+def test_vector_field_draws_three_curves_per_nonzero_arrow(axes):
+    tracker = ValueTracker(0)
+    field = vector_field(axes, lambda x, y, t: (x * t, y * 0), x_range=[-1, 1], y_range=[0, 1], step=1,
+                         tracker=tracker)
+    assert len(field.points) == 0  # Every vector is zero at t = 0
+    tracker.set_value(1)
+    field.update()
+    # Arrows at x = -1 and x = 1 on both rows; x = 0 still has no length
+    assert len(field.points) == 4 * 3 * 4
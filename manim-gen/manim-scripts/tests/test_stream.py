@@ -0,0 +1,35 @@
+import shutil
+
+import pytest
+
+import progress
+import stream
+
+
+@pytest.fixture
+def events(monkeypatch):
+    published = []
+    monkeypatch.setattr(progress, "_listeners", [published.append])
+    return published
+
+
+def test_codec_mime_reads_the_avcc_profile(tmp_path):
+    movie = tmp_path / "segment.mp4"
+    movie.write_bytes(b"\0" * 32 + b"avcC" + bytes([1, 0x64, 0x00, 0x1e]) + b"\0" * 16)
+    assert stream.codec_mime(str(movie)) == 'video/mp4; codecs="avc1.64001e"'
+    movie.write_bytes(b"\0" * 64)
+    assert stream.codec_mime(str(movie)) is None
+
+
+@pytest.mark.skipif(shutil.which("false") is None, reason="needs false(1)")
+def test_failed_remux_stops_the_stream_and_reports_it_incomplete(tmp_path, events):
+    segments = stream.SegmentStream(str(tmp_path / "stream"), ffmpeg="false")
+    segments.add(str(tmp_path / "partial.mp4"), 1.0)
+    segments.add(str(tmp_path / "partial.mp4"), 1.0)
+    assert segments.finish() == {"segments": 0, "complete": False}
+    assert events == []
+    assert list((tmp_path / "stream").iterdir()) == []
+
+
+def test_an_empty_stream_is_complete(tmp_path):
+    assert stream.SegmentStream(str(tmp_path / "stream")).finish() == {"segments": 0, "complete": True}
@@ -0,0 +1,49 @@
+from tex_index import TexIndex
+from tex_scan import extract_all
+
+PREAMBLE = "\\newtheorem{thm}{Theorem}\n\\newtheorem{lem}[thm]{Lemma}\n"
+CHAPTER = "\\begin{thm}[Rolle]\nIf $f(a) = f(b)$ then $f'(c) = 0$.\n\\end{thm}\n"
+
+
+def kinds(items):
+    return [item["kind"] for item in items]
+
+
+def test_aliases_declared_in_another_file_apply(tmp_path):
+    preamble, chapter = tmp_path / "preamble.tex", tmp_path / "chapter.tex"
+    preamble.write_text(PREAMBLE)
+    chapter.write_text(CHAPTER)
+    result = TexIndex().update([str(chapter), str(preamble)])
+    assert kinds(result["files"][str(chapter)]) == ["theorem"]
+    assert result["files"][str(chapter)][0]["name"] == "Rolle"
+
+
+def test_new_alias_rescans_files_that_use_it(tmp_path):
+    preamble, chapter = tmp_path / "preamble.tex", tmp_path / "chapter.tex"
+    preamble.write_text("")
+    chapter.write_text(CHAPTER)
+    index = TexIndex()
+    assert index.update([str(preamble), str(chapter)])["files"][str(chapter)] == []
+
+    # Only the preamble is refreshed (e.g. on save); the chapter comes back rescanned
+    result = index.update([str(preamble)], sources={str(preamble): PREAMBLE})
+    assert str(chapter) in result["rescanned"]
+    assert kinds(result["files"][str(chapter)]) == ["theorem"]
+
+
+def test_unchanged_workspace_is_not_rescanned(tmp_path):
+    preamble, chapter = tmp_path / "preamble.tex", tmp_path / "chapter.tex"
+    preamble.write_text(PREAMBLE)
+    chapter.write_text(CHAPTER)
+    index = TexIndex()
+    index.update([str(preamble), str(chapter)])
+    result = index.update([str(preamble), str(chapter)])
+    assert result["rescanned"] == []
+    assert kinds(result["files"][str(chapter)]) == ["theorem"]
+
+
+def test_extract_all_shares_aliases_between_files(tmp_path):
+    preamble, chapter = tmp_path / "preamble.tex", tmp_path / "chapter.tex"
+    preamble.write_text(PREAMBLE)
+    chapter.write_text(CHAPTER)
+    assert kinds(extract_all([str(chapter), str(preamble)])) == ["theorem"]
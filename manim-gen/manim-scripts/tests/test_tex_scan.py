@@ -0,0 +1,62 @@
+from batch import job_name
+from tex_scan import extract_all, scan_tex
+
+MAIN = r"""\documentclass{article}
+\newtheorem{thm}{Theorem}
+\begin{document}
+% \begin{lemma} commented out \end{lemma}
+\begin{thm}[Mean value theorem]
+If $f$ is differentiable on $(a, b)$ then $f'(c) = \frac{f(b) - f(a)}{b - a}$.
+\end{thm}
+\input{chapter}
+\begin{proposition*}A one-line proposition.\end{proposition*}
+\begin{remark}Not collected.\end{remark}
+\end{document}
+"""
+
+CHAPTER = r"""\begin{lemma}
+$\sum_{k=1}^n k = \frac{n(n+1)}{2}$
+\end{lemma}
+\input{main}
+"""
+
+
+def write_project(tmp_path):
+    (tmp_path / "main.tex").write_text(MAIN)
+    (tmp_path / "chapter.tex").write_text(CHAPTER)
+    return str(tmp_path / "main.tex")
+
+
+def test_environments_are_found_in_document_order_through_inputs(tmp_path):
+    items = list(scan_tex(write_project(tmp_path)))
+    assert [(item["kind"], item["name"]) for item in items] == [
+        ("theorem", "Mean value theorem"), ("lemma", None), ("proposition", None)
+    ]
+    theorem, lemma, proposition = items
+    assert (theorem["line"], theorem["end_line"]) == (5, 7)
+    assert theorem["latex"].startswith(r"\begin{thm}[Mean value theorem]")
+    assert theorem["latex"].endswith(r"\end{thm}")
+    assert lemma["file"] == str(tmp_path / "chapter.tex")
+    assert lemma["body"] == r"$\sum_{k=1}^n k = \frac{n(n+1)}{2}$"
+    assert proposition["body"] == "A one-line proposition."
+
+
+def test_includes_can_be_skipped_and_unsaved_text_scanned(tmp_path):
+    main = write_project(tmp_path)
+    assert [item["kind"] for item in scan_tex(main, follow_includes=False)] == ["theorem", "proposition"]
+    edited = MAIN.replace(r"\begin{remark}Not collected.\end{remark}", r"\begin{definition}New.\end{definition}")
+    kinds = [item["kind"] for item in scan_tex(main, follow_includes=False, text=edited)]
+    assert kinds == ["theorem", "proposition", "definition"]
+
+
+def test_extract_all_applies_aliases_across_files(tmp_path):
+    (tmp_path / "preamble.tex").write_text(r"\newtheorem{lem}{Lemma}")
+    (tmp_path / "notes.tex").write_text("\\begin{lem}\nShared alias.\n\\end{lem}\n")
+    items = extract_all([str(tmp_path / "notes.tex"), str(tmp_path / "preamble.tex")])
+    assert [(item["kind"], item["body"]) for item in items] == [("lemma", "Shared alias.")]
+
+
+def test_job_names_are_readable_and_unique():
+    assert job_name(4, {"name": "Mean Value Theorem (MVT)", "kind": "theorem"}) == "004-mean-value-theorem-mvt"
+    assert job_name(12, {"name": None, "kind": "lemma"}) == "012-lemma"
+    assert len(job_name(0, {"name": "x" * 100, "kind": "theorem"})) == len("000-") + 48
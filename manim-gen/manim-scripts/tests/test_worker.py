@@ -0,0 +1,100 @@
+import asyncio
+import io
+import json
+import sys
+import threading
+import time
+
+import pytest
+
+import llm
+import progress
+import worker
+from candidates import generate_candidates
+from fake_model import FakeGenerativeModel
+
+
+class LoopBoundModel(FakeGenerativeModel):
+    """Like the live async transport: unusable from any event loop but the first one."""
+
+    def __init__(self, name):
+        super().__init__(name, responses=["```python\nprint('scene')\n```"])
+        self.loop = None
+
+    async def generate_content_async(self, prompt, **kwargs):
+        loop = asyncio.get_running_loop()
+        self.loop = self.loop or loop
+        if loop is not self.loop:
+            raise RuntimeError("transport is attached to a different event loop")
+        return await super().generate_content_async(prompt, **kwargs)
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Run ``worker.serve`` in-process over the given request lines and return its replies."""
+    monkeypatch.setattr(progress, "_listeners", [])
+    monkeypatch.delenv("MANIM_GEN_EVENTS_FD", raising=False)
+    # The real preload imports manim, which these jobs don't need
+    monkeypatch.setattr(worker, "_preload", lambda: None)
+
+    def run(lines, handlers, protocol=None):
+        protocol = protocol or io.StringIO()
+        monkeypatch.setattr(worker, "_claim_stdout", lambda: protocol)
+        monkeypatch.setattr(sys, "stdin", io.StringIO("".join(f"{line}\n" for line in lines)))
+        worker.serve(handlers)
+        replies = [json.loads(line) for line in protocol.getvalue().splitlines()]
+        return [reply for reply in replies if "ok" in reply]
+
+    return run
+
+
+def test_two_candidate_jobs_share_a_warm_client(serve, monkeypatch):
+    for name in ("MANIM_GEN_FAKE_MODEL", "MANIM_GEN_REPLAY", "MANIM_GEN_RECORD", "MANIM_GEN_LLM_CACHE_DIR"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(llm, "_clients", {})
+
+    def candidates(job, emit):
+        model = llm.client("loop-bound", LoopBoundModel)
+        outcome = generate_candidates(model, job["prompt"], lambda text: text, lambda code, stop: None, n=2)
+        return {"winner": outcome["winner"], "failures": [problem for _, problem in outcome["failures"]]}
+
+    replies = serve([json.dumps({"id": i, "op": "candidates", "prompt": f"job {i}"}) for i in (1, 2)],
+                    {"candidates": candidates})
+    assert [reply["id"] for reply in replies] == [1, 2]
+    for reply in replies:
+        assert reply["ok"], reply
+        assert reply["result"]["winner"], reply
+        assert reply["result"]["failures"] == []
+
+
+def test_non_object_requests_get_a_protocol_error(serve):
+    replies = serve(["[]", '"x"', "7", "not json", json.dumps({"id": 1, "op": "ping"})], {})
+    assert [reply["ok"] for reply in replies] == [False, False, False, False, True]
+    assert all(reply["error"].startswith("Malformed request") for reply in replies[:4])
+    assert replies[-1]["id"] == 1
+
+
+class TricklingStream(io.StringIO):
+    """Writes one character at a time, yielding in between, like a pipe under load."""
+
+    def write(self, text):
+        for char in text:
+            super().write(char)
+            time.sleep(0)
+        return len(text)
+
+
+def test_events_from_threads_do_not_interleave_with_replies(serve):
+    def noisy(job, emit):
+        threads = [threading.Thread(target=lambda: [emit("validation", n=n) for n in range(20)]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return {}
+
+    protocol = TricklingStream()
+    serve([json.dumps({"id": 1, "op": "noisy"})], {"noisy": noisy}, protocol)
+    lines = [json.loads(line) for line in protocol.getvalue().splitlines()]
+    assert sum(line.get("event") == "validation" for line in lines) == 80
+    assert lines[-1]["ok"]
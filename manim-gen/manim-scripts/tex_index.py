@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+"""Incremental index of the theorem-like environments in a workspace's .tex files.
+
+Each file is stored with its mtime, size and content hash. ``update`` only
+rereads files whose mtime or size changed and only rescans those whose hash
+changed, so refreshing a large workspace after a single edit costs one scan.
+Unsaved editor buffers can be passed as ``sources`` and are compared by hash.
+Files are scanned on their own (``\\input`` is not followed) since every file
+in the workspace is indexed anyway, but against the ``\\newtheorem`` aliases
+declared across the whole workspace, so an environment defined in a preamble
+or another input file is recognized everywhere.
+"""
+import hashlib
+import json
+import os
+import sys
+
+from tex_scan import scan_tex, theorem_aliases
+
+# Bump when the stored item format changes so old indexes are rebuilt.
+INDEX_VERSION = 2
+
+_open_indexes = {}
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class TexIndex:
+    """Environments per file, persisted as JSON at ``path`` (in memory only if None)."""
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.files = {}
+        if path:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == INDEX_VERSION:
+                    self.files = data["files"]
+            except (OSError, ValueError):
+                pass
+
+    def aliases(self) -> dict:
+        """Every ``\\newtheorem`` alias declared anywhere in the indexed workspace."""
+        table = {}
+        for path in sorted(self.files):
+            table.update(self.files[path]["aliases"])
+        return table
+
+    def update(self, paths: list[str], sources: dict = None) -> dict:
+        """Bring ``paths`` up to date and return their environments.
+
+        Returns ``files`` (path to items for every requested path that
+        exists, plus any other indexed file that had to be rescanned),
+        ``rescanned`` (paths whose items were recomputed) and ``removed``
+        (indexed paths that no longer exist).
+        """
+        sources = sources or {}
+        result = {"files": {}, "rescanned": [], "removed": []}
+        requested, changed = [], {}
+        for path in map(os.path.abspath, paths):
+            text = sources.get(path)
+            entry = self.files.get(path)
+            if text is not None:
+                requested.append(path)
+                stat = None
+                digest = _sha256(text.encode("utf-8"))
+            else:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    if self.files.pop(path, None) is not None:
+                        result["removed"].append(path)
+                    continue
+                requested.append(path)
+                if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                    continue
+                with open(path, "rb") as f:
+                    data = f.read()
+                digest = _sha256(data)
+                text = data.decode("utf-8", errors="replace")
+
+            if not entry or entry["sha256"] != digest:
+                entry = {"items": [], "aliases": theorem_aliases(text), "alias_key": None}
+                changed[path] = text
+            entry.update(
+                sha256=digest,
+                # Buffers have no mtime; the next check from disk falls back to the hash
+                mtime=stat.st_mtime if stat else None,
+                size=stat.st_size if stat else None,
+            )
+            self.files[path] = entry
+
+        # Theorems declared in a preamble or another \input file apply to every file, so a
+        # changed alias table means rescanning the whole workspace, not just the edited file
+        table = self.aliases()
+        alias_key = _sha256(json.dumps(table, sort_keys=True).encode("utf-8"))
+        for path, entry in list(self.files.items()):
+            if path not in changed and entry["alias_key"] == alias_key:
+                continue
+            text = changed.get(path)
+            if text is None:
+                try:
+                    with open(path, encoding="utf-8", errors="replace") as f:
+                        text = f.read()
+                except OSError:
+                    continue
+            entry["items"] = list(scan_tex(path, follow_includes=False, text=text, aliases=table))
+            entry["alias_key"] = alias_key
+            result["rescanned"].append(path)
+            result["files"][path] = entry["items"]
+        for path in requested:
+            result["files"][path] = self.files[path]["items"]
+        return result
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "files": self.files}, f)
+        os.replace(tmp_path, self.path)
+
+
+def update_index(index_path: str, paths: list[str], sources: dict = None) -> dict:
+    """Worker entry point: update the index at ``index_path``, keeping it loaded between calls."""
+    index = _open_indexes.get(index_path)
+    if index is None:
+        index = _open_indexes[index_path] = TexIndex(index_path)
+    result = index.update(paths, sources)
+    if result["rescanned"] or result["removed"]:
+        index.save()
+    return result
+
+
+if __name__ == '__main__':
+    # Usage: python tex_index.py <index.json> <file.tex> [more.tex ...]
+    if len(sys.argv) < 3:
+        print("Usage: tex_index.py <index.json> <file.tex> [more.tex ...]", file=sys.stderr)
+        sys.exit(1)
+    summary = update_index(sys.argv[1], sys.argv[2:])
+    print(json.dumps({
+        "environments": sum(len(items) for items in summary["files"].values()),
+        "rescanned": summary["rescanned"],
+        "removed": summary["removed"],
+    }, indent=2))
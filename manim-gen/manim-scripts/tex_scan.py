@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""Streaming extraction of theorem-like environments from LaTeX projects.
+
+``scan_tex`` reads a .tex file line by line and yields every theorem, lemma,
+proposition and definition with its source location. ``\\input`` and
+``\\include`` are followed in place (paths resolve against the root file's
+directory, as LaTeX does), and environments declared with ``\\newtheorem``
+under one of those titles (``\\newtheorem{thm}{Theorem}``) are recognized
+too. Only the environment being collected is held in memory.
+"""
+import io
+import json
+import os
+import re
+import sys
+
+ENVIRONMENTS = ("theorem", "lemma", "proposition", "definition")
+
+_TOKEN = re.compile(
+    r'\\(?P<cmd>begin|end)\{(?P<env>[A-Za-z]+)\*?\}'
+    r'|\\(?P<include>input|include)\{(?P<path>[^}]*)\}'
+    r'|\\newtheorem\*?\{(?P<alias>[A-Za-z]+)\}(?:\[[^\]]*\])?\{(?P<title>[^}]*)\}'
+)
+_COMMENT = re.compile(r'(?<!\\)%.*$')
+_NAME = re.compile(r'^\s*\[(.*?)\]', re.DOTALL)
+
+
+def _resolve(path: str, base_dir: str) -> str | None:
+    candidate = os.path.join(base_dir, path)
+    for option in (candidate, candidate + ".tex"):
+        if os.path.isfile(option):
+            return option
+    return None
+
+
+def _item(kind, file, line, end_line, latex, body) -> dict:
+    name = _NAME.match(body)
+    return {
+        "kind": kind,
+        "name": name.group(1).strip() if name else None,
+        "file": file,
+        "line": line,
+        "end_line": end_line,
+        "latex": latex.strip(),
+        "body": body.strip(),
+    }
+
+
+def theorem_aliases(text: str, environments=ENVIRONMENTS) -> dict:
+    """The ``\\newtheorem`` declarations in ``text`` for ``environments``, as alias -> kind."""
+    aliases = {}
+    for raw in text.splitlines():
+        for token in _TOKEN.finditer(_COMMENT.sub("", raw)):
+            if token.group("alias") and token.group("title").strip().lower() in environments:
+                aliases[token.group("alias")] = token.group("title").strip().lower()
+    return aliases
+
+
+def scan_tex(path: str, environments=ENVIRONMENTS, follow_includes: bool = True,
+             text: str = None, aliases: dict = None, _state=None):
+    """Yield each theorem-like environment in ``path`` and the files it includes.
+
+    Items are dicts with ``kind`` (the canonical environment, e.g. ``"lemma"``
+    for a ``\\newtheorem{lem}{Lemma}`` alias), optional ``name`` from
+    ``[...]``, ``file``, 1-based ``line``/``end_line``, the full ``latex`` of
+    the environment and its ``body``. ``text`` scans that content (e.g. an
+    unsaved editor buffer) in place of the file on disk. ``aliases`` adds
+    ``\\newtheorem`` declarations made elsewhere, e.g. in a preamble file
+    (see ``theorem_aliases``).
+    """
+    if _state is None:
+        _state = {
+            "base_dir": os.path.dirname(os.path.abspath(path)),
+            "aliases": {**{env: env for env in environments}, **(aliases or {})},
+            "seen": set(),
+        }
+    path = os.path.abspath(path)
+    if path in _state["seen"]:
+        return  # \input cycles
+    _state["seen"].add(path)
+    aliases = _state["aliases"]
+
+    current = None  # (env, kind, start line, collected text)
+    source = io.StringIO(text) if text is not None else open(path, encoding="utf-8", errors="replace")
+    with source as f:
+        for lineno, raw in enumerate(f, 1):
+            line = _COMMENT.sub("", raw.rstrip("\n"))
+            pos = 0
+            for token in _TOKEN.finditer(line):
+                if current is not None:
+                    env, kind, start, text = current
+                    if token.group("cmd") == "end" and token.group("env") == env:
+                        text += line[pos:token.end()]
+                        begin = re.match(r'\\begin\{[^}]*\}', text)
+                        body = text[begin.end():len(text) - len(token.group(0))]
+                        yield _item(kind, path, start, lineno, text, body)
+                        current = None
+                        pos = token.end()
+                    continue
+
+                if token.group("alias") and token.group("title").strip().lower() in environments:
+                    aliases[token.group("alias")] = token.group("title").strip().lower()
+                elif token.group("include") and follow_includes:
+                    included = _resolve(token.group("path").strip(), _state["base_dir"])
+                    if included:
+                        yield from scan_tex(included, environments, _state=_state)
+                elif token.group("cmd") == "begin" and token.group("env") in aliases:
+                    current = (token.group("env"), aliases[token.group("env")], lineno, "")
+                    pos = token.start()
+
+            if current is not None:
+                env, kind, start, text = current
+                current = (env, kind, start, text + line[pos:] + "\n")
+
+
+def extract_all(paths, environments=ENVIRONMENTS) -> list[dict]:
+    """Every theorem-like environment in ``paths``, in document order.
+
+    ``\\newtheorem`` aliases declared in any of the files apply to all of them.
+    """
+    paths = list(paths)
+    aliases = {}
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            aliases.update(theorem_aliases(f.read(), environments))
+    return [item for path in paths for item in scan_tex(path, environments, aliases=aliases)]
+
+
+if __name__ == '__main__':
+    # Usage: python tex_scan.py <main.tex> [more.tex ...]
+    if len(sys.argv) < 2:
+        print("Usage: tex_scan.py <main.tex> [more.tex ...]", file=sys.stderr)
+        sys.exit(1)
+    for found in extract_all(sys.argv[1:]):
+        print(json.dumps(found))
@@ -0,0 +1,113 @@
+"""Long-lived worker loop that serves pipeline jobs as JSON lines over stdin/stdout.
+
+Each request is one JSON object per line::
+
+    {"id": 7, "op": "render", "latex": "...", "out_dir": "..."}
+
+and gets exactly one reply line with the same id::
+
+    {"id": 7, "ok": true, "elapsed": 12.3, "result": {...}}
+    {"id": 7, "ok": false, "elapsed": 0.4, "error": "..."}
+
+While a job runs, its progress events (see ``progress``) are tagged with the
+job's id and written to the events stream named by ``MANIM_GEN_EVENTS_FD``::
+
+    {"event": "stage_end", "job": 7, "stage": "intuition", "seconds": 3.1, ...}
+
+Without an events stream they are interleaved on stdout instead, as lines
+with an ``event`` field and the job's ``id``. Handlers are called as
+``handler(job, emit)`` where ``emit`` is ``progress.emit``.
+
+The built-in ``ping`` op does no work and is used to measure round-trip
+overhead and to check that a worker is alive. With ``MANIM_GEN_LOW_PRIORITY``
+set the worker lowers its own CPU priority, for background work.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+
+import progress
+
+
+def _claim_stdout():
+    """Reserve the real stdout for protocol replies and send everything else to stderr.
+
+    Manim, ffmpeg and our own progress prints all write to stdout; redirecting
+    fd 1 keeps them from corrupting the JSON-lines channel.
+    """
+    sys.stdout.flush()
+    protocol = os.fdopen(os.dup(1), "w", encoding="utf-8", buffering=1)
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    return protocol
+
+
+def _preload():
+    """Import the heavy modules up front so the first job doesn't pay for them."""
+    import numpy  # noqa: F401
+    import render  # noqa: F401  (pulls in manim, Cairo and Pango)
+
+
+def serve(handlers: dict) -> None:
+    """Dispatch JSON-lines requests from stdin to ``handlers`` until EOF."""
+    started = time.perf_counter()
+    if os.getenv("MANIM_GEN_LOW_PRIORITY") and hasattr(os, "nice"):
+        os.nice(10)  # Background work yields the CPU to interactive renders
+    protocol = _claim_stdout()
+    _preload()
+
+    # Progress listeners reply from validator and render threads too
+    protocol_lock = threading.Lock()
+
+    def reply(message: dict) -> None:
+        line = json.dumps(message) + "\n"
+        with protocol_lock:
+            protocol.write(line)
+
+    if not os.getenv("MANIM_GEN_EVENTS_FD"):
+        progress.add_listener(lambda event: reply({"id": event.get("job"), **event}))
+
+    reply({"event": "ready", "pid": os.getpid(), "startup": time.perf_counter() - started})
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            job = json.loads(line)
+        except ValueError as e:
+            reply({"id": None, "ok": False, "error": f"Malformed request: {e}"})
+            continue
+        if not isinstance(job, dict):
+            reply({"id": None, "ok": False, "error": f"Malformed request: expected an object, got {line[:80]}"})
+            continue
+
+        job_id = job.get("id")
+        op = job.get("op", "render")
+        job_started = time.perf_counter()
+        try:
+            if op == "ping":
+                result = {}
+            elif op in handlers:
+                with progress.job_context(job_id):
+                    result = handlers[op](job, progress.emit)
+            else:
+                raise ValueError(f"Unknown op: {op}")
+        except Exception as e:
+            traceback.print_exc()
+            reply({
+                "id": job_id,
+                "ok": False,
+                "elapsed": time.perf_counter() - job_started,
+                "error": str(e),
+            })
+            continue
+        reply({
+            "id": job_id,
+            "ok": True,
+            "elapsed": time.perf_counter() - job_started,
+            "result": result,
+        })
@@ -0,0 +1,252 @@
+const fs = require('fs');
+const path = require('path');
+
+const INDEX_FILE = 'index.json';
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+/**
+ * Total size of the files under `dir`.
+ * @param {string} dir
+ * @returns {Promise<number>}
+ */
+async function dirSize(dir) {
+  let total = 0;
+  let entries;
+  try {
+    entries = await fs.promises.readdir(dir, { withFileTypes: true });
+  } catch {
+    return 0;
+  }
+  for (const entry of entries) {
+    const full = path.join(dir, entry.name);
+    if (entry.isDirectory()) {
+      total += await dirSize(full);
+    } else if (entry.isFile()) {
+      try {
+        total += (await fs.promises.stat(full)).size;
+      } catch {
+        // Removed while we were looking
+      }
+    }
+  }
+  return total;
+}
+
+/**
+ * Size- and age-bounded store of per-job output directories under `root`,
+ * the extension-side counterpart of manim-scripts/cache.py.
+ *
+ * The index (`root/index.json`) keeps each job's size and last use in
+ * least- to most-recently-used order, so lookups, touches and evictions
+ * never walk the directory; only a finished job's own directory is measured.
+ * `open` reconciles the index with the directories actually on disk.
+ * Directories that are in use (a running job, an open panel) are pinned and
+ * never evicted.
+ */
+class ArtifactStore {
+  /**
+   * @param {string} root
+   * @param {{ maxBytes: () => number, maxAgeMs: () => number }} limits - Read on every eviction pass
+   */
+  constructor(root, { maxBytes, maxAgeMs }) {
+    this.root = root;
+    this.maxBytes = maxBytes;
+    this.maxAgeMs = maxAgeMs;
+    this.entries = new Map();
+    this.pins = new Map();
+    this.totalBytes = 0;
+    this.evictions = 0;
+    this.saving = Promise.resolve();
+    this.opened = null;
+  }
+
+  /**
+   * Load the index and reconcile it with disk. Safe to call repeatedly.
+   * @returns {Promise<void>}
+   */
+  open() {
+    if (!this.opened) {
+      this.opened = this._open();
+    }
+    return this.opened;
+  }
+
+  async _open() {
+    await fs.promises.mkdir(this.root, { recursive: true });
+    let stored = {};
+    try {
+      stored = JSON.parse(await fs.promises.readFile(path.join(this.root, INDEX_FILE), 'utf8'));
+    } catch {
+      // Missing or corrupt; rebuilt from disk below
+    }
+
+    const onDisk = new Set();
+    for (const entry of await fs.promises.readdir(this.root, { withFileTypes: true })) {
+      if (entry.isDirectory()) {
+        onDisk.add(entry.name);
+      } else if (entry.name !== INDEX_FILE) {
+        // Leftover temporary index files
+        await fs.promises.rm(path.join(this.root, entry.name), { force: true });
+      }
+    }
+    const entries = [];
+    for (const [key, entry] of Object.entries(stored)) {
+      if (onDisk.has(key)) {
+        entries.push([key, entry]);
+        onDisk.delete(key);
+      }
+    }
+    // Directories the index doesn't know, e.g. from a session that didn't shut down cleanly
+    for (const key of onDisk) {
+      const dir = path.join(this.root, key);
+      const { mtimeMs } = await fs.promises.stat(dir);
+      entries.push([key, { size: await dirSize(dir), atime: mtimeMs }]);
+    }
+
+    entries.sort((a, b) => a[1].atime - b[1].atime);
+    for (const [key, entry] of entries) {
+      this.entries.set(key, entry);
+      this.totalBytes += entry.size;
+    }
+    await this._evict();
+  }
+
+  /**
+   * @param {string} key
+   * @returns {string}
+   */
+  dir(key) {
+    return path.join(this.root, key);
+  }
+
+  /**
+   * The index entry for `key`, if its directory exists.
+   * @param {string} key
+   * @returns {{ size: number, atime: number } | undefined}
+   */
+  lookup(key) {
+    return this.entries.get(key);
+  }
+
+  /**
+   * Create (or reuse) the directory for `key`, mark it recently used and pin
+   * it until the returned function is called.
+   * @param {string} key
+   * @returns {Promise<() => void>} - Releases the pin
+   */
+  async acquire(key) {
+    await this.open();
+    await fs.promises.mkdir(this.dir(key), { recursive: true });
+    this.pins.set(key, (this.pins.get(key) || 0) + 1);
+    this._touch(key, this.entries.get(key)?.size || 0);
+    this._save();
+
+    let released = false;
+    return () => {
+      if (released) {
+        return;
+      }
+      released = true;
+      const count = this.pins.get(key) - 1;
+      if (count) {
+        this.pins.set(key, count);
+      } else {
+        this.pins.delete(key);
+      }
+      this._evict().catch(err => console.log(`[manim store] eviction failed: ${err.message}`));
+    };
+  }
+
+  /**
+   * Re-measure `key` after a job wrote to it, then evict down to the limits.
+   * @param {string} key
+   * @returns {Promise<void>}
+   */
+  async update(key) {
+    await this.open();
+    if (!this.entries.has(key)) {
+      return;
+    }
+    this._touch(key, await dirSize(this.dir(key)));
+    await this._evict();
+  }
+
+  /**
+   * Delete `key`'s directory, e.g. after its job was cancelled.
+   * @param {string} key
+   * @returns {Promise<void>}
+   */
+  async remove(key) {
+    await this.open();
+    const entry = this.entries.get(key);
+    if (entry) {
+      this.entries.delete(key);
+      this.totalBytes -= entry.size;
+    }
+    await fs.promises.rm(this.dir(key), { recursive: true, force: true });
+    await this._save();
+  }
+
+  /**
+   * Occupancy and eviction count for the log.
+   * @returns {object}
+   */
+  stats() {
+    return {
+      entries: this.entries.size,
+      bytes: this.totalBytes,
+      maxBytes: this.maxBytes(),
+      pinned: this.pins.size,
+      evictions: this.evictions
+    };
+  }
+
+  _touch(key, size) {
+    const entry = this.entries.get(key);
+    if (entry) {
+      this.totalBytes -= entry.size;
+      this.entries.delete(key); // Re-inserting moves it to the most recently used end
+    }
+    this.entries.set(key, { size, atime: Date.now() });
+    this.totalBytes += size;
+  }
+
+  async _evict() {
+    const maxBytes = this.maxBytes();
+    const oldest = Date.now() - this.maxAgeMs();
+    const victims = [];
+    // Oldest first; pinned entries are skipped, and there are only ever a few of them
+    for (const [key, entry] of this.entries) {
+      if (this.totalBytes <= maxBytes && entry.atime >= oldest) {
+        break;
+      }
+      if (this.pins.has(key)) {
+        continue;
+      }
+      this.entries.delete(key);
+      this.totalBytes -= entry.size;
+      victims.push(key);
+    }
+    for (const key of victims) {
+      await fs.promises.rm(this.dir(key), { recursive: true, force: true });
+    }
+    this.evictions += victims.length;
+    if (victims.length) {
+      console.log(`[manim store] evicted ${victims.length} job directories`);
+    }
+    await this._save();
+  }
+
+  _save() {
+    // Writes are chained so an older index never lands on top of a newer one
+    this.saving = this.saving.then(async () => {
+      const indexPath = path.join(this.root, INDEX_FILE);
+      const tmpPath = `${indexPath}.${process.pid}.tmp`;
+      await fs.promises.writeFile(tmpPath, JSON.stringify(Object.fromEntries(this.entries)));
+      await fs.promises.rename(tmpPath, indexPath);
+    }).catch(err => console.log(`[manim store] failed to save index: ${err.message}`));
+    return this.saving;
+  }
+}
+
+module.exports = { ArtifactStore, DAY_MS };
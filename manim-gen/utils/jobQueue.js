@@ -0,0 +1,170 @@
+// Higher runs first; equal priorities run in submission order
+const PRIORITY = { background: 0, normal: 1, interactive: 2 };
+
+// Keep the last few hundred waits for percentiles
+const WAIT_SAMPLES = 200;
+
+/**
+ * Single-flight job scheduler. Jobs submitted under a key that is already
+ * queued or running share that job instead of starting another. At most
+ * `concurrency` jobs run at once, highest priority first. Each submitter gets
+ * its own handle; a job is cancelled (and its `run` aborted) only once every
+ * handle on it has been cancelled.
+ */
+class JobQueue {
+  /**
+   * @param {object} options
+   * @param {string} options.name - Used in log lines
+   * @param {() => number} options.concurrency - Current limit, read whenever a slot frees up
+   * @param {(job: object, io: { onEvent: (event: object) => void, signal: AbortSignal }) => Promise<object>} options.run
+   */
+  constructor({ name, concurrency, run }) {
+    this.name = name;
+    this.concurrency = concurrency;
+    this.run = run;
+    this.entries = new Map();
+    this.queue = [];
+    this.running = 0;
+    this.seq = 0;
+    this.counts = { submitted: 0, deduplicated: 0, cancelled: 0, completed: 0, failed: 0 };
+    this.waits = [];
+  }
+
+  /**
+   * @param {string} key - Identical keys share one job
+   * @param {object} job - Passed to `run`
+   * @param {{ priority?: number, onEvent?: (event: object) => void }} [options]
+   * @returns {{ result: Promise<object>, cancel: () => void, deduplicated: boolean }}
+   */
+  submit(key, job, { priority = PRIORITY.normal, onEvent = () => {} } = {}) {
+    this.counts.submitted += 1;
+    let entry = this.entries.get(key);
+    const deduplicated = Boolean(entry);
+    if (entry) {
+      this.counts.deduplicated += 1;
+      if (entry.state === 'queued' && priority > entry.priority) {
+        entry.priority = priority;
+        this._sort();
+      }
+    } else {
+      entry = {
+        key,
+        job,
+        priority,
+        seq: this.seq++,
+        state: 'queued',
+        subscribers: new Set(),
+        controller: new AbortController(),
+        enqueuedAt: Date.now()
+      };
+      this.entries.set(key, entry);
+      this.queue.push(entry);
+      this._sort();
+    }
+
+    const subscriber = { onEvent };
+    entry.subscribers.add(subscriber);
+    const result = new Promise((resolve, reject) => {
+      subscriber.resolve = resolve;
+      subscriber.reject = reject;
+    });
+    this._pump();
+    return { result, cancel: () => this._unsubscribe(entry, subscriber), deduplicated };
+  }
+
+  /**
+   * Queue depth, concurrency and wait-time statistics.
+   * @returns {object}
+   */
+  metrics() {
+    const sorted = [...this.waits].sort((a, b) => a - b);
+    const percentile = p => sorted.length ? sorted[Math.min(sorted.length - 1, Math.floor(p * sorted.length))] : 0;
+    return {
+      depth: this.queue.length,
+      running: this.running,
+      ...this.counts,
+      waitMs: {
+        p50: percentile(0.5),
+        p95: percentile(0.95),
+        max: sorted.length ? sorted[sorted.length - 1] : 0
+      }
+    };
+  }
+
+  _sort() {
+    this.queue.sort((a, b) => (b.priority - a.priority) || (a.seq - b.seq));
+  }
+
+  _pump() {
+    while (this.queue.length && this.running < Math.max(1, this.concurrency())) {
+      this._start(this.queue.shift());
+    }
+  }
+
+  async _start(entry) {
+    entry.state = 'running';
+    this.running += 1;
+    const wait = Date.now() - entry.enqueuedAt;
+    this.waits.push(wait);
+    if (this.waits.length > WAIT_SAMPLES) {
+      this.waits.shift();
+    }
+    console.log(
+      `[manim ${this.name}] start ${entry.key.slice(0, 12)} after ${wait} ms ` +
+      `(${this.queue.length} queued, ${this.running} running)`
+    );
+
+    const onEvent = event => {
+      for (const subscriber of entry.subscribers) {
+        subscriber.onEvent(event);
+      }
+    };
+    let outcome;
+    try {
+      outcome = { value: await this.run(entry.job, { onEvent, signal: entry.controller.signal }) };
+      this.counts.completed += 1;
+    } catch (err) {
+      outcome = { err };
+      if (!entry.controller.signal.aborted) {
+        this.counts.failed += 1;
+      }
+    } finally {
+      this.running -= 1;
+      if (this.entries.get(entry.key) === entry) {
+        this.entries.delete(entry.key);
+      }
+    }
+
+    for (const subscriber of entry.subscribers) {
+      if (outcome.err) {
+        subscriber.reject(outcome.err);
+      } else {
+        subscriber.resolve(outcome.value);
+      }
+    }
+    entry.subscribers.clear();
+    this._pump();
+  }
+
+  _unsubscribe(entry, subscriber) {
+    if (!entry.subscribers.delete(subscriber)) {
+      return;
+    }
+    subscriber.reject(new Error('Cancelled'));
+    if (entry.subscribers.size) {
+      return; // Someone else still wants this job
+    }
+
+    this.counts.cancelled += 1;
+    if (entry.state === 'queued') {
+      this.queue = this.queue.filter(other => other !== entry);
+      this.entries.delete(entry.key);
+    } else {
+      // New requests for the same key must not join a job that is being torn down
+      this.entries.delete(entry.key);
+      entry.controller.abort();
+    }
+  }
+}
+
+module.exports = { JobQueue, PRIORITY };
@@ -0,0 +1,34 @@
+/**
+ * Reads newline-delimited JSON from a stream, buffering partial lines across
+ * chunks. Each parsed object goes to `onMessage`; lines that are not JSON
+ * (stray prints) go to `onText`.
+ * @param {import('stream').Readable} stream
+ * @param {(message: object) => void} onMessage
+ * @param {(line: string) => void} [onText]
+ */
+function onJsonLines(stream, onMessage, onText = () => {}) {
+  let buffer = '';
+  // Decode as UTF-8 so multi-byte characters split across chunks survive
+  stream.setEncoding('utf8');
+  stream.on('data', chunk => {
+    buffer += chunk;
+    let newline;
+    while ((newline = buffer.indexOf('\n')) >= 0) {
+      const line = buffer.slice(0, newline).trim();
+      buffer = buffer.slice(newline + 1);
+      if (!line) {
+        continue;
+      }
+      let message;
+      try {
+        message = JSON.parse(line);
+      } catch {
+        onText(line);
+        continue;
+      }
+      onMessage(message);
+    }
+  });
+}
+
+module.exports = { onJsonLines };
@@ -0,0 +1,187 @@
+const vscode = require('vscode');
+const fs = require('fs');
+const path = require('path');
+const { convertDollarToMathJax } = require('./latex');
+const { runWorkerJob } = require('./pythonRunner');
+const { TexIndex, normalizeLatex } = require('./texIndex');
+
+const HOUR_MS = 60 * 60 * 1000;
+// How long the cursor has to rest before anything is indexed or queued
+const SETTLE_MS = 1500;
+const INDEX_BATCH = 100;
+
+let index = null;
+
+function isTexDocument(document) {
+  return document.uri.scheme === 'file' && document.fileName.endsWith('.tex');
+}
+
+/**
+ * The indexed environment the user means: the one matching the selection
+ * (up to whitespace), or the one enclosing the cursor when nothing is selected.
+ * Using its canonical text makes the request share a cache key with prefetch.
+ * @param {vscode.TextEditor | undefined} editor
+ * @returns {object | undefined}
+ */
+function environmentFor(editor) {
+  if (!index || !editor || !isTexDocument(editor.document)) {
+    return undefined;
+  }
+  const file = editor.document.uri.fsPath;
+  const selected = editor.document.getText(editor.selection);
+  return selected.trim()
+    ? index.match(file, selected)
+    : index.at(file, editor.selection.active.line);
+}
+
+/**
+ * Pre-generates environments near the cursor on the low-priority worker, one
+ * at a time and at most `budgetPerHour` per hour, so that visualizing them
+ * later is a cache hit.
+ */
+class PrefetchScheduler {
+  /**
+   * @param {vscode.ExtensionContext} context
+   */
+  constructor(context) {
+    this.context = context;
+    // Same cache as interactive requests (run_job's default under manim-output)
+    this.cacheDir = path.join(context.globalStorageUri.fsPath, 'manim-output', '.cache');
+    this.workDir = path.join(context.globalStorageUri.fsPath, 'manim-prefetch');
+    this.queue = [];
+    this.attempted = new Set();
+    this.startedAt = [];
+    this.running = false;
+  }
+
+  settings() {
+    const settings = vscode.workspace.getConfiguration('manim-gen.prefetch');
+    return {
+      radius: settings.get('radius', 40),
+      budgetPerHour: settings.get('budgetPerHour', 10),
+      render: settings.get('render', false)
+    };
+  }
+
+  /**
+   * Re-index the editor's document and queue its environments nearest the cursor first.
+   * @param {vscode.TextEditor} editor
+   */
+  async onCursor(editor) {
+    const document = editor.document;
+    const file = document.uri.fsPath;
+    await index.refresh([file], document.isDirty ? { [file]: document.getText() } : {});
+
+    const { radius } = this.settings();
+    const line = editor.selection.active.line + 1;
+    const distance = item => (item.line <= line && line <= item.end_line)
+      ? 0
+      : Math.min(Math.abs(item.line - line), Math.abs(item.end_line - line));
+    const nearby = index.itemsIn(file)
+      .filter(item => distance(item) <= radius && !this.attempted.has(normalizeLatex(item.latex)))
+      .sort((a, b) => distance(a) - distance(b));
+
+    // The latest cursor position goes first; older entries stay queued behind it
+    const queued = new Set(nearby.map(item => normalizeLatex(item.latex)));
+    this.queue = [...nearby, ...this.queue.filter(item => !queued.has(normalizeLatex(item.latex)))];
+    this._pump();
+  }
+
+  async _pump() {
+    if (this.running) {
+      return;
+    }
+    const { budgetPerHour, render } = this.settings();
+    const now = Date.now();
+    this.startedAt = this.startedAt.filter(time => now - time < HOUR_MS);
+    if (this.startedAt.length >= budgetPerHour) {
+      return; // Left queued; the next cursor move tries again
+    }
+    const item = this.queue.shift();
+    if (!item) {
+      return;
+    }
+    const key = normalizeLatex(item.latex);
+    if (this.attempted.has(key)) {
+      this._pump();
+      return;
+    }
+
+    this.attempted.add(key);
+    this.startedAt.push(now);
+    this.running = true;
+    const label = `${item.name || item.kind} (${path.basename(item.file)}:${item.line})`;
+    try {
+      await fs.promises.mkdir(this.workDir, { recursive: true });
+      const result = await runWorkerJob(this.context, {
+        op: 'prefetch',
+        latex: convertDollarToMathJax(item.latex),
+        out_dir: this.workDir,
+        cache_dir: this.cacheDir,
+        render
+      }, undefined, { background: true });
+      console.log(
+        `[manim prefetch] ${label}: ${result.video ? 'video' : 'script'} cached in ` +
+        `${((Date.now() - now) / 1000).toFixed(1)}s ` +
+        `(${this.startedAt.length}/${budgetPerHour} this hour, ${this.queue.length} queued)`
+      );
+    } catch (err) {
+      console.log(`[manim prefetch] ${label} failed: ${err.message}`);
+    } finally {
+      this.running = false;
+    }
+    this._pump();
+  }
+}
+
+async function indexWorkspace() {
+  const uris = await vscode.workspace.findFiles('**/*.tex', '**/node_modules/**', 2000);
+  const paths = uris.map(uri => uri.fsPath);
+  for (let i = 0; i < paths.length; i += INDEX_BATCH) {
+    await index.refresh(paths.slice(i, i + INDEX_BATCH));
+  }
+  console.log(`[manim prefetch] indexed ${paths.length} .tex files`);
+}
+
+/**
+ * Sets up the workspace index and, when `manim-gen.prefetch.enabled` is on,
+ * speculative generation around the cursor. Returns a Disposable.
+ * @param {vscode.ExtensionContext} context
+ * @returns {vscode.Disposable}
+ */
+function registerPrefetch(context) {
+  index = new TexIndex(
+    path.join(context.globalStorageUri.fsPath, 'tex-index.json'),
+    job => runWorkerJob(context, job, undefined, { background: true })
+  );
+  const scheduler = new PrefetchScheduler(context);
+  const enabled = () => vscode.workspace.getConfiguration('manim-gen.prefetch').get('enabled', false);
+
+  let timer = null;
+  const onCursor = editor => {
+    if (!enabled() || !editor || !isTexDocument(editor.document)) {
+      return;
+    }
+    clearTimeout(timer);
+    timer = setTimeout(() => {
+      scheduler.onCursor(editor).catch(err => console.log(`[manim prefetch] ${err.message}`));
+    }, SETTLE_MS);
+  };
+
+  if (enabled()) {
+    indexWorkspace().catch(err => console.log(`[manim prefetch] indexing failed: ${err.message}`));
+  }
+
+  return vscode.Disposable.from(
+    vscode.window.onDidChangeTextEditorSelection(event => onCursor(event.textEditor)),
+    vscode.window.onDidChangeActiveTextEditor(onCursor),
+    vscode.workspace.onDidSaveTextDocument(document => {
+      if (enabled() && isTexDocument(document)) {
+        index.refresh([document.uri.fsPath]).catch(() => {});
+      }
+    }),
+    { dispose: () => clearTimeout(timer) }
+  );
+}
+
+module.exports = { registerPrefetch, environmentFor };
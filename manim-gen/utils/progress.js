@@ -0,0 +1,89 @@
+// User-facing names of the pipeline stages reported by manim-scripts/progress.py
+const STAGE_LABELS = {
+  cache: 'Checking the cache',
+  intuition: 'Explaining the intuition',
+  examples: 'Looking up similar animations',
+  script: 'Writing the Manim script',
+  dry_run: 'Checking the scene',
+  still: 'Rendering a still frame',
+  render: 'Rendering the video',
+  repair: 'Fixing render errors'
+};
+
+/**
+ * Turns the pipeline's progress events into VS Code progress reports and
+ * webview status lines, and keeps per-stage timings for the log.
+ */
+class ProgressTracker {
+  /**
+   * @param {vscode.Progress<{ message?: string, increment?: number }>} [progress]
+   * @param {(text: string) => void} [onStatus] - Receives a short status line
+   */
+  constructor(progress = null, onStatus = () => {}) {
+    this.progress = progress;
+    this.onStatus = onStatus;
+    this.percent = 0;
+    this.timings = [];
+    this.llmCalls = 0;
+    this.outputTokens = 0;
+  }
+
+  /**
+   * @param {object} event - One event line from the Python side
+   */
+  handle(event) {
+    switch (event.event) {
+      case 'stage_start': {
+        const label = STAGE_LABELS[event.stage] || event.stage;
+        this._report(`${label}…`);
+        break;
+      }
+      case 'stage_end':
+        this.timings.push({ stage: event.stage, seconds: event.seconds, ok: event.ok });
+        console.log(
+          `[manim] ${event.stage} ${event.ok ? 'done' : 'failed'} in ${event.seconds.toFixed(2)}s` +
+          (event.error ? `: ${event.error}` : '')
+        );
+        break;
+      case 'llm_call':
+        this.llmCalls += 1;
+        this.outputTokens += event.output_tokens || 0;
+        console.log(
+          `[manim] llm ${event.label} (${event.mode}): ${event.prompt_tokens} prompt / ` +
+          `${event.output_tokens} output tokens, ${event.seconds.toFixed(2)}s`
+        );
+        break;
+      case 'validation':
+        if (!event.ok) {
+          console.log(`[manim] ${event.check} check failed: ${event.detail}`);
+        }
+        break;
+      case 'render_progress': {
+        const percent = Math.min(Math.floor((100 * event.frames_done) / event.frames_total), 100);
+        // Progress increments can't go backwards, e.g. when a retry re-renders
+        const increment = Math.max(percent - this.percent, 0);
+        this.percent = Math.max(percent, this.percent);
+        this._report(`Rendering the video (${event.frames_done}/${event.frames_total} frames)`, increment);
+        break;
+      }
+    }
+  }
+
+  /**
+   * One-line summary of where the time went, e.g. "intuition 3.1s, script 12.4s".
+   * @returns {string}
+   */
+  summary() {
+    const stages = this.timings.map(({ stage, seconds }) => `${stage} ${seconds.toFixed(1)}s`);
+    return `${stages.join(', ')}; ${this.llmCalls} LLM calls, ${this.outputTokens} output tokens`;
+  }
+
+  _report(message, increment) {
+    if (this.progress) {
+      this.progress.report(increment ? { message, increment } : { message });
+    }
+    this.onStatus(message);
+  }
+}
+
+module.exports = { ProgressTracker, STAGE_LABELS };
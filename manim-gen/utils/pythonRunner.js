@@ -1,20 +1,19 @@
 const vscode = require('vscode');
-const { spawn } = require('child_process');
 const path = require('path');
+const { RenderWorker } = require('./renderWorker');
+
+// Interactive jobs run on a pool of warm workers, one job per worker at a time
+// (the job queue bounds how many are in flight). Background work (indexing,
+// prefetch) shares a single low-priority worker that takes jobs in order.
+const idleWorkers = new Set();
+let backgroundWorker = null;
 
 /**
- * Runs a Python script and returns its stdout output.
- * Will prompt for GEMINI_API_KEY if not stored in SecretStorage.
+ * Returns the stored GEMINI_API_KEY, prompting for it on first use.
  * @param {vscode.ExtensionContext} context - Extension context for SecretStorage
- * @param {string} scriptName - Relative path (from extension root) to the script
- * @param {string[]} args - Command-line arguments to pass to the script
- * @returns {Promise<string>} - Resolves with stdout, rejects on error or non-zero exit
+ * @returns {Promise<string>}
  */
-async function runPythonScript(context, scriptName, args = []) {
-  // 1) Compute script path
-  const scriptPath = path.join(__dirname, '..', scriptName);
-
-  // 2) Retrieve or prompt for API key
+async function getApiKey(context) {
   let apiKey = await context.secrets.get('geminiApiKey');
   if (!apiKey) {
     apiKey = await vscode.window.showInputBox({
@@ -28,32 +27,78 @@ async function runPythonScript(context, scriptName, args = []) {
     // Store for future runs
     await context.secrets.store('geminiApiKey', apiKey);
   }
+  return apiKey;
+}
 
-  // 3) Build env with the API key
-  const childEnv = { ...process.env, GEMINI_API_KEY: apiKey };
-
-  // 4) Spawn Python and capture output
-  return new Promise((resolve, reject) => {
-    const py = spawn('python', [scriptPath, ...args], {
-      cwd: path.dirname(scriptPath),
-      env: childEnv,
-      stdio: ['ignore', 'pipe', 'pipe']
-    });
+/**
+ * Builds the environment for Python processes from the API key and settings.
+ * @param {vscode.ExtensionContext} context
+ * @param {string} apiKey
+ * @returns {NodeJS.ProcessEnv}
+ */
+function pipelineEnv(context, apiKey) {
+  const settings = vscode.workspace.getConfiguration('manim-gen');
+  return {
+    ...process.env,
+    GEMINI_API_KEY: apiKey,
+    MANIM_GEN_CANDIDATES: String(settings.get('candidates', 3)),
+    MANIM_GEN_TOKEN_BUDGET: String(settings.get('tokenBudget', 24000)),
+    MANIM_GEN_RENDER_WORKERS: String(settings.get('renderWorkers', 1)),
+    // Compiled Tex/Text glyphs are shared by every job and worker
+    MANIM_GEN_GLYPH_DIR: path.join(context.globalStorageUri.fsPath, 'manim-output', '.glyphs'),
+    MANIM_GEN_GLYPH_CACHE_MB: String(settings.get('storage.glyphCacheMB', 256)),
+    // Scripts that rendered, retrieved as examples for similar statements
+    MANIM_GEN_FEWSHOT_DIR: path.join(context.globalStorageUri.fsPath, 'manim-output', '.fewshot'),
+    MANIM_GEN_FEWSHOT_EXAMPLES: String(settings.get('fewShotExamples', 2)),
+    MANIM_GEN_STREAM: settings.get('streamPreview', true) ? '1' : '0',
+    // Model calls: memoized responses, rate limit and per-request timeout
+    MANIM_GEN_LLM_CACHE_DIR: path.join(context.globalStorageUri.fsPath, 'manim-output', '.llm'),
+    MANIM_GEN_LLM_RPM: String(settings.get('llm.requestsPerMinute', 60)),
+    MANIM_GEN_LLM_TIMEOUT: String(settings.get('llm.timeoutSeconds', 120))
+  };
+}
 
-    let stdout = '';
-    let stderr = '';
+function newWorker(context, env) {
+  const worker = new RenderWorker(
+    path.join(__dirname, '..', 'manim-scripts', 'make_animation.py'),
+    env
+  );
+  context.subscriptions.push({ dispose: () => worker.dispose() });
+  return worker;
+}
 
-    py.stdout.on('data', data => { stdout += data.toString(); });
-    py.stderr.on('data', data => { stderr += data.toString(); });
+/**
+ * Sends a job to a warm worker, starting one if none is free.
+ * Background jobs run on their own low-priority worker so they never delay an
+ * interactive request. Workers are disposed together with the extension.
+ * @param {vscode.ExtensionContext} context - Extension context for SecretStorage
+ * @param {object} job - Worker request, e.g. { op: 'render', latex, out_dir }
+ * @param {(event: object) => void} [onEvent] - Receives events the job emits while running
+ * @param {{ background?: boolean, signal?: AbortSignal }} [options] - Aborting `signal`
+ *   kills the job's process tree
+ * @returns {Promise<object>} - Resolves with the job's result object
+ */
+async function runWorkerJob(context, job, onEvent, { background = false, signal } = {}) {
+  if (background) {
+    if (!backgroundWorker) {
+      const env = pipelineEnv(context, await getApiKey(context));
+      env.MANIM_GEN_LOW_PRIORITY = '1';
+      backgroundWorker = newWorker(context, env);
+    }
+    return backgroundWorker.request(job, onEvent, signal);
+  }
 
-    py.on('close', code => {
-      if (code === 0) {
-        resolve(stdout.trim());
-      } else {
-        reject(new Error(`Python exited ${code}: ${stderr}`));
-      }
-    });
-  });
+  let worker = idleWorkers.values().next().value;
+  if (worker) {
+    idleWorkers.delete(worker);
+  } else {
+    worker = newWorker(context, pipelineEnv(context, await getApiKey(context)));
+  }
+  try {
+    return await worker.request(job, onEvent, signal);
+  } finally {
+    idleWorkers.add(worker);
+  }
 }
 
-module.exports = { runPythonScript };
\ No newline at end of file
+module.exports = { runWorkerJob };
\ No newline at end of file
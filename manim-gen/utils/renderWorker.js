@@ -0,0 +1,209 @@
+const { spawn } = require('child_process');
+const path = require('path');
+const { onJsonLines } = require('./jsonLines');
+
+/**
+ * Kill a process together with everything it spawned (ffmpeg, render pools).
+ * On POSIX the worker leads its own process group, see `start`.
+ * @param {import('child_process').ChildProcess} proc
+ */
+function killTree(proc) {
+  if (process.platform === 'win32') {
+    spawn('taskkill', ['/pid', String(proc.pid), '/T', '/F']);
+    return;
+  }
+  try {
+    process.kill(-proc.pid, 'SIGKILL');
+  } catch {
+    proc.kill('SIGKILL');
+  }
+}
+
+/**
+ * A long-lived `make_animation.py --worker` process that keeps manim, numpy
+ * and the Gemini client loaded between jobs. Jobs are sent as JSON lines on
+ * stdin and matched to replies on stdout by id; progress events arrive on a
+ * separate pipe (fd 3) tagged with the job id. If the process dies, pending
+ * jobs are rejected and a fresh worker is started.
+ */
+class RenderWorker {
+  /**
+   * @param {string} scriptPath - Absolute path to make_animation.py
+   * @param {NodeJS.ProcessEnv} env - Environment for the Python process
+   */
+  constructor(scriptPath, env) {
+    this.scriptPath = scriptPath;
+    this.env = env;
+    this.proc = null;
+    this.ready = null;
+    this.nextId = 1;
+    this.pending = new Map();
+    this.cancelled = new Set();
+    this.disposed = false;
+  }
+
+  /**
+   * Spawn the worker if it is not running and resolve once it reports ready.
+   * @returns {Promise<void>}
+   */
+  start() {
+    if (this.ready) {
+      return this.ready;
+    }
+
+    const spawnedAt = Date.now();
+    const proc = spawn('python', [this.scriptPath, '--worker'], {
+      cwd: path.dirname(this.scriptPath),
+      env: { ...this.env, MANIM_GEN_EVENTS_FD: '3' },
+      stdio: ['pipe', 'pipe', 'pipe', 'pipe'],
+      // Own process group, so cancelling can kill the whole tree
+      detached: process.platform !== 'win32'
+    });
+    this.proc = proc;
+
+    let becameReady = false;
+    this.ready = new Promise((resolve, reject) => {
+      let stderrTail = '';
+
+      onJsonLines(proc.stdout, message => {
+        if (message.event === 'ready') {
+          console.log(
+            `[manim worker] ready in ${Date.now() - spawnedAt} ms ` +
+            `(python startup ${(message.startup * 1000).toFixed(0)} ms)`
+          );
+          becameReady = true;
+          resolve();
+        } else {
+          this._settle(message);
+        }
+      }, line => console.log(`[manim worker] ${line}`));
+
+      onJsonLines(proc.stdio[3], event => this._event(event.job, event));
+
+      proc.stderr.on('data', data => {
+        const text = data.toString();
+        stderrTail = (stderrTail + text).slice(-4000);
+        console.log(`[manim worker] ${text.trimEnd()}`);
+      });
+
+      proc.on('error', err => {
+        reject(err);
+        this._crashed(proc, err, false);
+      });
+
+      proc.on('exit', code => {
+        const err = new Error(`Python worker exited ${code}: ${stderrTail}`);
+        reject(err);
+        this._crashed(proc, err, becameReady);
+      });
+    });
+
+    return this.ready;
+  }
+
+  /**
+   * Send one job to the worker, (re)starting it if needed.
+   * @param {object} job - Request payload, e.g. { op: 'render', latex, out_dir }
+   * @param {(event: object) => void} [onEvent] - Called for events the job emits before its reply
+   * @param {AbortSignal} [signal] - Aborting kills the worker's process tree; the job rejects
+   *   with 'Cancelled' and a fresh worker is started
+   * @returns {Promise<object>} - Resolves with the job's result object
+   */
+  async request(job, onEvent = () => {}, signal = undefined) {
+    if (this.disposed) {
+      throw new Error('Render worker has been disposed.');
+    }
+    const cold = !this.ready;
+    const requestedAt = Date.now();
+    await this.start();
+
+    if (signal && signal.aborted) {
+      throw new Error('Cancelled');
+    }
+
+    const id = this.nextId++;
+    const proc = this.proc;
+    const onAbort = () => {
+      this.cancelled.add(id);
+      killTree(proc);
+    };
+    if (signal) {
+      signal.addEventListener('abort', onAbort, { once: true });
+    }
+    let reply;
+    try {
+      reply = await new Promise((resolve, reject) => {
+        this.pending.set(id, { resolve, reject, onEvent });
+        proc.stdin.write(JSON.stringify({ ...job, id }) + '\n');
+      });
+    } finally {
+      if (signal) {
+        signal.removeEventListener('abort', onAbort);
+      }
+      this.cancelled.delete(id);
+    }
+
+    console.log(
+      `[manim worker] ${job.op || 'render'} job ${id} (${cold ? 'cold' : 'warm'}): ` +
+      `${Date.now() - requestedAt} ms round-trip, ${(reply.elapsed * 1000).toFixed(0)} ms in python`
+    );
+    if (!reply.ok) {
+      throw new Error(reply.error);
+    }
+    return reply.result;
+  }
+
+  _settle(message) {
+    if (message.event) {
+      this._event(message.id, message);
+      return;
+    }
+    const waiter = this.pending.get(message.id);
+    if (waiter) {
+      this.pending.delete(message.id);
+      waiter.resolve(message);
+    }
+  }
+
+  _event(id, event) {
+    const waiter = this.pending.get(id);
+    if (!waiter) {
+      return;
+    }
+    try {
+      waiter.onEvent(event);
+    } catch (err) {
+      console.log(`[manim worker] event handler failed: ${err.message}`);
+    }
+  }
+
+  _crashed(proc, err, restart) {
+    if (this.proc !== proc) {
+      return;
+    }
+    this.proc = null;
+    this.ready = null;
+    for (const [id, { reject }] of this.pending) {
+      reject(this.cancelled.has(id) ? new Error('Cancelled') : err);
+    }
+    this.pending.clear();
+
+    // Bring a healthy worker straight back so the next job is warm. A worker
+    // that never became ready is left for the next request to retry, which
+    // avoids a respawn loop when Python or manim is missing.
+    if (restart && !this.disposed) {
+      console.log(`[manim worker] ${this.cancelled.size ? 'cancelled' : 'crashed'}, restarting`);
+      this.start().catch(() => {});
+    }
+  }
+
+  dispose() {
+    this.disposed = true;
+    if (this.proc) {
+      this.proc.stdin.end();
+      killTree(this.proc);
+    }
+  }
+}
+
+module.exports = { RenderWorker };
@@ -0,0 +1,77 @@
+/**
+ * Collapse whitespace the same way the Python cache does (cache.normalize_latex),
+ * so the extension and the pipeline agree on what counts as the same request.
+ * @param {string} latex
+ * @returns {string}
+ */
+function normalizeLatex(latex) {
+  return latex.split(/\s+/).filter(Boolean).join(' ');
+}
+
+/**
+ * In-memory view of the worker's incremental index of theorem-like
+ * environments (manim-scripts/tex_index.py). The worker persists the index
+ * and only rescans files whose content changed; this class keeps the latest
+ * items per file for cursor lookups.
+ */
+class TexIndex {
+  /**
+   * @param {string} indexPath - Where the worker persists the index
+   * @param {(job: object) => Promise<object>} runJob - Sends a job to a worker
+   */
+  constructor(indexPath, runJob) {
+    this.indexPath = indexPath;
+    this.runJob = runJob;
+    this.files = new Map();
+  }
+
+  /**
+   * Re-index `paths`; `sources` maps paths of unsaved documents to their text.
+   * @param {string[]} paths
+   * @param {Object<string, string>} [sources]
+   * @returns {Promise<{ rescanned: string[], removed: string[] }>}
+   */
+  async refresh(paths, sources = {}) {
+    const result = await this.runJob({ op: 'index', index_path: this.indexPath, paths, sources });
+    for (const removed of result.removed) {
+      this.files.delete(removed);
+    }
+    for (const [file, items] of Object.entries(result.files)) {
+      this.files.set(file, items);
+    }
+    return result;
+  }
+
+  /**
+   * @param {string} file
+   * @returns {object[]} - Environments with kind, name, line, end_line, latex and body
+   */
+  itemsIn(file) {
+    return this.files.get(file) || [];
+  }
+
+  /**
+   * The environment enclosing a 0-based line, if any.
+   * @param {string} file
+   * @param {number} line
+   * @returns {object | undefined}
+   */
+  at(file, line) {
+    return this.itemsIn(file).find(item => item.line <= line + 1 && line + 1 <= item.end_line);
+  }
+
+  /**
+   * The environment whose full text or body equals `text` up to whitespace.
+   * @param {string} file
+   * @param {string} text
+   * @returns {object | undefined}
+   */
+  match(file, text) {
+    const wanted = normalizeLatex(text);
+    return this.itemsIn(file).find(
+      item => normalizeLatex(item.latex) === wanted || normalizeLatex(item.body) === wanted
+    );
+  }
+}
+
+module.exports = { TexIndex, normalizeLatex };
@@ -1,13 +1,31 @@
+const crypto = require('crypto');
+
 /**
+ * Builds the visualization page. It starts with whatever is ready (a status
+ * line, a still frame or a video) and swaps in later stages when the
+ * extension posts them:
+ *   { type: 'status', text }
+ *   { type: 'image', uri }
+ *   { type: 'segment', uri, index, mime } - fragmented MP4 of one animation, appended
+ *     through Media Source Extensions while the rest renders; index 0 starts over
+ *   { type: 'video', uri, label, segments } - with `segments`, the number of segments the
+ *     preview consists of: once they are all appended the stream is ended instead of
+ *     reloading `uri`
+ *
+ * It posts { type: 'firstFrame', source } back once the first frame plays.
+ *
  * @param {vscode.WebviewPanel} panel
- * @param {vscode.Uri} videoUri
+ * @param {vscode.Uri | null} videoUri
  * @param {string} initialLatex
+ * @param {vscode.Uri | null} [imageUri]
  */
-function getWebviewVideoContent(panel, videoUri, initialLatex = 'Hello \\(E=mc^2\\)') {
+function getWebviewVideoContent(panel, videoUri, initialLatex = 'Hello \\(E=mc^2\\)', imageUri = null) {
+  const nonce = crypto.randomBytes(16).toString('base64');
   const csp = `
     default-src 'none';
     media-src ${panel.webview.cspSource} blob:;
-    script-src ${panel.webview.cspSource} https://cdn.jsdelivr.net;
+    connect-src ${panel.webview.cspSource};
+    script-src ${panel.webview.cspSource} https://cdn.jsdelivr.net 'nonce-${nonce}';
     style-src  ${panel.webview.cspSource} 'unsafe-inline';
     img-src    ${panel.webview.cspSource} https:;
   `.replace(/\s+/g, ' ').trim();
@@ -22,7 +40,7 @@ function getWebviewVideoContent(panel, videoUri, initialLatex = 'Hello \\(E=mc^2
 
     <!-- MathJax -->
     <script src="https://polyfill.io/v3/polyfill.min.js?features=es6"></script>
-    <script id="MathJax-script" async 
+    <script id="MathJax-script" async
             src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js">
     </script>
 
@@ -31,19 +49,141 @@ function getWebviewVideoContent(panel, videoUri, initialLatex = 'Hello \\(E=mc^2
              font-family:sans-serif; display:flex;
              flex-direction:column; align-items:center; height:100vh; }
       .latex-display { font-size:18px; margin:20px 0; text-align:center; }
-      video { width:80%; height:auto; display:block; }
+      .status { font-size:13px; color:#aaa; margin-bottom:10px; }
+      video, img { width:80%; height:auto; display:block; }
+      .hidden { display:none; }
     </style>
   </head>
   <body>
     <div class="latex-display" id="latexOutput">${initialLatex}</div>
+    <div class="status" id="status">${videoUri ? '' : 'Generating animation…'}</div>
+
+    <img id="still" class="${imageUri && !videoUri ? '' : 'hidden'}"
+         src="${imageUri || ''}" alt="Last frame of the animation">
 
-    <video controls autoplay loop>
-      <source src="${videoUri}" type="video/mp4">
+    <video id="player" class="${videoUri ? '' : 'hidden'}" controls autoplay loop
+           ${videoUri ? `src="${videoUri}"` : ''}>
       Your browser does not support the video tag.
     </video>
 
-    <script>
-      MathJax.typesetPromise();
+    <script nonce="${nonce}">
+      const vscode = acquireVsCodeApi();
+      const still = document.getElementById('still');
+      const player = document.getElementById('player');
+      const status = document.getElementById('status');
+
+      // Report when the first frame is on screen, and whether it came from segments
+      let source = 'video';
+      player.addEventListener('playing', () => {
+        vscode.postMessage({ type: 'firstFrame', source });
+      }, { once: true });
+
+      // Segments are fetched as soon as they are announced and appended in order
+      let stream = null;
+
+      function showPlayer() {
+        player.classList.remove('hidden');
+        still.classList.add('hidden');
+      }
+
+      function startStream(mime) {
+        stream = null;
+        if (!window.MediaSource || !MediaSource.isTypeSupported(mime)) {
+          return; // Wait for the finished video instead
+        }
+        const mediaSource = new MediaSource();
+        const current = { mediaSource, buffer: null, pending: [], appending: false, count: 0, ended: null };
+        mediaSource.addEventListener('sourceopen', () => {
+          current.buffer = mediaSource.addSourceBuffer(mime);
+          // Every segment starts at zero; play them back to back
+          current.buffer.mode = 'sequence';
+          current.buffer.addEventListener('updateend', () => appendNext(current));
+          appendNext(current);
+        }, { once: true });
+        stream = current;
+        source = 'stream';
+        player.src = URL.createObjectURL(mediaSource);
+        showPlayer();
+      }
+
+      async function appendNext(current) {
+        if (current !== stream || !current.buffer || current.buffer.updating || current.appending) {
+          return;
+        }
+        if (!current.pending.length) {
+          // Closes the duration so the player knows where the video ends
+          if (current.ended && current.mediaSource.readyState === 'open') {
+            current.mediaSource.endOfStream();
+          }
+          return;
+        }
+        current.appending = true;
+        try {
+          const data = await current.pending.shift();
+          if (current === stream) {
+            current.buffer.appendBuffer(data);
+          }
+        } catch (err) {
+          stream = null; // The finished video still replaces the stream
+          if (current.ended) {
+            showVideo(current.ended.uri, current.ended.label);
+          }
+        } finally {
+          current.appending = false;
+        }
+      }
+
+      function showVideo(uri, label) {
+        stream = null;
+        source = 'video';
+        // Keep the playback position when a better render replaces the preview
+        const resumeAt = player.currentTime || 0;
+        player.src = uri;
+        player.addEventListener('loadedmetadata', () => {
+          player.currentTime = Math.min(resumeAt, player.duration || 0);
+        }, { once: true });
+        showPlayer();
+        status.textContent = label || '';
+      }
+
+      window.addEventListener('message', event => {
+        const message = event.data;
+        if (message.type === 'status') {
+          status.textContent = message.text;
+        } else if (message.type === 'image') {
+          still.src = message.uri;
+          if (player.classList.contains('hidden')) {
+            still.classList.remove('hidden');
+          }
+        } else if (message.type === 'segment') {
+          if (message.index === 0) {
+            startStream(message.mime);
+          }
+          if (stream) {
+            stream.count += 1;
+            stream.pending.push(fetch(message.uri).then(response => {
+              if (!response.ok) {
+                throw new Error(response.statusText);
+              }
+              return response.arrayBuffer();
+            }));
+            appendNext(stream);
+          }
+        } else if (message.type === 'video') {
+          if (stream && message.segments === stream.count) {
+            // The stream holds the whole video; keep playing it and end it after the last append
+            stream.ended = { uri: message.uri, label: message.label };
+            status.textContent = message.label || '';
+            appendNext(stream);
+          } else {
+            showVideo(message.uri, message.label);
+          }
+        }
+      });
+
+      if (window.MathJax && MathJax.typesetPromise) {
+        MathJax.typesetPromise();
+      }
     </script>
   </body>
   </html>